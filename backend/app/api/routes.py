@@ -1,13 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
-from app.core.config import AppConfig, DatabricksConfig, save_config, load_config
-from app.services.databricks import databricks_service
+from typing import Literal, Optional
+import asyncio
+import json
+from app.core import tracing
+from app.core.config import AppConfig, DatabricksConfig, config_store, save_config, load_config
+from app.services.databricks import UnsupportedStatement, databricks_service, result_fingerprint
+from app.services.http_pool import workspace_pool
+from app.services.query_cache import query_cache
+from app.services.result_store import result_store
+from app.services.metadata_cache import metadata_cache
+from app.services.metadata_search import metadata_index
+from app.services.dbfs_listing import listing_cache
+from app.services.file_cache import file_cache
+from app.services import arrow_results, result_formats
 
 router = APIRouter()
 
 class QueryRequest(BaseModel):
     query: str
     language: str = "sql"
+    # Optional cap on the number of rows fetched from the result chunks
+    max_rows: Optional[int] = None
+    # High-volume mode: ARROW_STREAM + EXTERNAL_LINKS, decoded as Arrow batches
+    arrow: bool = False
+    # Stream NDJSON frames (schema, row batches, end) as result chunks arrive
+    stream: bool = False
+    # Set to false to bypass the server-side result cache
+    cache: bool = True
+    # Response layout: row dicts (default), columnar lists, or a binary Arrow IPC stream
+    format: Literal["rows", "columnar", "arrow"] = result_formats.ROWS
+
+class QueryJobRequest(BaseModel):
+    query: str
+    catalog: Optional[str] = None
+    schema_name: Optional[str] = None
 
 class ConfigResponse(BaseModel):
     host: str
@@ -16,36 +45,217 @@ class ConfigResponse(BaseModel):
     serving_endpoint: str = ""
     model_name: str = ""
 
+def reset_workspace_state():
+    # Cached results and metadata belong to the previous workspace or credentials
+    query_cache.clear()
+    result_store.invalidate()
+    metadata_cache.clear()
+    metadata_index.clear()
+    listing_cache.clear()
+    file_cache.clear()
+
+# Also runs when the settings file is edited by hand and hot-reloaded
+config_store.subscribe(reset_workspace_state)
+
+class ProfileSummary(BaseModel):
+    name: str
+    host: str
+    warehouse_id: str
+    active: bool
+
 @router.post("/config")
-async def update_config(config: DatabricksConfig):
+async def update_config(config: DatabricksConfig, profile: Optional[str] = None):
     app_config = load_config()
-    app_config.databricks = config
+    if profile:
+        app_config.profiles[profile] = config
+    else:
+        app_config.databricks = config
     save_config(app_config)
+    # Drop pooled connections so the next call picks up the new host/credentials
+    await workspace_pool.reset()
     return {"message": "Configuration saved successfully"}
 
 @router.get("/config", response_model=ConfigResponse)
-async def get_config():
-    app_config = load_config()
-    if not app_config.databricks:
+async def get_config(profile: Optional[str] = None):
+    app_config = config_store.get()
+    name = profile or app_config.active_profile
+    databricks = app_config.profiles.get(name) if name else app_config.databricks
+    if profile and databricks is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile}")
+    if not databricks:
         return ConfigResponse(host="", warehouse_id="", has_token=False)
-    
+
     return ConfigResponse(
-        host=app_config.databricks.host,
-        warehouse_id=app_config.databricks.warehouse_id,
-        has_token=bool(app_config.databricks.token),
-        serving_endpoint=app_config.databricks.serving_endpoint or "",
-        model_name=app_config.databricks.model_name or ""
+        host=databricks.host,
+        warehouse_id=databricks.warehouse_id,
+        has_token=bool(databricks.token),
+        serving_endpoint=databricks.serving_endpoint or "",
+        model_name=databricks.model_name or ""
     )
 
+@router.get("/config/profiles")
+async def list_profiles():
+    app_config = config_store.get()
+    return {
+        "active_profile": app_config.active_profile,
+        "profiles": [
+            ProfileSummary(name=name, host=p.host, warehouse_id=p.warehouse_id,
+                           active=name == app_config.active_profile)
+            for name, p in sorted(app_config.profiles.items())
+        ],
+    }
+
+@router.post("/config/profiles/{name}/activate")
+async def activate_profile(name: str):
+    """Switches the workspace used by every service; an empty name ("-") goes back to the default config."""
+    app_config = load_config()
+    if name != "-" and name not in app_config.profiles:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {name}")
+    app_config.active_profile = None if name == "-" else name
+    save_config(app_config)
+    await workspace_pool.reset()
+    return {"active_profile": app_config.active_profile}
+
+@router.delete("/config/profiles/{name}")
+async def delete_profile(name: str):
+    app_config = load_config()
+    if app_config.profiles.pop(name, None) is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {name}")
+    if app_config.active_profile == name:
+        app_config.active_profile = None
+    save_config(app_config)
+    return {"message": f"Profile {name} deleted"}
+
+@router.post("/config/reload")
+async def reload_config():
+    """Re-reads the settings file and env vars without waiting for the mtime check."""
+    config_store.reload()
+    return config_store.stats()
+
+@router.get("/connections/stats")
+async def get_connection_stats():
+    """Connection pool counters (requests, new connections, reuse ratio)."""
+    return workspace_pool.stats()
+
+async def query_stream_generator(request: QueryRequest):
+    """
+    Emits NDJSON frames for a streamed query:
+      {"type": "schema", "columns": [...]}  from manifest.schema.columns
+      {"type": "rows", "data": [...]}       one frame per result chunk (row dicts,
+                                            or per-column lists with format=columnar)
+      {"type": "end", "row_count": N, "truncated": bool}
+    Errors after the response has started are reported as {"type": "error", "detail": ...}.
+    """
+    outcome = {}
+    row_count = 0
+    columns = []
+    try:
+        stream = databricks_service.stream_sql(request.query, max_rows=request.max_rows, outcome=outcome)
+        manifest = await stream.__anext__()
+        schema_columns = manifest.get("schema", {}).get("columns", [])
+        columns = [col['name'] for col in schema_columns]
+        yield json.dumps({"type": "schema", "columns": schema_columns}) + "\n"
+
+        async for rows in stream:
+            row_count += len(rows)
+            if request.format == result_formats.COLUMNAR:
+                data = result_formats.columnar_payload(schema_columns, rows)["data"]
+            else:
+                data = result_formats.rows_payload(columns, rows)
+            yield json.dumps({"type": "rows", "data": data}, default=str) + "\n"
+
+        yield json.dumps({"type": "end", "row_count": row_count, "truncated": outcome.get("truncated", False)}) + "\n"
+    except Exception as e:
+        yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
+@router.get("/query/cache/stats")
+async def get_query_cache_stats():
+    """Result cache counters (hits, misses, coalesced, evictions) and memory usage."""
+    return query_cache.stats()
+
+@router.delete("/query/cache")
+async def clear_query_cache():
+    query_cache.clear()
+    metadata_cache.clear()
+    return {"message": "Query cache cleared"}
+
+@router.get("/query/store/stats")
+async def get_result_store_stats():
+    """On-disk result store usage and hit/miss/eviction counters."""
+    return await asyncio.to_thread(result_store.stats)
+
+@router.delete("/query/store")
+async def invalidate_result_store(fingerprint: Optional[str] = None, older_than_seconds: Optional[float] = None):
+    """Drops one query fingerprint, every entry older than older_than_seconds, or the whole store."""
+    removed = await asyncio.to_thread(result_store.invalidate, fingerprint, older_than_seconds)
+    return {"removed": removed}
+
+async def run_until_disconnect(http_request: Request, coro, interval: float = 0.5):
+    """
+    Awaits coro, cancelling it if the client disconnects first.
+    Cancellation propagates down to DatabricksService, which cancels the running statement;
+    nobody is left to read a response, so an empty one is returned rather than an error status.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                return Response()
+    finally:
+        if not task.done():
+            task.cancel()
+
 @router.post("/query")
-async def execute_query(request: QueryRequest):
+async def execute_query(request: QueryRequest, http_request: Request):
     if request.language != "sql":
          # For now only SQL is supported via Databricks SQL API
          # Python execution would require a different approach (e.g. Jobs API)
          return {"error": "Only SQL is supported in this backend implementation currently."}
-    
+
+    if request.stream:
+        if request.format == result_formats.ARROW:
+            raise HTTPException(status_code=400, detail="Streaming supports the rows and columnar formats only.")
+        return StreamingResponse(query_stream_generator(request), media_type="application/x-ndjson")
+
+    return await run_until_disconnect(http_request, run_query(request))
+
+def json_response(payload) -> Response:
+    # What FastAPI would do with a returned dict, done here so it is timed as its own phase
+    with tracing.span("serialize"):
+        return JSONResponse(jsonable_encoder(payload))
+
+FINGERPRINT_HEADER = "X-Result-Fingerprint"
+
+def with_fingerprint(response: Response) -> Response:
+    # Identifies the stored result, e.g. for DELETE /api/query/store?fingerprint=...
+    fp = result_fingerprint()
+    if fp is not None:
+        response.headers[FINGERPRINT_HEADER] = fp
+    return response
+
+async def run_query(request: QueryRequest):
     try:
-        result = databricks_service.execute_sql(request.query)
+        if request.arrow:
+            # Rows are built straight from the columnar batches (typed values, no string parsing)
+            manifest, table = await databricks_service.execute_sql_arrow(
+                request.query, max_rows=request.max_rows, use_cache=request.cache
+            )
+            if request.format == result_formats.ARROW:
+                with tracing.span("serialize"):
+                    body = result_formats.arrow_ipc_bytes(table)
+                return with_fingerprint(Response(body, media_type=result_formats.ARROW_MEDIA_TYPE))
+            with tracing.span("transform"):
+                if request.format == result_formats.COLUMNAR:
+                    payload = result_formats.table_columnar_payload(table, manifest.get("schema", {}).get("columns"))
+                else:
+                    payload = {"data": table.to_pylist()}
+            return with_fingerprint(json_response(payload))
+
+        result = await databricks_service.execute_sql(request.query, max_rows=request.max_rows, use_cache=request.cache)
         
         # Transform Databricks SQL API response to a simpler format
         # The API response structure:
@@ -53,19 +263,102 @@ async def execute_query(request: QueryRequest):
         # - result.data_array: the actual data rows
         
         if 'manifest' in result and 'result' in result:
-            columns = [col['name'] for col in result['manifest']['schema']['columns']]
+            schema_columns = result['manifest']['schema']['columns']
             data_array = result['result'].get('data_array', [])
-            data = []
-            for row in data_array:
-                row_dict = {}
-                for i, val in enumerate(row):
-                    row_dict[columns[i]] = val
-                data.append(row_dict)
-            return {"data": data}
+            if request.format == result_formats.ARROW:
+                with tracing.span("transform"):
+                    table = arrow_results.rows_to_table(schema_columns, data_array)
+                with tracing.span("serialize"):
+                    body = result_formats.arrow_ipc_bytes(table)
+                return with_fingerprint(Response(body, media_type=result_formats.ARROW_MEDIA_TYPE))
+            with tracing.span("transform"):
+                if request.format == result_formats.COLUMNAR:
+                    payload = result_formats.columnar_payload(schema_columns, data_array)
+                else:
+                    columns = [col['name'] for col in schema_columns]
+                    payload = {"data": result_formats.rows_payload(columns, data_array)}
+            return with_fingerprint(json_response(payload))
         
         # Fallback for mock service or unexpected response format
         return result
 
+    except UnsupportedStatement as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+def job_status(meta: dict) -> dict:
+    status = meta.get("status", {})
+    manifest = meta.get("manifest") or {}
+    return {
+        "statement_id": meta.get("statement_id"),
+        "state": status.get("state"),
+        "error": (status.get("error") or {}).get("message"),
+        "columns": manifest.get("schema", {}).get("columns"),
+        "total_row_count": manifest.get("total_row_count"),
+        "total_chunk_count": manifest.get("total_chunk_count"),
+        "truncated": manifest.get("truncated", False)
+    }
+
+@router.post("/query/jobs")
+async def create_query_job(request: QueryJobRequest):
+    """Submits a statement without waiting and returns its handle (statement_id)."""
+    try:
+        meta = await databricks_service.submit_statement(request.query, request.catalog, request.schema_name)
+        return job_status(meta)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/query/jobs/{statement_id}")
+async def get_query_job(statement_id: str):
+    """Lifecycle state (PENDING, RUNNING, SUCCEEDED, ...) and result size once known."""
+    try:
+        return job_status(await databricks_service.get_statement(statement_id))
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/query/jobs/{statement_id}/result")
+async def get_query_job_result(statement_id: str, chunk_index: int = 0,
+                               format: Literal["rows", "columnar"] = result_formats.ROWS):
+    """One page (result chunk) of a finished job; follow next_chunk_index for the rest."""
+    try:
+        meta = await databricks_service.get_statement(statement_id)
+        state = meta.get("status", {}).get("state")
+        if state != "SUCCEEDED":
+            raise HTTPException(status_code=409, detail=f"Statement {statement_id} is {state}")
+        schema_columns = (meta.get("manifest") or {}).get("schema", {}).get("columns")
+        if schema_columns is None:
+            # DDL and other statements without a result set: one empty, final page
+            schema_columns = []
+            chunk = {"chunk_index": chunk_index, "row_offset": 0, "data_array": [], "next_chunk_index": None}
+        else:
+            chunk = await databricks_service.get_statement_chunk(statement_id, chunk_index)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if format == result_formats.COLUMNAR:
+        page = result_formats.columnar_payload(schema_columns, chunk["data_array"])
+    else:
+        page = {"data": result_formats.rows_payload([col["name"] for col in schema_columns], chunk["data_array"])}
+    return {
+        **page,
+        "chunk_index": chunk["chunk_index"],
+        "row_offset": chunk["row_offset"],
+        "next_chunk_index": chunk["next_chunk_index"]
+    }
+
+@router.delete("/query/jobs/{statement_id}")
+async def cancel_query_job(statement_id: str):
+    try:
+        return await databricks_service.cancel_statement(statement_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from pydantic import BaseModel
+from typing import Optional
+from app.core.profiling import admin_token, is_admin, request_profiler
+
+router = APIRouter()
+
+def require_admin(x_admin_token: str = Header(default="")):
+    if not admin_token():
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set).")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token.")
+
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    # Only requests whose path starts with this prefix are profiled
+    path_prefix: Optional[str] = None
+    # Fraction of matching requests to profile (0..1)
+    sample_rate: Optional[float] = None
+
+@router.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def get_profiling():
+    """Profiler switch and the most recent profiles (newest first)."""
+    return {**request_profiler.settings(), "profiles": request_profiler.list()}
+
+@router.put("/admin/profiling", dependencies=[Depends(require_admin)])
+async def update_profiling(settings: ProfilingSettings):
+    request_profiler.configure(settings.enabled, settings.path_prefix, settings.sample_rate)
+    return request_profiler.settings()
+
+@router.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str):
+    """Collapsed stacks of one profiled request; open with speedscope or flamegraph.pl."""
+    profile = request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile not found: {profile_id}")
+    return Response(profile["folded"], media_type="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'
+    })
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
-import httpx
-import json
-from app.core.config import load_config
+from app.core.config import get_databricks_config
+from app.services.completion_cache import completion_cache
+from app.services.serving import EndpointBusy, serving_proxy, sse_event
 
 router = APIRouter()
 
@@ -17,63 +17,94 @@ class ChatRequest(BaseModel):
     # Allows override by frontend, but uses config as fallback
     endpoint_name: Optional[str] = None 
     temperature: Optional[float] = 0.7
+    # Set to false to bypass the completion cache for this turn
+    cache: bool = True
 
-async def databricks_stream_generator(payload: dict, config):
+def resolve_endpoint_url(endpoint: str, config) -> str:
+    # If the endpoint is a full URL, use it. Otherwise construct it.
+    if endpoint.startswith("http"):
+        return endpoint
+    return f"{config.base_url}/serving-endpoints/{endpoint}/invocations"
+
+def request_user(request: Request) -> str:
+    # Fairness key for the serving queue: explicit user header, else the client address
+    return request.headers.get("X-User-Id") or (request.client.host if request.client else "anonymous")
+
+async def error_stream(message: str):
+    yield sse_event({"error": message})
+
+class SlotStreamingResponse(StreamingResponse):
     """
-    Generator that maintains connection with Databricks and forwards bytes.
+    Streams a completion and gives the serving slot back however the response ends.
+    The stream releases it once the upstream is done, but a client that disconnects
+    before the body is iterated never runs the stream, so sending does it as well.
     """
-    # Dynamic URL construction based on config
-    endpoint = payload.get("endpoint_name") or config.serving_endpoint
-    
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self.release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.release()
+
+@router.post("/chat/completions")
+async def chat_completions(body: ChatRequest, request: Request):
+    config = get_databricks_config()
+    if not config or not config.token:
+        raise HTTPException(status_code=500, detail="Invalid Databricks configuration.")
+
+    endpoint = body.endpoint_name or config.serving_endpoint
     if not endpoint:
-        yield f"data: {json.dumps({'error': 'No serving endpoint configured.'})}\n\n"
-        return
+        return StreamingResponse(error_stream("No serving endpoint configured."), media_type="text/event-stream")
+    url = resolve_endpoint_url(endpoint, config)
 
-    # Clean host URL
-    host = config.host.rstrip('/')
-    # If the endpoint is a full URL, use it. Otherwise construct it.
-    if endpoint.startswith("http"):
-        url = endpoint
-    else:
-        url = f"{host}/serving-endpoints/{endpoint}/invocations"
-    
-    headers = {
-        "Authorization": f"Bearer {config.token}",
-        "Content-Type": "application/json"
-    }
-    
     # Payload compatible with OpenAI/Databricks Foundation Models
     db_payload = {
-        "messages": payload["messages"],
-        "temperature": payload.get("temperature", 0.7),
+        "messages": [m.model_dump() for m in body.messages],
+        "temperature": body.temperature if body.temperature is not None else 0.7,
         "max_tokens": 2000, # Safe configuration
         "stream": True # Enable SSE
     }
 
-    async with httpx.AsyncClient(timeout=120.0) as client:
-        try:
-            async with client.stream("POST", url, headers=headers, json=db_payload) as response:
-                if response.status_code != 200:
-                    error_msg = await response.aread()
-                    yield f"data: {json.dumps({'error': f'Error {response.status_code}: {error_msg.decode()}'})}\n\n"
-                    return
-
-                async for chunk in response.aiter_bytes():
-                    # Direct pass-through of bytes preserves SSE formatting
-                    yield chunk
-        except httpx.ReadTimeout:
-            yield f"data: {json.dumps({'error': 'Timeout connecting to model.'})}\n\n"
-        except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    # Deterministic repeats are replayed without touching the endpoint (opt-in, see CompletionCache)
+    cache_key = completion_cache.make_key(url, db_payload) if body.cache else None
+    if cache_key is not None:
+        events = completion_cache.get(cache_key)
+        if events is not None:
+            return StreamingResponse(completion_cache.replay(events), media_type="text/event-stream",
+                                     headers={"X-Cache": "HIT"})
 
-@router.post("/chat/completions")
-async def chat_completions(request: ChatRequest):
-    config = load_config().databricks
-    if not config or not config.token:
-        raise HTTPException(status_code=500, detail="Invalid Databricks configuration.")
-    
-    return StreamingResponse(
-        databricks_stream_generator(request.model_dump(), config),
-        media_type="text/event-stream"
-    )
+    # Wait for a slot before answering, so an overloaded endpoint surfaces as a 429
+    try:
+        release = await serving_proxy.acquire(url, request_user(request))
+    except EndpointBusy as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    on_complete = (lambda chunks: completion_cache.put(cache_key, chunks)) if cache_key is not None else None
+    try:
+        return SlotStreamingResponse(
+            serving_proxy.stream(url, config.auth_headers, db_payload, release, on_complete=on_complete),
+            release,
+            media_type="text/event-stream",
+            headers={"X-Cache": "MISS" if cache_key is not None else "BYPASS"}
+        )
+    except BaseException:
+        release()
+        raise
+
+@router.get("/chat/stats")
+async def chat_stats():
+    return serving_proxy.stats()
+
+@router.get("/chat/cache/stats")
+async def get_completion_cache_stats():
+    """Completion cache counters (hits, misses, bypassed, evictions) and memory usage."""
+    return completion_cache.stats()
 
+@router.delete("/chat/cache")
+async def clear_completion_cache():
+    completion_cache.clear()
+    return {"message": "Completion cache cleared"}
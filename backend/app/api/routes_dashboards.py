@@ -0,0 +1,150 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import Any, List, Literal, Optional
+import asyncio
+import json
+from app.services.aggregation import compile_aggregate_query, quote_table
+from app.services.databricks import databricks_service
+from app.services import result_formats
+
+router = APIRouter()
+
+class MeasureSpec(BaseModel):
+    column: Optional[str] = None  # None or "*" means COUNT(*)
+    aggregation: Literal["sum", "avg", "min", "max", "count", "count_distinct"]
+    alias: Optional[str] = None
+
+class FilterSpec(BaseModel):
+    column: str
+    operator: Literal["===", "!==", ">", "<", ">=", "<=", "contains", "not-contains"]
+    value: Any = None
+
+class SortSpec(BaseModel):
+    column: str
+    direction: Literal["asc", "desc"] = "asc"
+
+class AggregateRequest(BaseModel):
+    data_source: str  # catalog.schema.table
+    dimensions: List[str] = []
+    measures: List[MeasureSpec] = []
+    filters: List[FilterSpec] = []
+    sort: List[SortSpec] = []
+    limit: Optional[int] = 1000
+    format: Literal["rows", "columnar"] = result_formats.ROWS
+
+class WidgetDataRequest(BaseModel):
+    widget_id: str
+    # Exactly one of: raw SQL, an aggregation spec, or a table to read
+    query: Optional[str] = None
+    aggregate: Optional[AggregateRequest] = None
+    data_source: Optional[str] = None
+    max_rows: Optional[int] = None
+
+class DashboardDataRequest(BaseModel):
+    widgets: List[WidgetDataRequest]
+    max_concurrency: int = 4
+    format: Literal["rows", "columnar"] = result_formats.ROWS
+
+# Upper bound for DashboardDataRequest.max_concurrency
+MAX_DASHBOARD_CONCURRENCY = 16
+
+def compile_aggregate(request: AggregateRequest):
+    return compile_aggregate_query(
+        request.data_source,
+        dimensions=request.dimensions,
+        measures=[m.model_dump() for m in request.measures],
+        filters=[f.model_dump() for f in request.filters],
+        sort=[s.model_dump() for s in request.sort],
+        limit=request.limit
+    )
+
+def format_result(result: dict, format: str):
+    schema_columns = result.get("manifest", {}).get("schema", {}).get("columns", [])
+    data_array = (result.get("result") or {}).get("data_array", [])
+    if format == result_formats.COLUMNAR:
+        return result_formats.columnar_payload(schema_columns, data_array)
+    columns = [col["name"] for col in schema_columns]
+    return {"data": result_formats.rows_payload(columns, data_array)}
+
+@router.post("/widgets/aggregate")
+async def aggregate_widget_data(request: AggregateRequest):
+    """
+    Aggregation pushdown for dashboard widgets: compiles dimensions, measures,
+    filters, sort and limit into a parameterized GROUP BY and returns only the
+    aggregated rows.
+    """
+    try:
+        sql, parameters = compile_aggregate(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await databricks_service.execute_sql(sql, parameters=parameters)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return format_result(result, request.format)
+
+def widget_statement(widget: WidgetDataRequest):
+    """Resolves a widget request to (sql, parameters)."""
+    if widget.aggregate is not None:
+        return compile_aggregate(widget.aggregate)
+    if widget.query:
+        return widget.query, None
+    if widget.data_source:
+        return f"SELECT * FROM {quote_table(widget.data_source)} LIMIT 1000", None
+    raise ValueError("Widget request needs a query, an aggregate spec or a data_source")
+
+async def dashboard_data_generator(request: DashboardDataRequest):
+    """
+    Emits one NDJSON frame per widget as soon as its statement finishes:
+      {"type": "widget", "widget_id": ..., "data": ...}   (or "error": ...)
+    followed by {"type": "end", "statements": N, "widgets": M}.
+    Widgets that resolve to the same statement share a single execution.
+    """
+    groups = {}
+    for widget in request.widgets:
+        try:
+            sql, parameters = widget_statement(widget)
+        except ValueError as e:
+            yield json.dumps({"type": "widget", "widget_id": widget.widget_id, "error": str(e)}) + "\n"
+            continue
+        key = (sql, json.dumps(parameters, sort_keys=True), widget.max_rows)
+        if key not in groups:
+            groups[key] = {"sql": sql, "parameters": parameters, "max_rows": widget.max_rows, "widget_ids": []}
+        groups[key]["widget_ids"].append(widget.widget_id)
+
+    semaphore = asyncio.Semaphore(max(1, min(request.max_concurrency, MAX_DASHBOARD_CONCURRENCY)))
+
+    async def run(group):
+        async with semaphore:
+            try:
+                result = await databricks_service.execute_sql(
+                    group["sql"], parameters=group["parameters"], max_rows=group["max_rows"]
+                )
+                return group, format_result(result, request.format), None
+            except Exception as e:
+                return group, None, str(e)
+
+    tasks = [asyncio.ensure_future(run(group)) for group in groups.values()]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            group, payload, error = await next_done
+            for widget_id in group["widget_ids"]:
+                frame = {"type": "widget", "widget_id": widget_id}
+                if error is not None:
+                    frame["error"] = error
+                else:
+                    frame.update(payload)
+                yield json.dumps(frame, default=str) + "\n"
+        yield json.dumps({"type": "end", "statements": len(groups), "widgets": len(request.widgets)}) + "\n"
+    finally:
+        # Client went away: stop the statements that are still running
+        for task in tasks:
+            task.cancel()
+
+@router.post("/dashboards/data")
+async def get_dashboard_data(request: DashboardDataRequest):
+    """Loads every widget of a dashboard in one round trip, streaming results as NDJSON."""
+    return StreamingResponse(dashboard_data_generator(request), media_type="application/x-ndjson")
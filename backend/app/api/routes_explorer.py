@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from pydantic import BaseModel
-from app.services.databricks import databricks_service
+from app.services.metadata_cache import metadata_cache
+from app.services.metadata_search import KINDS, MAX_LIMIT, metadata_index
+from app.services.metastore_crawler import DEFAULT_CONCURRENCY, MAX_CONCURRENCY, metastore_crawler
 
 router = APIRouter()
 
@@ -34,11 +36,13 @@ class TableDetailsNode(TableNode):
     comment: Optional[str] = None
     columns: List[ColumnNode]
 
+REFRESH_DESCRIPTION = "Ignora o cache e busca novamente no Unity Catalog"
+
 @router.get("/explorer/catalogs", response_model=List[CatalogNode])
-async def get_catalogs():
+async def get_catalogs(refresh: bool = Query(False, description=REFRESH_DESCRIPTION)):
     """Retorna a lista de catálogos disponíveis."""
     try:
-        raw_catalogs = databricks_service.list_catalogs()
+        raw_catalogs = await metadata_cache.list_catalogs(force=refresh)
         # Transformação de dados brutos da API Databricks para o modelo do frontend
         return [
             CatalogNode(
@@ -51,9 +55,12 @@ async def get_catalogs():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/explorer/schemas", response_model=List[SchemaNode])
-async def get_schemas(catalog_name: str = Query(..., description="Nome do catálogo pai")):
+async def get_schemas(
+    catalog_name: str = Query(..., description="Nome do catálogo pai"),
+    refresh: bool = Query(False, description=REFRESH_DESCRIPTION)
+):
     try:
-        raw_schemas = databricks_service.list_schemas(catalog_name)
+        raw_schemas = await metadata_cache.list_schemas(catalog_name, force=refresh)
         return [
             SchemaNode(
                 name=s['name'],
@@ -67,10 +74,11 @@ async def get_schemas(catalog_name: str = Query(..., description="Nome do catál
 @router.get("/explorer/tables", response_model=List[TableNode])
 async def get_tables(
     catalog_name: str = Query(..., description="Nome do catálogo pai"),
-    schema_name: str = Query(..., description="Nome do esquema pai")
+    schema_name: str = Query(..., description="Nome do esquema pai"),
+    refresh: bool = Query(False, description=REFRESH_DESCRIPTION)
 ):
     try:
-        raw_tables = databricks_service.list_tables(catalog_name, schema_name)
+        raw_tables = await metadata_cache.list_tables(catalog_name, schema_name, force=refresh)
         return [
             TableNode(
                 name=t['name'],
@@ -84,10 +92,13 @@ async def get_tables(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/explorer/table/{full_table_name}", response_model=TableDetailsNode)
-async def get_table_details(full_table_name: str):
+async def get_table_details(
+    full_table_name: str,
+    refresh: bool = Query(False, description=REFRESH_DESCRIPTION)
+):
     """Retorna detalhes completos de uma tabela, incluindo colunas."""
     try:
-        table_data = databricks_service.get_table(full_table_name)
+        table_data = await metadata_cache.get_table(full_table_name, force=refresh)
         
         # Mapear colunas
         columns = [
@@ -110,3 +121,89 @@ async def get_table_details(full_table_name: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/explorer/tree")
+async def get_tree(
+    catalog_name: Optional[str] = Query(None, description="Restringe o crawl a um catálogo"),
+    schema_name: Optional[str] = Query(None, description="Restringe o crawl a um esquema do catálogo"),
+    include_columns: bool = Query(False, description="Inclui as colunas de cada tabela"),
+    max_concurrency: int = Query(DEFAULT_CONCURRENCY, ge=1, le=MAX_CONCURRENCY, description="Chamadas simultâneas ao Unity Catalog"),
+    refresh: bool = Query(False, description=REFRESH_DESCRIPTION)
+):
+    """
+    Retorna a hierarquia completa (catálogos, esquemas, tabelas e opcionalmente colunas)
+    numa única resposta compacta, para a sidebar e para as ferramentas list_* do agente.
+    """
+    if schema_name and not catalog_name:
+        raise HTTPException(status_code=400, detail="Informe o catálogo do esquema.")
+    try:
+        return await metastore_crawler.crawl(
+            catalog_name=catalog_name,
+            schema_name=schema_name,
+            include_columns=include_columns,
+            max_concurrency=max_concurrency,
+            force=refresh
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/explorer/search")
+async def search_metadata(
+    q: str = Query(..., min_length=1, description="Termos de busca (nome, prefixo, comentário ou tipo)"),
+    kind: Optional[List[str]] = Query(None, description="Filtra por catalog, schema, table ou column"),
+    catalog_name: Optional[str] = Query(None, description="Restringe a busca a um catálogo"),
+    schema_name: Optional[str] = Query(None, description="Restringe a busca a um esquema do catálogo"),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Busca ranqueada e paginada sobre catálogos, esquemas, tabelas e colunas.
+    Na primeira chamada, com o índice vazio, faz um crawl (sem colunas) para montá-lo.
+    """
+    if kind and any(k not in KINDS for k in kind):
+        raise HTTPException(status_code=400, detail=f"kind deve ser um de: {', '.join(KINDS)}")
+    if schema_name and not catalog_name:
+        raise HTTPException(status_code=400, detail="Informe o catálogo do esquema.")
+    try:
+        if metadata_index.is_empty():
+            await metastore_crawler.crawl()
+        scope = ".".join(part for part in (catalog_name, schema_name) if part) or None
+        return metadata_index.search(q, kinds=kind, scope=scope, limit=limit, offset=offset)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/explorer/search/reindex")
+async def reindex_metadata(
+    catalog_name: Optional[str] = Query(None, description="Reindexa apenas um catálogo"),
+    include_columns: bool = Query(True, description="Também indexa as colunas de cada tabela")
+):
+    """Recarrega os metadados do Unity Catalog; o índice é atualizado a cada nó recarregado."""
+    try:
+        crawl = await metastore_crawler.crawl(catalog_name=catalog_name, include_columns=include_columns, force=True)
+        return {"crawl": crawl["stats"], "errors": crawl["errors"], "index": metadata_index.stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/explorer/cache/stats")
+async def get_explorer_cache_stats():
+    """Contadores do cache de metadados (hits, stale hits, misses, refreshes)."""
+    return {**metadata_cache.stats(), "search_index": metadata_index.stats()}
+
+@router.post("/explorer/cache/invalidate")
+async def invalidate_explorer_cache(
+    catalog_name: Optional[str] = Query(None, description="Catálogo a invalidar (vazio limpa tudo)"),
+    schema_name: Optional[str] = Query(None, description="Esquema a invalidar"),
+    table_name: Optional[str] = Query(None, description="Tabela a invalidar")
+):
+    """Remove do cache o nó indicado e tudo abaixo dele."""
+    path = tuple(part for part in (catalog_name, schema_name, table_name) if part)
+    if (schema_name and not catalog_name) or (table_name and not schema_name):
+        raise HTTPException(status_code=400, detail="Informe o caminho completo até o nó a invalidar.")
+    return {"removed": metadata_cache.invalidate(path)}
+
+@router.post("/explorer/cache/warm")
+async def warm_explorer_cache(include_tables: bool = Query(False, description="Também pré-carrega as tabelas")):
+    """Pré-carrega o cache e liga a renovação proativa em segundo plano."""
+    try:
+        return await metadata_cache.warm(include_tables=include_tables)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
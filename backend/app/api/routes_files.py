@@ -1,6 +1,16 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
+import json
+import mimetypes
+import re
+from app.core import tracing
 from app.services.databricks import databricks_service
+from app.services.file_cache import etag_for, etag_matches, file_cache
+from app.services.dbfs_listing import (
+    DEFAULT_CONCURRENCY, DEFAULT_MAX_DEPTH, DEFAULT_MAX_ENTRIES, file_entry, listing_cache, walk_directory
+)
 
 router = APIRouter()
 
@@ -8,37 +18,190 @@ class FileContent(BaseModel):
     path: str
     content: str
 
+async def listing_stream_generator(walk):
+    """NDJSON frames: {"type": "entries", "files": [...]} per directory, then {"type": "end", ...}."""
+    try:
+        async for kind, payload in walk:
+            if kind == "entries":
+                yield json.dumps({"type": "entries", "files": payload}) + "\n"
+            else:
+                yield json.dumps({"type": "end", **payload}) + "\n"
+    except Exception as e:
+        yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+
 @router.get("/listdir")
-async def list_directory(path: str = Query(..., description="Path to directory in DBFS")):
+async def list_directory(
+    path: str = Query(..., description="Path to directory in DBFS"),
+    recursive: bool = Query(False, description="Walk subdirectories concurrently"),
+    max_depth: int = Query(DEFAULT_MAX_DEPTH, ge=1, le=50, description="Levels to descend when recursive"),
+    max_entries: int = Query(DEFAULT_MAX_ENTRIES, ge=1, le=100000, description="Stop after this many entries"),
+    max_concurrency: int = Query(DEFAULT_CONCURRENCY, ge=1, le=32),
+    pattern: Optional[str] = Query(None, description="Only return names matching this glob (e.g. *.sql)"),
+    stream: bool = Query(False, description="Stream NDJSON frames as directories are listed"),
+    refresh: bool = Query(False, description="Bypass the listing cache")
+):
+    if not recursive:
+        try:
+            files = await listing_cache.list(path, force=refresh)
+            return {"files": [file_entry(f) for f in files]}
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    walk = walk_directory(path, max_depth=max_depth, max_entries=max_entries, max_concurrency=max_concurrency,
+                          pattern=pattern, force=refresh)
+    if stream:
+        return StreamingResponse(listing_stream_generator(walk), media_type="application/x-ndjson")
     try:
-        result = databricks_service.list_directory(path)
-        # Format response to match frontend expectations if necessary
-        # The Databricks API returns { "files": [ { "path": "...", "is_dir": bool, "file_size": int } ] }
-        # We might want to normalize this.
         files = []
-        if "files" in result:
-            for f in result["files"]:
-                files.append({
-                    "name": f["path"].split("/")[-1],
-                    "path": f["path"],
-                    "type": "directory" if f["is_dir"] else "file",
-                    "size": f["file_size"]
-                })
-        return {"files": files}
+        summary = {}
+        async for kind, payload in walk:
+            if kind == "entries":
+                files.extend(payload)
+            else:
+                summary = payload
+        return {"files": files, **summary}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/listdir/cache/stats")
+async def get_listing_cache_stats():
+    return listing_cache.stats()
+
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: str, size: int):
+    """
+    Parses a single-range Range header into (offset, length).
+    Supports "bytes=start-end", "bytes=start-" and "bytes=-suffix"; raises 416 otherwise,
+    including for an empty suffix ("bytes=-0") or any suffix of an empty file.
+    """
+    match = _RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        raise HTTPException(status_code=416, detail="Only single byte ranges are supported",
+                            headers={"Content-Range": f"bytes */{size}"})
+    start, end = match.groups()
+    if start == "":
+        length = min(int(end), size)
+        if length == 0:
+            raise HTTPException(status_code=416, detail="Range not satisfiable",
+                                headers={"Content-Range": f"bytes */{size}"})
+        return size - length, length
+    start = int(start)
+    end = size - 1 if end == "" else min(int(end), size - 1)
+    if start >= size or end < start:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{size}"})
+    return start, end - start + 1
+
+# Browsers keep the body but revalidate every time, so reopening an unchanged file costs a 304
+REVALIDATE = "no-cache"
+
 @router.get("/files")
-async def get_file(path: str = Query(..., description="Path to file in DBFS")):
+async def get_file(
+    request: Request,
+    path: str = Query(..., description="Path to file in DBFS"),
+    offset: int = Query(0, ge=0, description="First byte to read"),
+    length: Optional[int] = Query(None, ge=1, description="Number of bytes to read (default: to the end)")
+):
+    """
+    Whole-file reads carry an ETag built from the DBFS status (size, modification time).
+    A matching If-None-Match gets a 304; otherwise decoded contents come from a
+    server-side LRU while the ETag still matches, and from DBFS when it does not.
+    """
     try:
-        return databricks_service.read_file(path)
+        if offset or length is not None:
+            return await databricks_service.read_file(path, offset, length)
+
+        status = await databricks_service.get_file_status(path)
+        etag = etag_for(status)
+        headers = {"ETag": etag, "Cache-Control": REVALIDATE}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            file_cache.record_not_modified()
+            return Response(status_code=304, headers=headers)
+
+        content = file_cache.get(path, etag)
+        tracing.mark("file-cache", "miss" if content is None else "hit")
+        if content is None:
+            content = (await databricks_service.read_file(path))["content"]
+            file_cache.put(path, etag, content, status.get("file_size", len(content)))
+        return JSONResponse({"path": path, "content": content}, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/files/cache/stats")
+async def get_file_cache_stats():
+    return file_cache.stats()
+
+@router.get("/files/download")
+async def download_file(request: Request, path: str = Query(..., description="Path to file in DBFS")):
+    """
+    Streams the raw file in DBFS-sized blocks instead of one JSON document.
+    Honours a single Range header (206 Partial Content), so large files can be
+    fetched, resumed or previewed piece by piece.
+    """
+    try:
+        status = await databricks_service.get_file_status(path)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    if status.get("is_dir"):
+        raise HTTPException(status_code=400, detail=f"{path} is a directory")
+
+    size = status.get("file_size", 0)
+    etag = etag_for(status)
+    offset, length, status_code = 0, size, 200
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{path.rstrip("/").split("/")[-1]}"',
+        "ETag": etag,
+        "Cache-Control": REVALIDATE,
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        file_cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # A Range with a stale If-Range validator gets the whole (changed) file instead
+    if range_header and size and (not if_range or if_range == etag):
+        offset, length = parse_range(range_header, size)
+        status_code = 206
+        headers["Content-Range"] = f"bytes {offset}-{offset + length - 1}/{size}"
+    headers["Content-Length"] = str(length)
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return StreamingResponse(
+        databricks_service.iter_file(path, offset, length),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
+
 @router.post("/files")
 async def save_file(file_data: FileContent):
     try:
-        return databricks_service.write_file(file_data.path, file_data.content)
+        return await databricks_service.write_file(file_data.path, file_data.content)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Even a failed write may have created or truncated the file
+        listing_cache.invalidate(file_data.path)
+        file_cache.invalidate(file_data.path)
+
+@router.put("/files/upload")
+async def upload_file(
+    request: Request,
+    path: str = Query(..., description="Destination path in DBFS"),
+    overwrite: bool = Query(True)
+):
+    """
+    Streams the raw request body to DBFS (create / add-block / close).
+    The body is never held in memory as a whole; at most one 1 MB block is buffered.
+    """
+    try:
+        written = await databricks_service.write_file_stream(path, request.stream(), overwrite)
+        return {"message": "File saved successfully", "path": path, "bytes": written}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        listing_cache.invalidate(path)
+        file_cache.invalidate(path)
 
@@ -1,8 +1,16 @@
+import hashlib
 import json
+import logging
 import os
-from typing import Optional
+import threading
+import time
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, Optional
 from pydantic import BaseModel
 
+logger = logging.getLogger(__name__)
+
 CONFIG_FILE = "config/app_settings.json"
 
 class DatabricksConfig(BaseModel):
@@ -12,41 +20,177 @@ class DatabricksConfig(BaseModel):
     serving_endpoint: Optional[str] = None
     model_name: Optional[str] = None
 
-class AppConfig(BaseModel):
-    databricks: Optional[DatabricksConfig] = None
+    # Resolved configs are cached by ConfigStore, so these are computed once per reload
 
-def load_config() -> AppConfig:
-    if not os.path.exists(CONFIG_FILE):
-        return AppConfig()
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            data = json.load(f)
-            return AppConfig(**data)
-    except Exception:
-        return AppConfig()
+    @cached_property
+    def base_url(self) -> str:
+        return self.host.rstrip("/")
 
-def save_config(config: AppConfig):
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        f.write(config.model_dump_json(indent=2))
+    @cached_property
+    def credential_hash(self) -> str:
+        # Identifies the token (and so the principal) in cache keys without storing it
+        return hashlib.sha256(self.token.encode("utf-8")).hexdigest()[:16]
+
+    @cached_property
+    def auth_headers(self):
+        # Shared between requests: read-only on purpose
+        return MappingProxyType({
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        })
+
+class AppConfig(BaseModel):
+    databricks: Optional[DatabricksConfig] = None
+    # Named workspace profiles; active_profile selects one instead of `databricks`
+    profiles: Dict[str, DatabricksConfig] = {}
+    active_profile: Optional[str] = None
 
-def get_databricks_config() -> Optional[DatabricksConfig]:
-    config = load_config()
-    # Prioritize env vars if set (optional, but good practice)
+def _env_config() -> Optional[DatabricksConfig]:
+    # Env vars take priority over the settings file when all three are set
     host = os.getenv("DATABRICKS_HOST")
     token = os.getenv("DATABRICKS_TOKEN")
     warehouse_id = os.getenv("DATABRICKS_WAREHOUSE_ID")
-    serving_endpoint = os.getenv("DATABRICKS_SERVING_ENDPOINT")
-    model_name = os.getenv("DATABRICKS_MODEL_NAME")
-    
     if host and token and warehouse_id:
         return DatabricksConfig(
-            host=host, 
-            token=token, 
+            host=host,
+            token=token,
             warehouse_id=warehouse_id,
-            serving_endpoint=serving_endpoint,
-            model_name=model_name
+            serving_endpoint=os.getenv("DATABRICKS_SERVING_ENDPOINT"),
+            model_name=os.getenv("DATABRICKS_MODEL_NAME")
         )
-        
-    return config.databricks
+    return None
+
+class _Snapshot:
+    __slots__ = ("app", "env", "mtime")
+
+    def __init__(self, app: AppConfig, env: Optional[DatabricksConfig], mtime: Optional[int]):
+        self.app = app
+        self.env = env
+        self.mtime = mtime
+
+class ConfigStore:
+    """
+    Parsed settings kept in memory and swapped atomically on reload.
+
+    The settings file is only stat'ed once every check_interval seconds and only
+    re-read when its mtime changes, so request paths never touch the disk.
+    save() writes atomically and refreshes the snapshot immediately.
+    Callbacks registered with subscribe() run when the resolved workspace changes.
+    """
+
+    def __init__(self, path: str = CONFIG_FILE, check_interval: float = None):
+        self.path = path
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv("CONFIG_RELOAD_INTERVAL", 1.0))
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._next_check = 0.0
+        self._listeners = []
+        self._counters = {"reads": 0, "reloads": 0, "reload_errors": 0}
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self, previous: Optional[_Snapshot]) -> _Snapshot:
+        mtime = self._mtime()
+        if mtime is None:
+            return _Snapshot(AppConfig(), _env_config(), None)
+        try:
+            with open(self.path, "r") as f:
+                app = AppConfig(**json.load(f))
+        except Exception as e:
+            # A half-written or invalid file keeps the last good settings
+            self._counters["reload_errors"] += 1
+            logger.warning("Failed to load %s: %s", self.path, e)
+            app = previous.app if previous is not None else AppConfig()
+        return _Snapshot(app, _env_config(), mtime)
+
+    def snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or (now >= self._next_check and self._mtime() != snapshot.mtime):
+                self._install(self._read(snapshot))
+            self._next_check = now + self.check_interval
+            return self._snapshot
+
+    def _install(self, snapshot: _Snapshot):
+        previous = self._snapshot
+        self._snapshot = snapshot
+        self._counters["reloads"] += 1
+        if previous is not None and self._resolve(previous) != self._resolve(snapshot):
+            for listener in self._listeners:
+                try:
+                    listener()
+                except Exception:
+                    logger.exception("Config change listener failed")
+
+    def _resolve(self, snapshot: _Snapshot, profile: str = None) -> Optional[DatabricksConfig]:
+        app = snapshot.app
+        if profile is not None:
+            return app.profiles.get(profile)
+        if snapshot.env is not None:
+            return snapshot.env
+        if app.active_profile and app.active_profile in app.profiles:
+            return app.profiles[app.active_profile]
+        return app.databricks
+
+    def get(self) -> AppConfig:
+        """Cached settings; treat as read-only (use load_config() for a copy to edit)."""
+        self._counters["reads"] += 1
+        return self.snapshot().app
+
+    def get_databricks(self, profile: str = None) -> Optional[DatabricksConfig]:
+        self._counters["reads"] += 1
+        return self._resolve(self.snapshot(), profile)
+
+    def save(self, config: AppConfig):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(config.model_dump_json(indent=2))
+            os.replace(tmp_path, self.path)
+            self._install(_Snapshot(_copy(config), _env_config(), self._mtime()))
+            self._next_check = time.monotonic() + self.check_interval
+
+    def reload(self):
+        """Re-reads the file and env vars now, regardless of mtime."""
+        with self._lock:
+            self._install(self._read(self._snapshot))
+            self._next_check = time.monotonic() + self.check_interval
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot()
+        return {
+            **self._counters,
+            "path": self.path,
+            "check_interval": self.check_interval,
+            "profiles": sorted(snapshot.app.profiles),
+            "active_profile": snapshot.app.active_profile,
+            "env_override": snapshot.env is not None,
+        }
+
+def _copy(config: AppConfig) -> AppConfig:
+    # Round-trip through plain data: copies the fields without the cached headers
+    return AppConfig.model_validate(config.model_dump())
+
+config_store = ConfigStore()
+
+def load_config() -> AppConfig:
+    # Copy, so callers can edit and save it without touching the shared snapshot
+    return _copy(config_store.get())
+
+def save_config(config: AppConfig):
+    config_store.save(config)
 
+def get_databricks_config(profile: str = None) -> Optional[DatabricksConfig]:
+    return config_store.get_databricks(profile)
@@ -0,0 +1,236 @@
+import bisect
+import math
+import time
+
+# Latency buckets in seconds: sub-millisecond handler work up to long-running statements
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+POLL_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+
+    def labels(self, *values):
+        """Child for one label combination; cache it on hot paths."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # One bisect and three increments: cheap enough for every request
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), child.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class Registry:
+    """
+    Minimal Prometheus registry rendering the text exposition format (0.0.4).
+
+    Recording is a dict lookup plus a few float additions, with no locks:
+    metrics are updated from the event loop thread only.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time spent serving API requests, until the last body byte.",
+    ("method", "route", "status"))
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "API requests currently being served.")
+http_exceptions = registry.counter(
+    "http_exceptions_total", "Unhandled exceptions raised by API routes, by type.", ("route", "type"))
+
+upstream_duration = registry.histogram(
+    "databricks_request_duration_seconds", "Databricks REST call latency including the response body, by API.",
+    ("api", "method"))
+upstream_requests = registry.counter(
+    "databricks_requests_total", "Databricks REST calls by API and HTTP status.", ("api", "status"))
+upstream_errors = registry.counter(
+    "databricks_errors_total", "Databricks REST calls that failed without a response, by API and error type.",
+    ("api", "type"))
+upstream_bytes = registry.counter(
+    "databricks_response_bytes_total", "Response bytes received from Databricks, by API.", ("api",))
+
+statement_polls = registry.histogram(
+    "databricks_statement_polls", "Status polls needed per SQL statement.", (), POLL_BUCKETS)
+statement_wait = registry.histogram(
+    "databricks_statement_wait_seconds", "Time from submit until a statement reached a terminal state.")
+statements = registry.counter(
+    "databricks_statements_total", "SQL statements by terminal state.", ("state",))
+result_rows = registry.counter(
+    "databricks_result_rows_total", "Result rows fetched from statement chunks and external links.")
+
+phase_duration = registry.histogram(
+    "app_phase_duration_seconds", "Time spent in backend processing phases (transform, serialize, ...).",
+    ("phase",))
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request until its last body byte, so
+    streaming responses are measured end to end. Routes are labelled by their
+    path template (/api/query/jobs/{statement_id}), never by the raw path.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.labels().inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            http_exceptions.labels(_route_label(scope), type(e).__name__).inc()
+            raise
+        finally:
+            http_requests_in_flight.labels().dec()
+            http_request_duration.labels(scope["method"], _route_label(scope), str(status)).observe(
+                time.perf_counter() - start)
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    # The static frontend is mounted at "/"
+    if not path:
+        return "static"
+    # Routes of an included router may only know their path below its prefix ("/api"):
+    # whatever precedes the matched part of the request path is that prefix
+    try:
+        matched = route.path_format.format(**scope.get("path_params", {}))
+    except (AttributeError, KeyError, IndexError, ValueError):
+        return path
+    full = scope.get("path", "")
+    if full != matched and full.endswith(matched):
+        return full[:-len(matched)] + path
+    return path
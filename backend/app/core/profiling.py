@@ -0,0 +1,171 @@
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+ADMIN_TOKEN_HEADER = "x-admin-token"
+PROFILE_HEADER = "x-profile"
+MAX_STACK_DEPTH = 128
+
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def admin_token() -> str:
+    # Profiling (and every /api/admin route) is disabled unless a token is configured
+    return os.getenv("ADMIN_TOKEN", "")
+
+def is_admin(token: str) -> bool:
+    expected = admin_token()
+    return bool(expected) and bool(token) and hmac.compare_digest(token, expected)
+
+def _frame_name(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_APP_ROOT):
+        filename = os.path.relpath(filename, _APP_ROOT)
+    else:
+        filename = "/".join(filename.split(os.sep)[-2:])
+    # ";" separates frames in the folded format
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of one thread (the event loop) every interval
+    seconds from a daemon thread. Everything running on the loop is sampled,
+    including other requests served at the same time.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+def folded(samples: Counter) -> str:
+    """Collapsed stacks ("root;...;leaf count"), the input of flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+class RequestProfiler:
+    """
+    Admin switch deciding which requests get profiled, plus the last profiles.
+
+    A request is profiled when it carries X-Profile: 1 with a valid
+    X-Admin-Token, or when the switch is on and its path matches path_prefix
+    (sampled at sample_rate). One profile runs at a time; its id is returned in
+    the X-Profile-Id response header and the flame graph is fetched from
+    /api/admin/profiles/{id}.
+    """
+
+    def __init__(self, interval: float = None, keep: int = None):
+        self.interval = interval or float(os.getenv("PROFILER_INTERVAL_MS", 5)) / 1000
+        self.keep = keep or int(os.getenv("PROFILER_KEEP", 20))
+        self.enabled = False
+        self.path_prefix = "/api/"
+        self.sample_rate = 1.0
+        self._active = False
+        self._profiles = OrderedDict()
+
+    def configure(self, enabled: bool, path_prefix: str = None, sample_rate: float = None):
+        self.enabled = enabled
+        if path_prefix is not None:
+            self.path_prefix = path_prefix
+        if sample_rate is not None:
+            self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+
+    def wants(self, path: str, headers: dict) -> bool:
+        if self._active or not admin_token():
+            return False
+        if headers.get(PROFILE_HEADER) == "1":
+            return is_admin(headers.get(ADMIN_TOKEN_HEADER, ""))
+        return self.enabled and path.startswith(self.path_prefix) and random.random() < self.sample_rate
+
+    def start(self) -> SamplingProfiler:
+        self._active = True
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        profiler.start()
+        return profiler
+
+    def finish(self, profile_id: str, profiler: SamplingProfiler, method: str, path: str, started: float):
+        samples = profiler.stop()
+        self._active = False
+        self._profiles[profile_id] = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "created_at": time.time(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "samples": sum(samples.values()),
+            "interval_ms": self.interval * 1000,
+            "folded": folded(samples),
+        }
+        while len(self._profiles) > self.keep:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str):
+        return self._profiles.get(profile_id)
+
+    def list(self) -> list:
+        return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(self._profiles.values())]
+
+    def settings(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "path_prefix": self.path_prefix,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "active": self._active,
+        }
+
+request_profiler = RequestProfiler()
+
+class ProfilingMiddleware:
+    """Attaches a SamplingProfiler to the requests selected by request_profiler."""
+
+    def __init__(self, app, profiler: RequestProfiler = None):
+        self.app = app
+        self.profiler = profiler or request_profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]
+                   if k in (b"x-profile", b"x-admin-token")}
+        if not self.profiler.wants(scope["path"], headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        started = time.perf_counter()
+        sampler = self.profiler.start()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.finish(profile_id, sampler, scope["method"], scope["path"], started)
@@ -0,0 +1,96 @@
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+from app.core import metrics
+
+# Spans of the request being served; tasks spawned by the request share the same list
+_current = contextvars.ContextVar("request_trace", default=None)
+
+class Trace:
+    """Per-request phase timings, aggregated by name (three polls -> one "poll" entry)."""
+
+    __slots__ = ("started", "_spans", "_marks")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._spans = {}
+        self._marks = {}
+
+    def add(self, name: str, seconds: float):
+        total, count = self._spans.get(name, (0.0, 0))
+        self._spans[name] = (total + seconds, count + 1)
+
+    def mark(self, name: str, description: str):
+        self._marks[name] = description
+
+    def header(self) -> str:
+        """Server-Timing header value; durations in milliseconds."""
+        entries = []
+        for name, (total, count) in self._spans.items():
+            entry = f"{name};dur={total * 1000:.1f}"
+            if count > 1:
+                entry += f';desc="{count}x"'
+            entries.append(entry)
+        entries.extend(f'{name};desc="{description}"' for name, description in self._marks.items())
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+def current():
+    return _current.get()
+
+@contextmanager
+def span(name: str):
+    """Times a phase into the current request's Server-Timing and the phase histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.phase_duration.labels(name).observe(elapsed)
+        trace = _current.get()
+        if trace is not None:
+            trace.add(name, elapsed)
+
+def record(name: str, seconds: float):
+    """Adds an already measured duration to the current request (no histogram)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.add(name, seconds)
+
+def mark(name: str, description: str):
+    trace = _current.get()
+    if trace is not None:
+        trace.mark(name, description)
+
+class ServerTimingMiddleware:
+    """
+    Adds a Server-Timing header to every /api response (SERVER_TIMING_ENABLED=false
+    turns it off). The header is sent with the status line, so for streamed
+    responses it covers the work done before the first byte only.
+    """
+
+    def __init__(self, app, enabled: bool = None):
+        self.app = app
+        if enabled is None:
+            enabled = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+        trace = Trace()
+        token = _current.set(trace)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.header().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -1,13 +1,32 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.api.routes import router as api_router
 from app.api.routes_files import router as files_router
 from app.api.routes_explorer import router as explorer_router
 from app.api.routes_chat import router as chat_router
+from app.api.routes_dashboards import router as dashboards_router
+from app.api.routes_admin import router as admin_router
+from app.core import metrics, tracing
+from app.core.profiling import ProfilingMiddleware
+from app.services.databricks import databricks_service
+from app.services.http_pool import serving_pool, workspace_pool
+from app.services.metadata_cache import metadata_cache
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await metadata_cache.stop_refresher()
+    # Let result store writes still running finish before the process exits
+    await databricks_service.flush_writes()
+    # Close pooled keep-alive connections to the workspace on shutdown
+    await workspace_pool.reset()
+    await serving_pool.reset()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS configuration for development
 app.add_middleware(
@@ -16,12 +35,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Profile-Id", "X-Result-Fingerprint"],
 )
 
+# Per-request phase timings (Server-Timing header) and the admin request profiler
+app.add_middleware(tracing.ServerTimingMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+# Added last, so it is the outermost middleware: CORS preflights are timed too
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(api_router, prefix="/api")
 app.include_router(files_router, prefix="/api")
 app.include_router(explorer_router, prefix="/api")
 app.include_router(chat_router, prefix="/api")
+app.include_router(dashboards_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
+
+# Registered before the static mount at "/", which would otherwise shadow it
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus text exposition of request, Databricks call and processing metrics."""
+    # async on purpose: rendered on the event loop, which is the only writer
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 # Mount static files (frontend build)
 # Check if the static directory exists (it will in production/deployment)
@@ -0,0 +1,125 @@
+import re
+
+# Aggregations understood by the widgets (see AggregationType in frontend/types.ts)
+AGGREGATIONS = {
+    "sum": "SUM({})",
+    "avg": "AVG({})",
+    "min": "MIN({})",
+    "max": "MAX({})",
+    "count": "COUNT({})",
+    "count_distinct": "COUNT(DISTINCT {})",
+}
+
+# Widget filter operators (WidgetFilter / ValueCondition) -> SQL
+FILTER_OPERATORS = {
+    "===": "=",
+    "!==": "<>",
+    ">": ">",
+    "<": "<",
+    ">=": ">=",
+    "<=": "<=",
+    "contains": "ILIKE",
+    "not-contains": "NOT ILIKE",
+}
+
+MAX_LIMIT = 100000
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_ \-]*$")
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quotes a column name, rejecting anything that could escape the quoting."""
+    if not name or not _IDENTIFIER.match(name):
+        raise ValueError(f"Invalid column name: {name!r}")
+    return f"`{name}`"
+
+def quote_table(name: str) -> str:
+    parts = name.split(".")
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid table name: {name!r}")
+    return ".".join(quote_identifier(part) for part in parts)
+
+def _parameter(name: str, value) -> dict:
+    # Statement Execution API parameters carry their value as a string plus a SQL type
+    if isinstance(value, bool):
+        return {"name": name, "value": "true" if value else "false", "type": "BOOLEAN"}
+    if isinstance(value, int):
+        return {"name": name, "value": str(value), "type": "BIGINT"}
+    if isinstance(value, float):
+        return {"name": name, "value": repr(value), "type": "DOUBLE"}
+    return {"name": name, "value": str(value), "type": "STRING"}
+
+def measure_alias(measure: dict) -> str:
+    if measure.get("alias"):
+        return measure["alias"]
+    column = measure.get("column") or "*"
+    return f"{measure['aggregation']}_{'all' if column == '*' else column}"
+
+def compile_aggregate_query(table: str, dimensions: list = None, measures: list = None,
+                            filters: list = None, sort: list = None, limit: int = None):
+    """
+    Compiles a widget data spec into a parameterized GROUP BY statement.
+
+    Identifiers are validated and backtick-quoted; filter values are passed as
+    named parameters (:p0, :p1, ...) so they never get spliced into the SQL text.
+    Returns (sql, parameters).
+    """
+    dimensions = dimensions or []
+    measures = measures or []
+    filters = filters or []
+    sort = sort or []
+    if not dimensions and not measures:
+        raise ValueError("At least one dimension or measure is required")
+
+    select = [quote_identifier(dim) for dim in dimensions]
+    aliases = set(dimensions)
+    for measure in measures:
+        aggregation = measure.get("aggregation")
+        if aggregation not in AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation: {aggregation!r}")
+        column = measure.get("column") or "*"
+        if column == "*" and aggregation != "count":
+            raise ValueError(f"{aggregation} requires a column")
+        expression = AGGREGATIONS[aggregation].format("*" if column == "*" else quote_identifier(column))
+        alias = measure_alias(measure)
+        select.append(f"{expression} AS {quote_identifier(alias)}")
+        aliases.add(alias)
+
+    where = []
+    parameters = []
+    for f in filters:
+        operator = f.get("operator")
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {operator!r}")
+        column = quote_identifier(f.get("column"))
+        value = f.get("value")
+        if value is None:
+            if operator not in ("===", "!=="):
+                raise ValueError(f"Operator {operator!r} does not accept null")
+            where.append(f"{column} IS {'NOT ' if operator == '!==' else ''}NULL")
+            continue
+        name = f"p{len(parameters)}"
+        if operator in ("contains", "not-contains"):
+            where.append(f"CAST({column} AS STRING) {FILTER_OPERATORS[operator]} CONCAT('%', :{name}, '%')")
+            parameters.append(_parameter(name, str(value)))
+        else:
+            where.append(f"{column} {FILTER_OPERATORS[operator]} :{name}")
+            parameters.append(_parameter(name, value))
+
+    sql = f"SELECT {', '.join(select)} FROM {quote_table(table)}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if dimensions and measures:
+        sql += " GROUP BY " + ", ".join(quote_identifier(dim) for dim in dimensions)
+    elif dimensions:
+        sql = sql.replace("SELECT ", "SELECT DISTINCT ", 1)
+    if sort:
+        order = []
+        for s in sort:
+            if s.get("column") not in aliases:
+                raise ValueError(f"Sort column must be a dimension or measure: {s.get('column')!r}")
+            direction = "DESC" if s.get("direction") == "desc" else "ASC"
+            order.append(f"{quote_identifier(s['column'])} {direction}")
+        sql += " ORDER BY " + ", ".join(order)
+    limit = MAX_LIMIT if limit is None else max(1, min(int(limit), MAX_LIMIT))
+    sql += f" LIMIT {limit}"
+    return sql, parameters
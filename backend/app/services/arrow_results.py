@@ -0,0 +1,79 @@
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional at import time, required for the Arrow path
+    pa = None
+
+# Databricks SQL type_name -> Arrow type, used when a result has no batches to infer from
+_TYPE_MAP = {
+    "BOOLEAN": "bool_",
+    "BYTE": "int8",
+    "SHORT": "int16",
+    "INT": "int32",
+    "LONG": "int64",
+    "FLOAT": "float32",
+    "DOUBLE": "float64",
+    "DATE": "date32",
+    "BINARY": "binary",
+}
+
+def type_name(arrow_type) -> str:
+    """Arrow type -> Databricks SQL type_name (the reverse of _TYPE_MAP, STRING for the rest)."""
+    require_pyarrow()
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMP"
+    if pa.types.is_decimal(arrow_type):
+        return "DECIMAL"
+    for name, factory in _TYPE_MAP.items():
+        if arrow_type == getattr(pa, factory)():
+            return name
+    return "STRING"
+
+def require_pyarrow():
+    if pa is None:
+        raise RuntimeError("pyarrow is required for ARROW_STREAM results (pip install pyarrow)")
+
+def decode_arrow_stream(content: bytes):
+    """
+    Decodes one presigned ARROW_STREAM download (an Arrow IPC stream).
+    Returns (record_batches, row_count) without converting values to Python objects.
+    """
+    require_pyarrow()
+    reader = pa.ipc.open_stream(pa.py_buffer(content))
+    batches = list(reader)
+    return batches, sum(batch.num_rows for batch in batches)
+
+def schema_from_manifest(columns: list):
+    require_pyarrow()
+    fields = []
+    for col in columns:
+        type_factory = getattr(pa, _TYPE_MAP.get(col.get("type_name", "STRING"), "string"))
+        fields.append(pa.field(col["name"], type_factory()))
+    return pa.schema(fields)
+
+def batches_to_table(batches: list, columns: list):
+    """Concatenates record batches into a Table; falls back to the manifest schema when empty."""
+    require_pyarrow()
+    if not batches:
+        return schema_from_manifest(columns).empty_table()
+    return pa.Table.from_batches(batches)
+
+def rows_to_table(columns: list, data_array: list):
+    """
+    Builds a Table from JSON_ARRAY rows. JSON_ARRAY sends every value as a string,
+    so each column is cast to its manifest type when the values allow it.
+    """
+    require_pyarrow()
+    schema = schema_from_manifest(columns)
+    if not data_array:
+        return schema.empty_table()
+    arrays = []
+    for i, field in enumerate(schema):
+        array = pa.array([row[i] for row in data_array])
+        if array.type != field.type:
+            try:
+                array = array.cast(field.type)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                pass
+        arrays.append(array)
+    return pa.table(arrays, names=schema.names)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+
+# Sampling parameters that change the completion and therefore belong in the key
+_SAMPLING_PARAMS = ("temperature", "top_p", "top_k", "max_tokens", "stop", "seed")
+
+def normalize_messages(messages: list) -> list:
+    """Strips surrounding whitespace and unifies line endings so cosmetic differences share an entry."""
+    return [
+        {"role": m["role"].strip().lower(), "content": m["content"].replace("\r\n", "\n").strip()}
+        for m in messages
+    ]
+
+def is_deterministic(payload: dict) -> bool:
+    # Only greedy decoding gives the same answer twice; anything sampled is never cached
+    temperature = payload.get("temperature")
+    return temperature is not None and temperature <= 0 and payload.get("n", 1) == 1
+
+def split_events(body: bytes) -> list:
+    """Raw SSE bytes -> one b"data: ...\\n\\n" frame per event."""
+    return [event + b"\n\n" for event in body.replace(b"\r\n", b"\n").split(b"\n\n") if event.strip()]
+
+class _Entry:
+    __slots__ = ("events", "size", "expires_at")
+
+    def __init__(self, events: list, size: int, expires_at: float):
+        self.events = events
+        self.size = size
+        self.expires_at = expires_at
+
+class CompletionCache:
+    """
+    Opt-in cache of chat completion streams (COMPLETION_CACHE_ENABLED=true).
+
+    Only deterministic requests (temperature 0) are cached, keyed by endpoint,
+    normalized messages and sampling parameters. The upstream SSE events are
+    stored as received and replayed as the same SSE stream, so a hit is
+    indistinguishable from a live answer on the frontend. TTL per entry and LRU
+    eviction once max_bytes or max_entries is exceeded.
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_bytes: int = None, max_entries: int = None,
+                 enabled: bool = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", 3600))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("COMPLETION_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", 500))
+        if enabled is None:
+            enabled = os.getenv("COMPLETION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "oversized": 0,
+        }
+
+    def make_key(self, endpoint: str, payload: dict):
+        """None when the request must not be cached (cache disabled or sampled decoding)."""
+        if not self.enabled:
+            return None
+        if not is_deterministic(payload):
+            self._counters["bypassed"] += 1
+            return None
+        material = {
+            "endpoint": endpoint,
+            "messages": normalize_messages(payload["messages"]),
+            **{name: payload.get(name) for name in _SAMPLING_PARAMS},
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Cached SSE events for key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._counters["expirations"] += 1
+            entry = None
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return entry.events
+
+    def put(self, key, chunks: list):
+        """Stores a completed stream; the caller only passes streams that had no error event."""
+        body = b"".join(chunks)
+        if len(body) > self.max_bytes:
+            self._counters["oversized"] += 1
+            return
+        self._remove(key)
+        self._entries[key] = _Entry(split_events(body), len(body), time.monotonic() + self.ttl_seconds)
+        self._bytes += len(body)
+        self._counters["stores"] += 1
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    async def replay(self, events: list):
+        for event in events:
+            yield event
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "enabled": self.enabled,
+        }
+
+completion_cache = CompletionCache()
@@ -1,24 +1,76 @@
-import requests
+import asyncio
 import base64
+import contextvars
 import re
+import json
+import logging
 import time
+import httpx
+from app.core import metrics, tracing
 from app.core.config import get_databricks_config
+from app.services import arrow_results
 from app.services.databricks_mock import databricks_mock_service
+from app.services.http_pool import WorkspaceClientPool, workspace_pool
+from app.services.query_cache import QueryResultCache, is_cacheable, query_cache
+from app.services.result_store import ResultStore, fingerprint, result_store, strings_table, table_to_data_array
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELED", "CLOSED")
+
+class UnsupportedStatement(Exception):
+    """Raised in mock mode for a statement the local engine cannot emulate (writes, most SHOW forms)."""
+
+# Result store fingerprint of the last cacheable statement run in the current request
+_result_fingerprint = contextvars.ContextVar("result_fingerprint", default=None)
+
+def result_fingerprint():
+    """Fingerprint (see result_store.fingerprint) of the cached result the current request used, if any."""
+    return _result_fingerprint.get()
+
+def _parameters_key(parameters: list):
+    # Hashable form of statement parameters for the result cache key
+    if not parameters:
+        return None
+    return tuple((p["name"], p.get("value"), p.get("type")) for p in parameters)
+
+def _decode_json_rows(content: bytes):
+    rows = json.loads(content)
+    return rows, len(rows)
 
 class DatabricksService:
-    
+    # Upper bound on concurrent chunk / external link downloads per statement
+    max_chunk_workers = 8
+    # Adaptive polling: start fast for short queries, back off for long ones
+    poll_initial_delay = 0.1
+    poll_backoff = 1.5
+    poll_max_delay = 2.0
+    # Give up (and cancel the statement) after this many seconds
+    statement_timeout = 60.0
+    # DBFS read/add-block/put move at most 1 MB per call
+    dbfs_block_size = 1024 * 1024
+    # Unity Catalog throttling (429/503): retries and fallback delay when Retry-After is missing
+    rate_limit_retries = 5
+    rate_limit_delay = 1.0
+    rate_limit_max_delay = 30.0
+
+    def __init__(self, pool: WorkspaceClientPool = None, cache: QueryResultCache = None,
+                 store: ResultStore = None):
+        self.pool = pool or workspace_pool
+        self.cache = cache or query_cache
+        self.store = store or result_store
+        self.throttled_requests = 0
+        self._writes = set()  # result store writes still running, referenced until done
+
+    def _client(self, config) -> httpx.AsyncClient:
+        # Shared keep-alive client for the configured workspace; never closed per call
+        return self.pool.get_client(config.base_url)
+
     def _get_headers(self, config):
-        return {
-            "Authorization": f"Bearer {config.token}",
-            "Content-Type": "application/json"
-        }
+        # Built once per config reload (see DatabricksConfig.auth_headers)
+        return config.auth_headers
 
-    def execute_sql(self, query: str, catalog: str = None, schema: str = None,
-                    format: str = "JSON_ARRAY", disposition: str = "INLINE", wait_timeout: str = "30s"):
-        """
-        Execute SQL query via Databricks SQL Statement Execution API.
-        Handles polling for long-running queries and result chunk retrieval.
-        """
+    def _apply_default_limit(self, query: str) -> str:
         # Enforce LIMIT 100 for SELECT queries if not present to avoid large payloads
         stripped = query.strip()
         if stripped.upper().startswith("SELECT"):
@@ -28,14 +80,18 @@ class DatabricksService:
                     query = stripped[:-1] + " LIMIT 100;"
                 else:
                     query = stripped + " LIMIT 100"
+        return query
 
-        config = get_databricks_config()
-        if not config:
-            return databricks_mock_service.execute_sql(query)
-
-        url = f"{config.host.rstrip('/')}/api/2.0/sql/statements"
+    async def _run_statement(self, client: httpx.AsyncClient, config, query: str, catalog: str,
+                             schema: str, format: str, disposition: str, wait_timeout: str,
+                             parameters: list = None):
+        """
+        Submits a statement and polls until it reaches a terminal state.
+        Returns (statement_url, headers, meta) for a SUCCEEDED statement.
+        """
+        url = f"{config.base_url}/api/2.0/sql/statements"
         headers = self._get_headers(config)
-        
+
         payload = {
             "statement": query,
             "warehouse_id": config.warehouse_id,
@@ -47,114 +103,652 @@ class DatabricksService:
             payload["catalog"] = catalog
         if schema:
             payload["schema"] = schema
+        if parameters:
+            # Named parameter markers (:name) bound server-side
+            payload["parameters"] = parameters
 
         # Submit the query
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        meta = response.json()
+        submitted = time.perf_counter()
+        with tracing.span("submit"):
+            response = await client.post(url, json=payload, headers=headers)
+            response.raise_for_status()
+            meta = response.json()
 
         statement_id = meta.get("statement_id")
+
+        # Poll until the statement completes (skipped if it finished within wait_timeout)
+        poll_url = f"{url}/{statement_id}"
+        try:
+            with tracing.span("poll"):
+                meta = await self._wait_for_statement(client, poll_url, headers, meta)
+        finally:
+            metrics.statement_wait.observe(time.perf_counter() - submitted)
+        return poll_url, headers, meta
+
+    async def _wait_for_statement(self, client: httpx.AsyncClient, statement_url: str, headers: dict, meta: dict):
+        """
+        Polls a statement with exponential backoff until it reaches a terminal state.
+        If the caller is cancelled (client disconnect, job cancellation) or the statement
+        times out, the statement is cancelled on the warehouse as well.
+        """
+        statement_id = meta.get("statement_id")
         status = meta.get("status", {})
         state = status.get("state")
+        delay = self.poll_initial_delay
+        deadline = time.monotonic() + self.statement_timeout
+        polls = 0
 
-        # If result is already present (small/fast query with INLINE disposition), return it
-        if meta.get("result") is not None and meta.get("manifest") is not None:
-            return meta
-
-        # Otherwise, poll until the statement completes
-        poll_url = f"{url}/{statement_id}"
-        max_poll_attempts = 60  # Max ~60 seconds of polling
-        poll_count = 0
-        
-        while state not in ("SUCCEEDED", "FAILED", "CANCELED", "CLOSED"):
-            if poll_count >= max_poll_attempts:
-                raise RuntimeError(f"Query timeout: statement {statement_id} did not complete in time")
-            
-            time.sleep(1)
-            poll_count += 1
-            
-            resp = requests.get(poll_url, headers=headers)
-            resp.raise_for_status()
-            meta = resp.json()
-            status = meta.get("status", {})
-            state = status.get("state")
+        try:
+            while state not in TERMINAL_STATES:
+                if time.monotonic() >= deadline:
+                    await self._cancel_remote(client, statement_url, headers)
+                    state = "TIMEOUT"
+                    raise RuntimeError(f"Query timeout: statement {statement_id} did not complete in time")
+
+                await asyncio.sleep(delay)
+                delay = min(delay * self.poll_backoff, self.poll_max_delay)
+
+                polls += 1
+                resp = await client.get(statement_url, headers=headers)
+                resp.raise_for_status()
+                meta = resp.json()
+                status = meta.get("status", {})
+                state = status.get("state")
+        except asyncio.CancelledError:
+            # Nobody is waiting for this result anymore: stop burning warehouse time
+            state = "ABANDONED"
+            await asyncio.shield(self._cancel_remote(client, statement_url, headers))
+            raise
+        finally:
+            metrics.statement_polls.observe(polls)
+            # A poll that failed midway leaves a non-terminal state: count it as an error
+            metrics.statements.labels(state if state in TERMINAL_STATES + ("TIMEOUT", "ABANDONED") else "ERROR").inc()
 
         if state != "SUCCEEDED":
             error_msg = status.get("error", {}).get("message", "Unknown error")
             raise RuntimeError(f"Statement {statement_id} finished with state {state}: {error_msg}")
 
-        # If we have inline results, return them
-        if meta.get("result") is not None:
+        return meta
+
+    async def _cancel_remote(self, client: httpx.AsyncClient, statement_url: str, headers: dict):
+        try:
+            resp = await client.post(f"{statement_url}/cancel", headers=headers)
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning("Failed to cancel statement %s: %s", statement_url.rsplit("/", 1)[-1], e)
+
+    async def _get_with_retry(self, client: httpx.AsyncClient, url: str, headers: dict, params: dict = None):
+        """
+        GET that backs off on 429/503, honouring Retry-After when the workspace sends it.
+        Other statuses are returned as-is for the caller to raise.
+        """
+        delay = self.rate_limit_delay
+        for attempt in range(self.rate_limit_retries + 1):
+            response = await client.get(url, headers=headers, params=params)
+            if response.status_code not in (429, 503) or attempt == self.rate_limit_retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            try:
+                wait = float(retry_after) if retry_after is not None else delay
+            except ValueError:
+                wait = delay
+            wait = min(wait, self.rate_limit_max_delay)
+            self.throttled_requests += 1
+            logger.info("Throttled by %s (HTTP %s), retrying in %.1fs", url, response.status_code, wait)
+            await asyncio.sleep(wait)
+            delay = min(delay * 2, self.rate_limit_max_delay)
+        return response
+
+    async def execute_sql(self, query: str, catalog: str = None, schema: str = None,
+                          format: str = "JSON_ARRAY", disposition: str = "INLINE", wait_timeout: str = "10s",
+                          max_rows: int = None, max_bytes: int = None, use_cache: bool = True,
+                          parameters: list = None):
+        """
+        Execute SQL query via Databricks SQL Statement Execution API.
+        Handles polling for long-running queries and result chunk retrieval.
+        Polling uses asyncio.sleep so a slow statement never blocks the event loop.
+        All result chunks are fetched; max_rows/max_bytes optionally cap the download.
+        parameters are Statement Execution named parameters ({name, value, type}).
+        Read-only statements go through the result cache (memory, then the on-disk
+        result store) unless use_cache is False.
+        """
+        query = self._apply_default_limit(query)
+
+        config = get_databricks_config()
+        if not config:
+            return await self._execute_mock(query, max_rows, parameters)
+
+        if not (use_cache and is_cacheable(query)):
+            return await self._execute_json(config, query, catalog, schema, format, disposition,
+                                            wait_timeout, max_rows, max_bytes, parameters)
+
+        key = self.cache.make_key(query, config.warehouse_id, catalog, schema, host=config.host,
+                                  credential=config.credential_hash,
+                                  format=format, disposition=disposition,
+                                  max_rows=max_rows, max_bytes=max_bytes,
+                                  parameters=_parameters_key(parameters))
+        _result_fingerprint.set(fingerprint(key))
+
+        async def load():
+            stored = await asyncio.to_thread(self.store.get, key)
+            if stored is not None:
+                meta, table = stored
+                meta["result"] = {"chunk_index": 0, "row_offset": 0, "row_count": table.num_rows,
+                                  "data_array": table_to_data_array(table)}
+                return meta
+            meta = await self._execute_json(config, query, catalog, schema, format, disposition,
+                                            wait_timeout, max_rows, max_bytes, parameters)
+            if meta.get("manifest") is not None and meta.get("result") is not None:
+                stored_meta = {k: v for k, v in meta.items() if k != "result"}
+                table = strings_table(meta["manifest"]["schema"]["columns"], meta["result"]["data_array"])
+                self._persist(key, stored_meta, table, query)
             return meta
 
-        # For EXTERNAL_LINKS disposition or when we need to fetch chunks
-        result_url = f"{poll_url}/result/chunks/0"
-        resp = requests.get(result_url, headers=headers)
-        resp.raise_for_status()
-        chunk = resp.json()
+        return await self.cache.get_or_execute(key, load)
 
-        # Handle external links if present
-        if chunk.get("external_links"):
-            link = chunk["external_links"][0]["external_link"]
-            ext_resp = requests.get(link)
-            ext_resp.raise_for_status()
-            # Merge the external data back into the response structure
-            meta["result"] = {"data_array": ext_resp.json()}
+    def _persist(self, key, meta: dict, table, query: str):
+        """Writes a result to the on-disk store in the background, off the response path."""
+        task = asyncio.ensure_future(self._write_result(key, meta, table, query))
+        self._writes.add(task)
+        task.add_done_callback(self._writes.discard)
+
+    async def _write_result(self, key, meta: dict, table, query: str):
+        try:
+            await asyncio.to_thread(self.store.put, key, meta, table, query)
+        except OSError as e:
+            # A full or read-only disk must not fail the query itself
+            logger.warning("Could not persist query result: %s", e)
+        except Exception:
+            logger.exception("Could not persist query result")
+
+    async def flush_writes(self):
+        """Waits for the result store writes still running (shutdown, tests)."""
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    async def _run_mock_statement(self, query: str, parameters: list = None) -> dict:
+        """
+        Offline counterpart of _run_statement: runs the query on the mock SQL engine,
+        off the event loop, and fails the same way a FAILED statement does.
+        """
+        meta = await asyncio.to_thread(databricks_mock_service.execute_sql, query, parameters)
+        status = meta.get("status", {})
+        metrics.statements.labels(status.get("state")).inc()
+        if status.get("state") != "SUCCEEDED":
+            error_msg = status.get("error", {}).get("message", "Unknown error")
+            if error_msg.startswith("[NOT_SUPPORTED]"):
+                raise UnsupportedStatement(error_msg)
+            raise RuntimeError(f"Statement {meta.get('statement_id')} finished with state {status.get('state')}: {error_msg}")
+        return meta
+
+    async def _iter_mock_chunks(self, meta: dict, max_rows: int = None):
+        """Rows of each result chunk of a mock statement, following next_chunk_index like the real API."""
+        chunk = meta.get("result") or {}
+        fetched = 0
+        while True:
+            rows = chunk.get("data_array") or []
+            fetched += len(rows)
+            yield rows
+            next_index = chunk.get("next_chunk_index")
+            if next_index is None or (max_rows is not None and fetched >= max_rows):
+                return
+            chunk = await asyncio.to_thread(databricks_mock_service.get_statement_chunk,
+                                            meta["statement_id"], next_index)
+
+    async def _execute_mock(self, query: str, max_rows: int = None, parameters: list = None) -> dict:
+        meta = await self._run_mock_statement(query, parameters)
+        if meta.get("manifest") is None:
             return meta
+        rows = []
+        async for chunk_rows in self._iter_mock_chunks(meta, max_rows):
+            rows.extend(chunk_rows)
+        if max_rows is not None and len(rows) > max_rows:
+            rows = rows[:max_rows]
+            meta["manifest"]["truncated"] = True
+        meta["result"] = {"chunk_index": 0, "row_offset": 0, "row_count": len(rows), "data_array": rows}
+        return meta
+
+    async def _execute_json(self, config, query: str, catalog: str, schema: str, format: str,
+                            disposition: str, wait_timeout: str, max_rows: int, max_bytes: int,
+                            parameters: list = None):
+        client = self._client(config)
+        statement_url, headers, meta = await self._run_statement(
+            client, config, query, catalog, schema, format, disposition, wait_timeout, parameters
+        )
 
-        # Merge chunk data into meta
-        meta["result"] = chunk
+        # Statements without a result set (DDL, DML) have nothing to fetch
+        if meta.get("manifest") is None:
+            return meta
+
+        rows, truncated = await self._fetch_result_chunks(
+            client, meta, statement_url, headers, _decode_json_rows, max_rows=max_rows, max_bytes=max_bytes
+        )
+        if max_rows is not None and len(rows) > max_rows:
+            rows = rows[:max_rows]
+            truncated = True
+        meta["result"] = {
+            "chunk_index": 0,
+            "row_offset": 0,
+            "row_count": len(rows),
+            "data_array": rows
+        }
+        if truncated:
+            meta["manifest"]["truncated"] = True
         return meta
 
-    def list_directory(self, path: str):
+    async def execute_sql_arrow(self, query: str, catalog: str = None, schema: str = None,
+                                wait_timeout: str = "10s", max_rows: int = None, max_bytes: int = None,
+                                use_cache: bool = True):
+        """
+        High-volume variant of execute_sql using ARROW_STREAM + EXTERNAL_LINKS.
+        Presigned links are downloaded in parallel and decoded as Arrow IPC batches,
+        so values never pass through Python lists of strings.
+        No default LIMIT is applied; use max_rows/max_bytes to cap the download.
+        Returns (manifest, pyarrow.Table); read-only statements are cached like execute_sql.
+        """
+        arrow_results.require_pyarrow()
+
+        config = get_databricks_config()
+        if not config:
+            meta = await self._execute_mock(query, max_rows)
+            manifest = meta.get("manifest") or {"schema": {"columns": []}}
+            rows = meta.get("result", {}).get("data_array", [])
+            return manifest, arrow_results.rows_to_table(manifest["schema"]["columns"], rows)
+
+        if not (use_cache and is_cacheable(query)):
+            return await self._execute_arrow(config, query, catalog, schema, wait_timeout, max_rows, max_bytes)
+
+        key = self.cache.make_key(query, config.warehouse_id, catalog, schema, host=config.host,
+                                  credential=config.credential_hash,
+                                  format="ARROW_STREAM", max_rows=max_rows, max_bytes=max_bytes)
+        _result_fingerprint.set(fingerprint(key))
+
+        async def load():
+            stored = await asyncio.to_thread(self.store.get, key)
+            if stored is not None:
+                # The table stays backed by the memory-mapped file
+                meta, table = stored
+                return meta["manifest"], table
+            manifest, table = await self._execute_arrow(config, query, catalog, schema, wait_timeout,
+                                                        max_rows, max_bytes)
+            self._persist(key, {"manifest": manifest}, table, query)
+            return manifest, table
+
+        return await self.cache.get_or_execute(key, load)
+
+    async def _execute_arrow(self, config, query: str, catalog: str, schema: str, wait_timeout: str,
+                             max_rows: int, max_bytes: int):
+        client = self._client(config)
+        statement_url, headers, meta = await self._run_statement(
+            client, config, query, catalog, schema, "ARROW_STREAM", "EXTERNAL_LINKS", wait_timeout
+        )
+        manifest = meta.get("manifest") or {"schema": {"columns": []}}
+        batches, truncated = await self._fetch_result_chunks(
+            client, meta, statement_url, headers, arrow_results.decode_arrow_stream,
+            max_rows=max_rows, max_bytes=max_bytes
+        )
+        with tracing.span("decode"):
+            table = arrow_results.batches_to_table(batches, manifest.get("schema", {}).get("columns", []))
+        if max_rows is not None and table.num_rows > max_rows:
+            table = table.slice(0, max_rows)
+            truncated = True
+        if truncated:
+            manifest["truncated"] = True
+        return manifest, table
+
+    async def stream_sql(self, query: str, catalog: str = None, schema: str = None,
+                         wait_timeout: str = "10s", max_rows: int = None, max_bytes: int = None,
+                         outcome: dict = None):
+        """
+        Streaming variant of execute_sql (JSON_ARRAY).
+        Yields the manifest first, then the rows of each result chunk as soon as it arrives,
+        so callers can forward data without materializing the whole result.
+        outcome["truncated"] is set once the stream is exhausted.
+        """
+        outcome = outcome if outcome is not None else {}
+        query = self._apply_default_limit(query)
+
+        config = get_databricks_config()
+        if not config:
+            meta = await self._run_mock_statement(query)
+            outcome["truncated"] = (meta.get("manifest") or {}).get("truncated", False)
+            chunks = self._iter_mock_chunks(meta, max_rows)
+        else:
+            client = self._client(config)
+            statement_url, headers, meta = await self._run_statement(
+                client, config, query, catalog, schema, "JSON_ARRAY", "INLINE", wait_timeout
+            )
+            chunks = self._iter_result_chunks(client, meta, statement_url, headers, _decode_json_rows,
+                                              max_rows=max_rows, max_bytes=max_bytes, outcome=outcome)
+        yield meta.get("manifest") or {"schema": {"columns": []}}
+        if meta.get("manifest") is None:
+            return
+
+        sent = 0
+        async for rows in chunks:
+            if max_rows is not None and sent + len(rows) > max_rows:
+                yield rows[:max_rows - sent]
+                outcome["truncated"] = True
+                return
+            sent += len(rows)
+            yield rows
+
+    async def submit_statement(self, query: str, catalog: str = None, schema: str = None):
+        """
+        Submits a statement without waiting for it (wait_timeout=0s) and returns its
+        initial metadata. The statement_id is the handle for the job endpoints.
+        """
+        config = get_databricks_config()
+        if not config:
+            return await asyncio.to_thread(databricks_mock_service.submit_statement, self._apply_default_limit(query))
+
+        url = f"{config.base_url}/api/2.0/sql/statements"
+        payload = {
+            "statement": self._apply_default_limit(query),
+            "warehouse_id": config.warehouse_id,
+            "format": "JSON_ARRAY",
+            "disposition": "INLINE",
+            "wait_timeout": "0s"
+        }
+        if catalog:
+            payload["catalog"] = catalog
+        if schema:
+            payload["schema"] = schema
+
+        response = await self._client(config).post(url, json=payload, headers=self._get_headers(config))
+        response.raise_for_status()
+        return response.json()
+
+    async def get_statement(self, statement_id: str):
+        """Current status (and manifest, once available) of a statement."""
+        config = get_databricks_config()
+        if not config:
+            return await asyncio.to_thread(databricks_mock_service.get_statement, statement_id)
+
+        url = f"{config.base_url}/api/2.0/sql/statements/{statement_id}"
+        response = await self._client(config).get(url, headers=self._get_headers(config))
+        if response.status_code == 404:
+            raise ValueError(f"Statement not found: {statement_id}")
+        response.raise_for_status()
+        return response.json()
+
+    async def get_statement_chunk(self, statement_id: str, chunk_index: int = 0):
+        """
+        One page of results of a finished statement.
+        Returns {"chunk_index", "row_offset", "data_array", "next_chunk_index"}.
+        """
+        config = get_databricks_config()
+        if not config:
+            return await asyncio.to_thread(databricks_mock_service.get_statement_chunk, statement_id, chunk_index)
+
+        url = f"{config.base_url}/api/2.0/sql/statements/{statement_id}/result/chunks/{chunk_index}"
+        client = self._client(config)
+        response = await client.get(url, headers=self._get_headers(config))
+        if response.status_code == 404:
+            raise ValueError(f"Result chunk {chunk_index} not found for statement {statement_id}")
+        response.raise_for_status()
+        chunk = response.json()
+        rows, _, _ = await self._chunk_items(client, chunk, _decode_json_rows)
+        next_index = chunk.get("next_chunk_index")
+        if chunk.get("external_links"):
+            next_index = chunk["external_links"][-1].get("next_chunk_index", next_index)
+        return {
+            "chunk_index": chunk.get("chunk_index", chunk_index),
+            "row_offset": chunk.get("row_offset", 0),
+            "data_array": rows,
+            "next_chunk_index": next_index
+        }
+
+    async def cancel_statement(self, statement_id: str):
+        """Cancels a running statement via POST /api/2.0/sql/statements/{id}/cancel."""
+        config = get_databricks_config()
+        if not config:
+            return await asyncio.to_thread(databricks_mock_service.cancel_statement, statement_id)
+
+        url = f"{config.base_url}/api/2.0/sql/statements/{statement_id}/cancel"
+        response = await self._client(config).post(url, headers=self._get_headers(config))
+        response.raise_for_status()
+        return {"statement_id": statement_id, "status": {"state": "CANCELED"}}
+
+    async def _chunk_items(self, client: httpx.AsyncClient, chunk: dict, decode_link):
+        """
+        Returns (items, row_count, downloaded_bytes) for a result chunk.
+        Inline chunks yield their data_array; external links are downloaded and decoded
+        with decode_link (JSON rows or Arrow record batches).
+        """
+        if chunk.get("data_array") is not None:
+            rows = chunk["data_array"]
+            metrics.result_rows.inc(len(rows))
+            return rows, len(rows), 0
+        items = []
+        row_count = 0
+        byte_count = 0
+        for link in chunk.get("external_links", []):
+            # Presigned URLs must not receive the workspace token
+            ext_resp = await client.get(link["external_link"])
+            ext_resp.raise_for_status()
+            byte_count += len(ext_resp.content)
+            decoded, decoded_rows = decode_link(ext_resp.content)
+            items.extend(decoded)
+            row_count += decoded_rows
+        metrics.result_rows.inc(row_count)
+        return items, row_count, byte_count
+
+    async def _fetch_result_chunks(self, client: httpx.AsyncClient, meta: dict, statement_url: str,
+                                   headers: dict, decode_link, max_rows: int = None, max_bytes: int = None):
+        """
+        Retrieves every result chunk of a finished statement and reassembles them in order.
+        Returns (items, truncated); items may exceed max_rows by up to one chunk.
+        """
+        outcome = {}
+        items = []
+        with tracing.span("chunks"):
+            async for chunk_items in self._iter_result_chunks(client, meta, statement_url, headers, decode_link,
+                                                              max_rows=max_rows, max_bytes=max_bytes, outcome=outcome):
+                items.extend(chunk_items)
+        return items, outcome.get("truncated", False)
+
+    async def _iter_result_chunks(self, client: httpx.AsyncClient, meta: dict, statement_url: str,
+                                  headers: dict, decode_link, max_rows: int = None, max_bytes: int = None,
+                                  outcome: dict = None):
+        """
+        Yields the items of each result chunk in order, as soon as that chunk is available.
+
+        When the manifest lists the chunks up front they are downloaded concurrently,
+        bounded by max_chunk_workers. Otherwise next_chunk_index/next_chunk_internal_link
+        are followed one by one. max_rows/max_bytes stop fetching early; whether that
+        happened is reported in outcome["truncated"].
+        """
+        outcome = outcome if outcome is not None else {}
+        outcome["truncated"] = False
+        manifest = meta.get("manifest", {})
+        first = meta.get("result") or {}
+        first_index = first.get("chunk_index", 0)
+        has_first = first.get("data_array") is not None
+        # EXTERNAL_LINKS responses may already carry the links of several chunks
+        known_links = {link.get("chunk_index", 0): link for link in first.get("external_links", [])}
+
+        def cap_reached(row_count, byte_count):
+            return ((max_rows is not None and row_count >= max_rows) or
+                    (max_bytes is not None and byte_count >= max_bytes))
+
+        planned = sorted(manifest.get("chunks") or [], key=lambda c: c.get("chunk_index", 0))
+        if planned:
+            # The manifest tells us every chunk: pick the prefix needed and fetch it in parallel
+            indexes = []
+            row_count = 0
+            byte_count = 0
+            for chunk_info in planned:
+                if cap_reached(row_count, byte_count):
+                    break
+                indexes.append(chunk_info.get("chunk_index", 0))
+                row_count += chunk_info.get("row_count", 0)
+                byte_count += chunk_info.get("byte_count", 0)
+            outcome["truncated"] = len(indexes) < len(planned)
+
+            semaphore = asyncio.Semaphore(self.max_chunk_workers)
+
+            async def load(index):
+                async with semaphore:
+                    if index in known_links:
+                        chunk = {"external_links": [known_links[index]]}
+                    elif has_first and index == first_index:
+                        chunk = first
+                    else:
+                        resp = await client.get(f"{statement_url}/result/chunks/{index}", headers=headers)
+                        resp.raise_for_status()
+                        chunk = resp.json()
+                    items, _, _ = await self._chunk_items(client, chunk, decode_link)
+                    return items
+
+            tasks = [asyncio.ensure_future(load(index)) for index in indexes]
+            try:
+                # Downloads run concurrently; results are released strictly in chunk order
+                for task in tasks:
+                    yield await task
+            finally:
+                # Consumer went away (e.g. client disconnected): stop pending downloads
+                for task in tasks:
+                    task.cancel()
+        else:
+            # No chunk plan: follow the next_chunk links sequentially
+            if has_first or known_links:
+                chunk = first
+            else:
+                resp = await client.get(f"{statement_url}/result/chunks/0", headers=headers)
+                resp.raise_for_status()
+                chunk = resp.json()
+            host = statement_url.split("/api/")[0]
+            row_count = 0
+            byte_count = 0
+            while True:
+                chunk_items, chunk_rows, chunk_bytes = await self._chunk_items(client, chunk, decode_link)
+                yield chunk_items
+                row_count += chunk_rows
+                byte_count += chunk_bytes
+                next_link = chunk.get("next_chunk_internal_link")
+                next_index = chunk.get("next_chunk_index")
+                if chunk.get("external_links"):
+                    last_link = chunk["external_links"][-1]
+                    next_link = last_link.get("next_chunk_internal_link", next_link)
+                    next_index = last_link.get("next_chunk_index", next_index)
+                if next_link is None and next_index is None:
+                    break
+                if cap_reached(row_count, byte_count):
+                    outcome["truncated"] = True
+                    break
+                next_url = f"{host}{next_link}" if next_link else f"{statement_url}/result/chunks/{next_index}"
+                resp = await client.get(next_url, headers=headers)
+                resp.raise_for_status()
+                chunk = resp.json()
+
+    async def list_directory(self, path: str):
         config = get_databricks_config()
         if not config:
             return databricks_mock_service.list_directory(path)
 
-        url = f"{config.host.rstrip('/')}/api/2.0/dbfs/list"
+        url = f"{config.base_url}/api/2.0/dbfs/list"
         headers = self._get_headers(config)
         params = {"path": path}
 
-        response = requests.get(url, headers=headers, params=params)
+        client = self._client(config)
+        response = await client.get(url, headers=headers, params=params)
         if response.status_code == 404:
              # Handle case where directory might not exist or is empty in a way that raises error
              raise ValueError(f"Directory not found: {path}")
         response.raise_for_status()
         return response.json()
 
-    def read_file(self, path: str):
+    async def get_file_status(self, path: str):
+        """DBFS status of a path: {path, is_dir, file_size, modification_time}."""
         config = get_databricks_config()
         if not config:
-            return databricks_mock_service.read_file(path)
+            return databricks_mock_service.get_file_status(path)
 
-        url = f"{config.host.rstrip('/')}/api/2.0/dbfs/read"
+        url = f"{config.base_url}/api/2.0/dbfs/get-status"
+        response = await self._client(config).get(url, headers=self._get_headers(config), params={"path": path})
+        if response.status_code == 404:
+            raise ValueError(f"File not found: {path}")
+        response.raise_for_status()
+        return response.json()
+
+    async def iter_file(self, path: str, offset: int = 0, length: int = None):
+        """
+        Streams a DBFS file as raw byte blocks using /dbfs/read offset/length paging.
+        The next block is requested while the current one is being consumed, so at
+        most two blocks are held in memory regardless of the file size.
+        """
+        config = get_databricks_config()
+        if not config:
+            for block in databricks_mock_service.iter_file(path, offset, length, self.dbfs_block_size):
+                yield block
+            return
+
+        url = f"{config.base_url}/api/2.0/dbfs/read"
         headers = self._get_headers(config)
-        params = {"path": path}
+        client = self._client(config)
+        end = None if length is None else offset + length
+
+        async def read_block(position: int):
+            size = self.dbfs_block_size if end is None else min(self.dbfs_block_size, end - position)
+            response = await client.get(url, headers=headers, params={"path": path, "offset": position, "length": size})
+            if response.status_code == 404:
+                raise ValueError(f"File not found: {path}")
+            response.raise_for_status()
+            data = response.json()
+            return base64.b64decode(data.get("data", "")), size
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        
-        data = response.json()
-        content_base64 = data.get("data", "")
-        # Decode base64 content
+        position = offset
+        pending = asyncio.ensure_future(read_block(position))
         try:
-            content_bytes = base64.b64decode(content_base64)
-            content = content_bytes.decode('utf-8')
-        except Exception as e:
+            while pending is not None:
+                block, requested = await pending
+                position += len(block)
+                done = len(block) < requested or (end is not None and position >= end)
+                pending = None if done else asyncio.ensure_future(read_block(position))
+                if block:
+                    yield block
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def read_file(self, path: str, offset: int = 0, length: int = None):
+        config = get_databricks_config()
+        if not config and offset == 0 and length is None:
+            return databricks_mock_service.read_file(path)
+
+        content_bytes = bytearray()
+        async for block in self.iter_file(path, offset, length):
+            content_bytes += block
+        try:
+            # A byte range can split a multi-byte character at either end
+            content = content_bytes.decode('utf-8', errors='strict' if length is None and offset == 0 else 'replace')
+        except UnicodeDecodeError as e:
             raise ValueError(f"Failed to decode file content: {e}")
-            
-        return {"path": path, "content": content}
 
-    def write_file(self, path: str, content: str, overwrite: bool = True):
+        result = {"path": path, "content": content}
+        if offset or length is not None:
+            result.update({"offset": offset, "length": len(content_bytes)})
+        return result
+
+    async def write_file(self, path: str, content: str, overwrite: bool = True):
         config = get_databricks_config()
         if not config:
             return databricks_mock_service.write_file(path, content, overwrite)
 
-        url = f"{config.host.rstrip('/')}/api/2.0/dbfs/put"
+        content_bytes = content.encode('utf-8')
+        if len(content_bytes) > self.dbfs_block_size:
+            # /dbfs/put only accepts up to 1 MB inline; larger files go through blocks
+            async def blocks():
+                for start in range(0, len(content_bytes), self.dbfs_block_size):
+                    yield content_bytes[start:start + self.dbfs_block_size]
+            await self.write_file_stream(path, blocks(), overwrite)
+            return {"message": "File saved successfully", "path": path}
+
+        url = f"{config.base_url}/api/2.0/dbfs/put"
         headers = self._get_headers(config)
-        
+
         # Encode content to base64
-        content_bytes = content.encode('utf-8')
         content_base64 = base64.b64encode(content_bytes).decode('utf-8')
 
         payload = {
@@ -163,11 +757,67 @@ class DatabricksService:
             "overwrite": overwrite
         }
 
-        response = requests.post(url, json=payload, headers=headers)
+        client = self._client(config)
+        response = await client.post(url, json=payload, headers=headers)
         response.raise_for_status()
         return {"message": "File saved successfully", "path": path}
 
-    def list_catalogs(self):
+    async def write_file_stream(self, path: str, chunks, overwrite: bool = True):
+        """
+        Uploads an async iterable of byte chunks through /dbfs/create, add-block and close.
+        Chunks are regrouped into 1 MB blocks, so only one block is buffered at a time.
+        A failed upload closes the handle and deletes the partial file.
+        Returns the number of bytes written.
+        """
+        config = get_databricks_config()
+        if not config:
+            content = bytearray()
+            async for chunk in chunks:
+                content += chunk
+            databricks_mock_service.write_file(path, content.decode('utf-8', errors='replace'), overwrite)
+            return len(content)
+
+        base_url = f"{config.base_url}/api/2.0/dbfs"
+        headers = self._get_headers(config)
+        client = self._client(config)
+
+        response = await client.post(f"{base_url}/create", json={"path": path, "overwrite": overwrite}, headers=headers)
+        response.raise_for_status()
+        handle = response.json()["handle"]
+
+        async def add_block(block: bytes):
+            data = base64.b64encode(block).decode('utf-8')
+            resp = await client.post(f"{base_url}/add-block", json={"handle": handle, "data": data}, headers=headers)
+            resp.raise_for_status()
+
+        written = 0
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                buffer += chunk
+                while len(buffer) >= self.dbfs_block_size:
+                    await add_block(bytes(buffer[:self.dbfs_block_size]))
+                    written += self.dbfs_block_size
+                    del buffer[:self.dbfs_block_size]
+            if buffer:
+                await add_block(bytes(buffer))
+                written += len(buffer)
+        except BaseException:
+            await asyncio.shield(self._abort_upload(client, base_url, headers, handle, path))
+            raise
+
+        response = await client.post(f"{base_url}/close", json={"handle": handle}, headers=headers)
+        response.raise_for_status()
+        return written
+
+    async def _abort_upload(self, client: httpx.AsyncClient, base_url: str, headers, handle: int, path: str):
+        try:
+            await client.post(f"{base_url}/close", json={"handle": handle}, headers=headers)
+            await client.post(f"{base_url}/delete", json={"path": path, "recursive": False}, headers=headers)
+        except httpx.HTTPError as e:
+            logger.warning("Failed to clean up partial upload %s: %s", path, e)
+
+    async def list_catalogs(self):
         """
         Recupera a lista de catálogos do metastore atual.
         Utiliza o endpoint GET /api/2.1/unity-catalog/catalogs.
@@ -176,36 +826,37 @@ class DatabricksService:
         if not config:
             return databricks_mock_service.list_catalogs()
 
-        url = f"{config.host.rstrip('/')}/api/2.1/unity-catalog/catalogs"
+        url = f"{config.base_url}/api/2.1/unity-catalog/catalogs"
         headers = self._get_headers(config)
-        
+
         catalogs = []
         page_token = None
-        
+
+        client = self._client(config)
         while True:
             params = {}
             if page_token:
                 params['page_token'] = page_token
-                
+
             try:
-                response = requests.get(url, headers=headers, params=params)
+                response = await self._get_with_retry(client, url, headers, params)
                 response.raise_for_status()
                 data = response.json()
-                
+
                 if 'catalogs' in data:
                     catalogs.extend(data['catalogs'])
-                
+
                 page_token = data.get('next_page_token')
                 if not page_token:
                     break
-                    
-            except requests.exceptions.RequestException as e:
+
+            except httpx.HTTPError as e:
                 # Log error appropriate to production environment
                 raise ValueError(f"Falha ao listar catálogos: {str(e)}")
 
         return catalogs
 
-    def list_schemas(self, catalog_name: str):
+    async def list_schemas(self, catalog_name: str):
         """
         Lista esquemas dentro de um catálogo específico.
         Endpoint: GET /api/2.1/unity-catalog/schemas
@@ -214,19 +865,20 @@ class DatabricksService:
         if not config:
             return databricks_mock_service.list_schemas(catalog_name)
 
-        url = f"{config.host.rstrip('/')}/api/2.1/unity-catalog/schemas"
+        url = f"{config.base_url}/api/2.1/unity-catalog/schemas"
         headers = self._get_headers(config)
-        
+
         schemas = []
         page_token = None
 
+        client = self._client(config)
         while True:
             params = {'catalog_name': catalog_name}
             if page_token:
                 params['page_token'] = page_token
 
             try:
-                response = requests.get(url, headers=headers, params=params)
+                response = await self._get_with_retry(client, url, headers, params)
                 response.raise_for_status()
                 data = response.json()
 
@@ -236,12 +888,12 @@ class DatabricksService:
                 page_token = data.get('next_page_token')
                 if not page_token:
                     break
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                  raise ValueError(f"Falha ao listar esquemas: {str(e)}")
-        
+
         return schemas
 
-    def list_tables(self, catalog_name: str, schema_name: str):
+    async def list_tables(self, catalog_name: str, schema_name: str):
         """
         Lista tabelas e views dentro de um esquema.
         Endpoint: GET /api/2.1/unity-catalog/tables
@@ -249,39 +901,40 @@ class DatabricksService:
         config = get_databricks_config()
         if not config:
             return databricks_mock_service.list_tables(catalog_name, schema_name)
-        
-        url = f"{config.host.rstrip('/')}/api/2.1/unity-catalog/tables"
+
+        url = f"{config.base_url}/api/2.1/unity-catalog/tables"
         headers = self._get_headers(config)
-        
+
         tables = []
         page_token = None
 
+        client = self._client(config)
         while True:
             params = {
-                'catalog_name': catalog_name, 
+                'catalog_name': catalog_name,
                 'schema_name': schema_name,
                 'omit_columns': 'true' # Performance optimization
             }
             if page_token:
                 params['page_token'] = page_token
-            
+
             try:
-                response = requests.get(url, headers=headers, params=params)
+                response = await self._get_with_retry(client, url, headers, params)
                 response.raise_for_status()
                 data = response.json()
-                
+
                 if 'tables' in data:
                     tables.extend(data['tables'])
-                
+
                 page_token = data.get('next_page_token')
                 if not page_token:
                     break
-            except requests.exceptions.RequestException as e:
+            except httpx.HTTPError as e:
                 raise ValueError(f"Falha ao listar tabelas: {str(e)}")
-        
+
         return tables
 
-    def get_table(self, full_table_name: str):
+    async def get_table(self, full_table_name: str):
         """
         Recupera metadados de uma tabela específica, incluindo colunas.
         Endpoint: GET /api/2.1/unity-catalog/tables/{full_name}
@@ -290,14 +943,15 @@ class DatabricksService:
         if not config:
             return databricks_mock_service.get_table(full_table_name)
 
-        url = f"{config.host.rstrip('/')}/api/2.1/unity-catalog/tables/{full_table_name}"
+        url = f"{config.base_url}/api/2.1/unity-catalog/tables/{full_table_name}"
         headers = self._get_headers(config)
-        
+
         try:
-            response = requests.get(url, headers=headers)
+            client = self._client(config)
+            response = await self._get_with_retry(client, url, headers)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             raise ValueError(f"Falha ao recuperar detalhes da tabela: {str(e)}")
 
 databricks_service = DatabricksService()
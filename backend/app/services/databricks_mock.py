@@ -1,129 +1,102 @@
-import base64
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from app.services.mock_engine import mock_engine
 
 class DatabricksMockService:
     # Mock data storage
+    _mock_mtimes = {}
     _mock_files = {
         "dbfs:/FileStore/demo_query.sql": "SELECT * FROM samples.nyctaxi.trips LIMIT 10;",
         "dbfs:/FileStore/readme.md": "# Demo Project\n\nThis is a mock file system.",
         "dbfs:/FileStore/projects/analysis.sql": "-- Analysis query\nSELECT count(*) FROM sales;"
     }
 
-    def execute_sql(self, query: str):
+    # Statements run on the local engine: manifest and native rows, keyed by statement_id
+    _mock_statements = OrderedDict()
+    _statements_lock = threading.Lock()
+    max_statements = 64
+
+    def execute_sql(self, query: str, parameters: list = None):
         """
-        Returns mock data in the same structure as Databricks SQL Statement Execution API.
-        Structure: { manifest: { schema: { columns: [...] } }, result: { data_array: [...] } }
+        Runs the query, binding its named parameters, on the embedded SQL engine (see
+        mock_engine) and returns it in the shape of the SQL Statement Execution API:
+        the manifest lists every result chunk and carries the first one in result; the
+        others are served by get_statement_chunk. Invalid SQL and unknown tables give a FAILED statement.
+        Blocking: call it from a worker thread.
         """
-        if "samples.nyctaxi.trips" in query:
-            return {
-                "statement_id": "mock-statement-001",
-                "status": {"state": "SUCCEEDED"},
-                "manifest": {
-                    "format": "JSON_ARRAY",
-                    "schema": {
-                        "column_count": 6,
-                        "columns": [
-                            {"name": "tpep_pickup_datetime", "type_text": "STRING", "type_name": "STRING", "position": 0},
-                            {"name": "tpep_dropoff_datetime", "type_text": "STRING", "type_name": "STRING", "position": 1},
-                            {"name": "trip_distance", "type_text": "DOUBLE", "type_name": "DOUBLE", "position": 2},
-                            {"name": "fare_amount", "type_text": "DOUBLE", "type_name": "DOUBLE", "position": 3},
-                            {"name": "pickup_zip", "type_text": "INT", "type_name": "INT", "position": 4},
-                            {"name": "dropoff_zip", "type_text": "INT", "type_name": "INT", "position": 5}
-                        ]
-                    },
-                    "total_row_count": 3,
-                    "truncated": False
-                },
-                "result": {
-                    "chunk_index": 0,
-                    "row_offset": 0,
-                    "row_count": 3,
-                    "data_array": [
-                        ["2023-01-01 00:00:00", "2023-01-01 00:15:00", 2.5, 15.0, 10001, 10002],
-                        ["2023-01-01 00:10:00", "2023-01-01 00:35:00", 5.1, 25.5, 10003, 10004],
-                        ["2023-01-01 00:20:00", "2023-01-01 00:25:00", 0.8, 7.0, 10001, 10001]
-                    ]
-                }
-            }
-        elif "main.default.users" in query:
-            return {
-                "statement_id": "mock-statement-002",
-                "status": {"state": "SUCCEEDED"},
-                "manifest": {
-                    "format": "JSON_ARRAY",
-                    "schema": {
-                        "column_count": 4,
-                        "columns": [
-                            {"name": "id", "type_text": "INT", "type_name": "INT", "position": 0},
-                            {"name": "name", "type_text": "STRING", "type_name": "STRING", "position": 1},
-                            {"name": "email", "type_text": "STRING", "type_name": "STRING", "position": 2},
-                            {"name": "created_at", "type_text": "STRING", "type_name": "STRING", "position": 3}
-                        ]
-                    },
-                    "total_row_count": 3,
-                    "truncated": False
-                },
-                "result": {
-                    "chunk_index": 0,
-                    "row_offset": 0,
-                    "row_count": 3,
-                    "data_array": [
-                        [1, "John Doe", "john@example.com", "2023-01-01"],
-                        [2, "Jane Smith", "jane@example.com", "2023-01-02"],
-                        [3, "Bob Johnson", "bob@example.com", "2023-01-03"]
-                    ]
-                }
-            }
-        elif "main.default.transactions" in query:
-            return {
-                "statement_id": "mock-statement-003",
-                "status": {"state": "SUCCEEDED"},
-                "manifest": {
-                    "format": "JSON_ARRAY",
-                    "schema": {
-                        "column_count": 3,
-                        "columns": [
-                            {"name": "transaction_id", "type_text": "STRING", "type_name": "STRING", "position": 0},
-                            {"name": "amount", "type_text": "DOUBLE", "type_name": "DOUBLE", "position": 1},
-                            {"name": "currency", "type_text": "STRING", "type_name": "STRING", "position": 2}
-                        ]
-                    },
-                    "total_row_count": 3,
-                    "truncated": False
-                },
-                "result": {
-                    "chunk_index": 0,
-                    "row_offset": 0,
-                    "row_count": 3,
-                    "data_array": [
-                        ["tx_001", 100.50, "USD"],
-                        ["tx_002", 50.25, "EUR"],
-                        ["tx_003", 200.00, "USD"]
-                    ]
-                }
-            }
+        statement_id = f"mock-{uuid.uuid4()}"
+        try:
+            columns, rows, truncated = mock_engine.execute(query, parameters)
+        except sqlite3.Error as e:
+            meta = {"statement_id": statement_id, "status": {"state": "FAILED", "error": mock_engine.error(e)}}
+            self._remember(statement_id, meta, [])
+            return dict(meta)
 
-        # Generic fallback for unknown queries
-        return {
-            "statement_id": "mock-statement-fallback",
-            "status": {"state": "SUCCEEDED"},
-            "manifest": {
+        meta = {"statement_id": statement_id, "status": {"state": "SUCCEEDED"}}
+        if columns is not None:
+            size = mock_engine.rows_per_chunk
+            meta["manifest"] = {
                 "format": "JSON_ARRAY",
-                "schema": {
-                    "column_count": 1,
-                    "columns": [
-                        {"name": "result", "type_text": "STRING", "type_name": "STRING", "position": 0}
-                    ]
-                },
-                "total_row_count": 1,
-                "truncated": False
-            },
-            "result": {
-                "chunk_index": 0,
-                "row_offset": 0,
-                "row_count": 1,
-                "data_array": [["Mock query executed successfully"]]
+                "schema": {"column_count": len(columns), "columns": columns},
+                "total_chunk_count": max(1, -(-len(rows) // size)),
+                "chunks": [{"chunk_index": i, "row_offset": offset, "row_count": min(size, len(rows) - offset)}
+                           for i, offset in enumerate(range(0, max(len(rows), 1), size))],
+                "total_row_count": len(rows),
+                "truncated": truncated
             }
-        }
+        self._remember(statement_id, meta, rows)
+        if columns is None:
+            return dict(meta)
+        return {**meta, "manifest": dict(meta["manifest"]), "result": self._chunk(statement_id, 0)}
+
+    def _remember(self, statement_id: str, meta: dict, rows: list):
+        with self._statements_lock:
+            self._mock_statements[statement_id] = (meta, rows)
+            while len(self._mock_statements) > self.max_statements:
+                self._mock_statements.popitem(last=False)
+
+    def _statement(self, statement_id: str):
+        with self._statements_lock:
+            entry = self._mock_statements.get(statement_id)
+        if entry is None:
+            raise ValueError(f"Statement not found: {statement_id}")
+        return entry
+
+    def _chunk(self, statement_id: str, chunk_index: int):
+        """One result chunk as the API returns it, values formatted as strings on demand."""
+        meta, rows = self._statement(statement_id)
+        manifest = meta.get("manifest")
+        if manifest is None or not 0 <= chunk_index < manifest["total_chunk_count"]:
+            raise ValueError(f"Result chunk {chunk_index} not found for statement {statement_id}")
+        offset = chunk_index * mock_engine.rows_per_chunk
+        data = mock_engine.format_rows(manifest["schema"]["columns"], rows[offset:offset + mock_engine.rows_per_chunk])
+        chunk = {"chunk_index": chunk_index, "row_offset": offset, "row_count": len(data), "data_array": data}
+        if chunk_index + 1 < manifest["total_chunk_count"]:
+            chunk["next_chunk_index"] = chunk_index + 1
+            chunk["next_chunk_internal_link"] = f"/api/2.0/sql/statements/{statement_id}/result/chunks/{chunk_index + 1}"
+        return chunk
+
+    def submit_statement(self, query: str):
+        """Mock statements finish within the call; results are served by get_statement_chunk."""
+        meta = self.execute_sql(query)
+        return {key: value for key, value in meta.items() if key != "result"}
+
+    def get_statement(self, statement_id: str):
+        meta, _ = self._statement(statement_id)
+        return dict(meta)
+
+    def get_statement_chunk(self, statement_id: str, chunk_index: int = 0):
+        chunk = self._chunk(statement_id, chunk_index)
+        return {"chunk_index": chunk_index, "row_offset": chunk["row_offset"], "data_array": chunk["data_array"],
+                "next_chunk_index": chunk.get("next_chunk_index")}
+
+    def cancel_statement(self, statement_id: str):
+        meta, _ = self._statement(statement_id)
+        meta["status"] = {"state": "CANCELED"}
+        return {"statement_id": statement_id, "status": {"state": "CANCELED"}}
 
     def list_directory(self, path: str):
         files = []
@@ -163,10 +136,28 @@ class DatabricksMockService:
             return {"path": path, "content": self._mock_files[path]}
         raise ValueError(f"File not found in mock: {path}")
 
+    def get_file_status(self, path: str):
+        if path in self._mock_files:
+            return {"path": path, "is_dir": False, "file_size": len(self._mock_files[path].encode('utf-8')),
+                    "modification_time": self._mock_mtimes.get(path, 0)}
+        prefix = path.rstrip('/') + '/'
+        if any(file_path.startswith(prefix) for file_path in self._mock_files):
+            return {"path": path, "is_dir": True, "file_size": 0, "modification_time": 0}
+        raise ValueError(f"File not found in mock: {path}")
+
+    def iter_file(self, path: str, offset: int = 0, length: int = None, block_size: int = 1024 * 1024):
+        if path not in self._mock_files:
+            raise ValueError(f"File not found in mock: {path}")
+        data = self._mock_files[path].encode('utf-8')
+        end = len(data) if length is None else min(len(data), offset + length)
+        for start in range(offset, end, block_size):
+            yield data[start:min(start + block_size, end)]
+
     def write_file(self, path: str, content: str, overwrite: bool = True):
         if not overwrite and path in self._mock_files:
             raise ValueError("File already exists")
         self._mock_files[path] = content
+        self._mock_mtimes[path] = int(time.time() * 1000)
         return {"message": "File saved successfully (Mock)", "path": path}
 
     def list_catalogs(self):
@@ -189,45 +180,14 @@ class DatabricksMockService:
         return []
 
     def list_tables(self, catalog_name: str, schema_name: str):
-        if catalog_name == "samples" and schema_name == "nyctaxi":
-             return [
-                {"name": "trips", "catalog_name": "samples", "schema_name": "nyctaxi", "table_type": "MANAGED", "full_name": "samples.nyctaxi.trips"}
-             ]
-        elif catalog_name == "main" and schema_name == "default":
-             return [
-                 {"name": "users", "catalog_name": "main", "schema_name": "default", "table_type": "MANAGED", "full_name": "main.default.users"},
-                 {"name": "transactions", "catalog_name": "main", "schema_name": "default", "table_type": "EXTERNAL", "full_name": "main.default.transactions"}
-             ]
-        return []
+        # The tables the mock SQL engine can query
+        return [table.info() for table in mock_engine.tables(catalog_name, schema_name)]
 
     def get_table(self, full_table_name: str):
-        if full_table_name == "samples.nyctaxi.trips":
-            return {
-                "name": "trips",
-                "catalog_name": "samples",
-                "schema_name": "nyctaxi",
-                "table_type": "MANAGED",
-                "comment": "NYC Taxi Trip Data",
-                "columns": [
-                     {"name": "tpep_pickup_datetime", "type_text": "TIMESTAMP", "type_name": "TIMESTAMP", "comment": "Pickup time"},
-                     {"name": "trip_distance", "type_text": "DOUBLE", "type_name": "DOUBLE", "comment": "Distance in miles"},
-                     {"name": "fare_amount", "type_text": "DOUBLE", "type_name": "DOUBLE", "comment": "Fare cost"}
-                ]
-            }
-        elif full_table_name == "main.default.users":
-             return {
-                "name": "users",
-                "catalog_name": "main",
-                "schema_name": "default",
-                "table_type": "MANAGED",
-                "comment": "User registry",
-                "columns": [
-                     {"name": "id", "type_text": "INT", "type_name": "INT", "comment": "User ID"},
-                     {"name": "name", "type_text": "STRING", "type_name": "STRING", "comment": "Full name"},
-                     {"name": "email", "type_text": "STRING", "type_name": "STRING", "comment": "Email address"}
-                ]
-            }
-        raise ValueError(f"Tabela não encontrada (Mock): {full_table_name}")
+        table = mock_engine.table(*full_table_name.split(".")) if full_table_name.count(".") == 2 else None
+        if table is None:
+            raise ValueError(f"Tabela não encontrada (Mock): {full_table_name}")
+        return table.info(with_columns=True)
 
 databricks_mock_service = DatabricksMockService()
 
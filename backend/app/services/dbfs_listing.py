@@ -0,0 +1,169 @@
+import asyncio
+import fnmatch
+import os
+import time
+from app.services.databricks import databricks_service
+
+DEFAULT_MAX_DEPTH = 5
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_CONCURRENCY = 8
+
+def normalize_path(path: str) -> str:
+    stripped = path.rstrip("/")
+    # Keep roots such as "/" and "dbfs:/" intact
+    return stripped if stripped and not stripped.endswith(":") else path
+
+def parent_paths(path: str) -> list:
+    """"dbfs:/a/b/c" -> ["dbfs:/a/b", "dbfs:/a", "dbfs:/"]"""
+    parents = []
+    key = normalize_path(path)
+    while True:
+        head, sep, _ = key.rstrip("/").rpartition("/")
+        if not sep:
+            break
+        parent = normalize_path(head + "/")
+        if parent == key:
+            break
+        parents.append(parent)
+        key = parent
+    return parents
+
+def file_entry(f: dict, depth: int = None) -> dict:
+    """DBFS list item -> the shape the file browser expects."""
+    entry = {
+        "name": f["path"].rstrip("/").split("/")[-1],
+        "path": f["path"],
+        "type": "directory" if f["is_dir"] else "file",
+        "size": f.get("file_size", 0)
+    }
+    if depth is not None:
+        entry["depth"] = depth
+    return entry
+
+class DirectoryListingCache:
+    """
+    Short-lived cache of DBFS directory listings, keyed by normalized path.
+
+    Concurrent requests for the same directory share one /dbfs/list call.
+    Writes made through /api/files call invalidate(), which drops the written
+    path, everything below it and every ancestor (DBFS creates parent folders
+    on write, so their listings change too).
+    """
+
+    def __init__(self, service=None, ttl_seconds: float = None):
+        self.service = service or databricks_service
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("DBFS_LIST_CACHE_TTL_SECONDS", 10))
+        self._entries = {}
+        self._inflight = {}
+        self._counters = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    async def list(self, path: str, force: bool = False) -> list:
+        key = normalize_path(path)
+        entry = self._entries.get(key)
+        if entry is not None and not force and time.monotonic() - entry[0] < self.ttl_seconds:
+            self._counters["hits"] += 1
+            return entry[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self._counters["misses"] += 1
+            task = asyncio.ensure_future(self._load(key, path))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        else:
+            self._counters["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, path: str) -> list:
+        try:
+            result = await self.service.list_directory(path)
+            files = result.get("files", [])
+            self._entries[key] = (time.monotonic(), files)
+            return files
+        finally:
+            self._inflight.pop(key, None)
+
+    def invalidate(self, path: str) -> int:
+        key = normalize_path(path)
+        prefix = key.rstrip("/") + "/"
+        targets = [k for k in self._entries if k == key or k.startswith(prefix)] + parent_paths(key)
+        removed = 0
+        for target in targets:
+            if self._entries.pop(target, None) is not None:
+                removed += 1
+        self._counters["invalidations"] += 1
+        return removed
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {**self._counters, "entries": len(self._entries), "ttl_seconds": self.ttl_seconds}
+
+listing_cache = DirectoryListingCache()
+
+async def walk_directory(path: str, max_depth: int = DEFAULT_MAX_DEPTH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                         max_concurrency: int = DEFAULT_CONCURRENCY, pattern: str = None, force: bool = False,
+                         cache: DirectoryListingCache = None):
+    """
+    Recursively lists a DBFS tree, fetching sibling directories concurrently.
+
+    Yields ("entries", [entry, ...]) per directory as soon as it is listed, then
+    ("end", {"count", "truncated", "directories", "errors"}). Entries carry their
+    depth (1 = direct child of path). pattern filters entry names (fnmatch) but
+    every directory is still walked. Stops once max_entries entries were emitted.
+    Subdirectories that fail are reported in "errors"; a failing root raises.
+    """
+    cache = cache or listing_cache
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    queue = asyncio.Queue()
+    tasks = set()
+    errors = []
+    count = 0
+    directories = 0
+    truncated = False
+
+    async def list_one(directory: str, depth: int):
+        async with semaphore:
+            try:
+                await queue.put((directory, depth, await cache.list(directory, force=force), None))
+            except Exception as e:
+                await queue.put((directory, depth, [], e))
+
+    def schedule(directory: str, depth: int):
+        task = asyncio.ensure_future(list_one(directory, depth))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    schedule(path, 1)
+    pending = 1
+    try:
+        while pending:
+            directory, depth, files, error = await queue.get()
+            pending -= 1
+            if error is not None:
+                if directory == path:
+                    # The root itself is unreadable: fail like a plain listing would
+                    raise error
+                errors.append({"path": directory, "error": str(error)})
+            directories += 1
+            batch = []
+            for f in files:
+                if f["is_dir"] and depth < max_depth:
+                    schedule(f["path"], depth + 1)
+                    pending += 1
+                if pattern and not fnmatch.fnmatch(f["path"].rstrip("/").split("/")[-1], pattern):
+                    continue
+                batch.append(file_entry(f, depth))
+            if count + len(batch) >= max_entries:
+                truncated = count + len(batch) > max_entries or pending > 0
+                batch = batch[:max_entries - count]
+            count += len(batch)
+            if batch:
+                yield "entries", batch
+            if truncated or count >= max_entries:
+                break
+    finally:
+        for task in list(tasks):
+            task.cancel()
+
+    yield "end", {"count": count, "truncated": truncated, "directories": directories, "errors": errors}
@@ -0,0 +1,81 @@
+import os
+from collections import OrderedDict
+
+def etag_for(status: dict) -> str:
+    """Strong validator from DBFS status: changes whenever size or modification time does."""
+    return f'"{status.get("file_size", 0):x}-{status.get("modification_time", 0):x}"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+class FileContentCache:
+    """
+    Bounded LRU of decoded file contents, keyed by path and validated by ETag.
+
+    An entry is only served while its ETag still matches the file's current
+    DBFS status, so edits made outside the app are picked up on the next open.
+    Files larger than max_file_bytes are never cached; writes through
+    /api/files call invalidate().
+    """
+
+    def __init__(self, max_bytes: int = None, max_file_bytes: int = None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("FILE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+        self.max_file_bytes = max_file_bytes if max_file_bytes is not None else int(os.getenv("FILE_CACHE_MAX_FILE_BYTES", 8 * 1024 * 1024))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0, "not_modified": 0}
+
+    def get(self, path: str, etag: str):
+        entry = self._entries.get(path)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        if entry[0] != etag:
+            self._counters["stale"] += 1
+            self._remove(path)
+            return None
+        self._entries.move_to_end(path)
+        self._counters["hits"] += 1
+        return entry[1]
+
+    def put(self, path: str, etag: str, content: str, size: int):
+        if size > self.max_file_bytes:
+            return
+        self._remove(path)
+        self._entries[path] = (etag, content, size)
+        self._bytes += size
+        while self._entries and self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _remove(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def record_not_modified(self):
+        self._counters["not_modified"] += 1
+
+    def invalidate(self, path: str):
+        self._remove(path)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "max_file_bytes": self.max_file_bytes,
+        }
+
+file_cache = FileContentCache()
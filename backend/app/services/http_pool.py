@@ -0,0 +1,205 @@
+import importlib.util
+import logging
+import os
+import time
+import httpx
+from app.core import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def classify_upstream(url: httpx.URL) -> str:
+    """Databricks API family of a request URL, used as the api metrics label."""
+    path = url.path
+    if path.startswith("/api/2.0/sql/statements"):
+        return "chunks" if "/result/chunks" in path else "statements"
+    if path.startswith("/api/2.0/dbfs/"):
+        return "dbfs"
+    if "/unity-catalog/" in path:
+        return "unity_catalog"
+    if path.startswith("/serving-endpoints/"):
+        return "serving"
+    # Presigned cloud storage URLs of EXTERNAL_LINKS results
+    return "external_links"
+
+class _MeteredStream(httpx.AsyncByteStream):
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._bytes = 0
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            self._bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close(self._bytes)
+                self._on_close = None
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Records latency (until the body is fully read), status, bytes and transport
+    errors of every Databricks call in app.core.metrics, labelled by API family.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        api = classify_upstream(request.url)
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            metrics.upstream_errors.labels(api, type(e).__name__).inc()
+            raise
+        metrics.upstream_requests.labels(api, str(response.status_code)).inc()
+
+        def on_close(received: int):
+            elapsed = time.perf_counter() - start
+            metrics.upstream_bytes.labels(api).inc(received)
+            metrics.upstream_duration.labels(api, request.method).observe(elapsed)
+            tracing.record(f"upstream-{api}", elapsed)
+
+        if response.is_closed:
+            # Already fully read (in-memory responses such as httpx.MockTransport's)
+            on_close(len(response.content))
+        else:
+            response.stream = _MeteredStream(response.stream, on_close)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+class WorkspaceClientPool:
+    """
+    Long-lived httpx.AsyncClient per Databricks workspace host.
+
+    Every statement submit, poll, chunk fetch and Unity Catalog page reuses the
+    same keep-alive connections instead of paying a TCP+TLS handshake per call.
+    Clients are rebuilt when the configuration changes (see reset()).
+
+    HTTP/2 is optional: it is only enabled when DATABRICKS_HTTP2=true and the
+    `h2` package is installed (pip install "httpx[http2]").
+    """
+
+    def __init__(self, max_connections: int = None, max_keepalive_connections: int = None,
+                 keepalive_expiry: float = None, http2: bool = None, timeout: float = None,
+                 transport: httpx.AsyncBaseTransport = None):
+        self.max_connections = max_connections or _env_int("DATABRICKS_POOL_MAX_CONNECTIONS", 20)
+        self.max_keepalive_connections = max_keepalive_connections or _env_int("DATABRICKS_POOL_MAX_KEEPALIVE", 10)
+        self.keepalive_expiry = keepalive_expiry or _env_float("DATABRICKS_POOL_KEEPALIVE_EXPIRY", 30.0)
+        self.timeout = timeout or _env_float("DATABRICKS_HTTP_TIMEOUT", 60.0)
+        if http2 is None:
+            http2 = os.getenv("DATABRICKS_HTTP2", "false").lower() in ("1", "true", "yes")
+        self.http2 = http2
+        # A custom transport (e.g. httpx.MockTransport) can be injected for benchmarks
+        self.transport = transport
+        self._clients = {}
+        self._http2_warned = False
+        self._counters = {
+            "requests": 0,
+            "connections_opened": 0,
+            "clients_created": 0,
+            "rebuilds": 0,
+        }
+
+    def _http2_available(self) -> bool:
+        if not self.http2:
+            return False
+        if importlib.util.find_spec("h2") is None:
+            if not self._http2_warned:
+                logger.warning("HTTP/2 is enabled but the 'h2' package is not installed; using HTTP/1.1")
+                self._http2_warned = True
+            return False
+        return True
+
+    async def _trace(self, event_name: str, info: dict):
+        # httpcore emits connect_tcp only when a brand new connection is opened
+        if event_name == "connection.connect_tcp.complete":
+            self._counters["connections_opened"] += 1
+
+    async def _on_request(self, request: httpx.Request):
+        self._counters["requests"] += 1
+        request.extensions["trace"] = self._trace
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+        self._counters["clients_created"] += 1
+        http2 = self._http2_available()
+        # Built here rather than by AsyncClient so it can be wrapped for metrics
+        transport = self.transport or httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+        return httpx.AsyncClient(
+            transport=MeteredTransport(transport),
+            http2=http2,
+            timeout=self.timeout,
+            event_hooks={"request": [self._on_request]},
+        )
+
+    def get_client(self, host: str) -> httpx.AsyncClient:
+        key = host.rstrip('/').lower()
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = self._build_client()
+            self._clients[key] = client
+        return client
+
+    async def reset(self):
+        """Closes every pooled client. The next call rebuilds them with fresh settings."""
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        self._counters["rebuilds"] += 1
+
+    async def configure(self, **options):
+        """Updates pool options (limits, http2, transport, ...) and rebuilds the clients."""
+        for name, value in options.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise ValueError(f"Unknown pool option: {name}")
+            setattr(self, name, value)
+        await self.reset()
+
+    def stats(self) -> dict:
+        requests = self._counters["requests"]
+        opened = self._counters["connections_opened"]
+        reused = max(requests - opened, 0)
+        return {
+            **self._counters,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / requests, 4) if requests else 0.0,
+            "hosts": sorted(self._clients.keys()),
+            "http2": self._http2_available(),
+            "max_connections": self.max_connections,
+            "max_keepalive_connections": self.max_keepalive_connections,
+        }
+
+workspace_pool = WorkspaceClientPool()
+
+# Model serving endpoints: long-lived SSE streams from many concurrent chats, so a
+# larger pool, a longer timeout and HTTP/2 multiplexing when h2 is installed
+serving_pool = WorkspaceClientPool(
+    max_connections=_env_int("SERVING_POOL_MAX_CONNECTIONS", 100),
+    max_keepalive_connections=_env_int("SERVING_POOL_MAX_KEEPALIVE", 20),
+    timeout=_env_float("SERVING_HTTP_TIMEOUT", 120.0),
+    http2=os.getenv("SERVING_HTTP2", "true").lower() in ("1", "true", "yes"),
+)
@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from app.core import tracing
+from app.services.databricks import databricks_service
+
+logger = logging.getLogger(__name__)
+
+# TTL (seconds) per level of the Unity Catalog hierarchy
+DEFAULT_TTLS = {
+    "catalogs": 300.0,
+    "schemas": 300.0,
+    "tables": 120.0,
+    "table": 60.0,
+}
+
+class _Entry:
+    __slots__ = ("value", "fetched_at", "read_at")
+
+    def __init__(self, value, fetched_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.read_at = None  # last time get() served it, None until then
+
+class MetadataCache:
+    """
+    In-memory cache of the Unity Catalog metadata behind the explorer.
+
+    - TTL per level (catalogs, schemas, tables, table details).
+    - Stale-while-revalidate: past its TTL an entry is still served for up to
+      max_stale_seconds while a refresh runs in the background.
+    - Single-flight: concurrent clicks on the same node make a single REST call.
+    - warm() preloads catalogs and schemas and starts a refresher that renews the
+      warmed levels, and entries read within their TTL, before they expire.
+    - At most max_entries are kept, least recently used first out; entries past
+      max_stale_seconds are dropped.
+    - invalidate() removes a node and everything below it.
+
+    Keys are paths: () for catalogs, (catalog,) for schemas,
+    (catalog, schema) for tables and (catalog, schema, table) for table details.
+    """
+
+    def __init__(self, service=None, ttls: dict = None, max_stale_seconds: float = None,
+                 refresh_interval: float = 15.0, max_entries: int = None):
+        self.service = service or databricks_service
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_stale_seconds = max_stale_seconds if max_stale_seconds is not None else float(os.getenv("UC_CACHE_MAX_STALE_SECONDS", 3600))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("UC_CACHE_MAX_ENTRIES", 20000))
+        self.refresh_interval = refresh_interval
+        self._entries = OrderedDict()  # least recently used first
+        self._warmed_levels = set()
+        self._inflight = {}
+        self._refreshes = set()  # stale-while-revalidate tasks, referenced until done
+        self._refresher = None
+        self._listeners = []
+        self._invalidation_listeners = []
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0, "evictions": 0}
+
+    def _loader(self, level: str, path: tuple):
+        if level == "catalogs":
+            return self.service.list_catalogs()
+        if level == "schemas":
+            return self.service.list_schemas(path[0])
+        if level == "tables":
+            return self.service.list_tables(path[0], path[1])
+        return self.service.get_table(".".join(path))
+
+    async def _load(self, level: str, path: tuple):
+        """Loads from Unity Catalog once per key, even with concurrent callers."""
+        key = (level, path)
+        task = self._inflight.get(key)
+        if task is None:
+            async def run():
+                try:
+                    value = await self._loader(level, path)
+                    self._store(key, value)
+                    self._notify(level, path, value)
+                    return value
+                finally:
+                    # clear() may already have replaced it with a load for the new workspace
+                    if self._inflight.get(key) is asyncio.current_task():
+                        del self._inflight[key]
+            task = asyncio.ensure_future(run())
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled() and not asyncio.current_task().cancelling():
+                # Dropped by clear() or invalidate(): its result would belong to the old state
+                raise RuntimeError(f"Metadata load for {level} {path} was dropped by a cache reset") from None
+            raise
+
+    def _store(self, key: tuple, value):
+        previous = self._entries.get(key)
+        entry = _Entry(value, time.monotonic())
+        if previous is not None:
+            # A refresh keeps the read history (and LRU position), so a node nobody
+            # reads stops being refreshed and is the first to go
+            entry.read_at = previous.read_at
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _evict_expired(self, now: float) -> int:
+        """Drops the entries too old to be served even as stale."""
+        expired = [
+            key for key, entry in self._entries.items()
+            if now - entry.fetched_at >= self.ttls[key[0]] + self.max_stale_seconds
+        ]
+        for key in expired:
+            del self._entries[key]
+        self._counters["evictions"] += len(expired)
+        return len(expired)
+
+    def subscribe(self, listener, on_invalidate=None):
+        """
+        Registers listener(level, path, value), called for every load from Unity Catalog,
+        and optionally on_invalidate(path), called when invalidate() drops a subtree.
+        """
+        self._listeners.append(listener)
+        if on_invalidate is not None:
+            self._invalidation_listeners.append(on_invalidate)
+
+    def snapshot(self) -> list:
+        """Current entries as (level, path, value), from the top of the hierarchy down."""
+        return sorted(((level, path, entry.value) for (level, path), entry in self._entries.items()),
+                      key=lambda item: len(item[1]))
+
+    def _notify(self, level: str, path: tuple, value):
+        for listener in self._listeners:
+            try:
+                listener(level, path, value)
+            except Exception:
+                logger.exception("Metadata cache listener failed for %s %s", level, path)
+
+    async def _refresh_in_background(self, level: str, path: tuple):
+        try:
+            await self._load(level, path)
+            self._counters["refreshes"] += 1
+        except Exception as e:
+            # Keep the old value; the next read tries again
+            self._counters["refresh_errors"] += 1
+            logger.warning("Failed to refresh metadata %s %s: %s", level, path, e)
+
+    async def get(self, level: str, path: tuple = (), force: bool = False):
+        key = (level, path)
+        entry = self._entries.get(key)
+        if entry is not None and not force:
+            now = time.monotonic()
+            age = now - entry.fetched_at
+            entry.read_at = now
+            self._entries.move_to_end(key)
+            if age < self.ttls[level]:
+                self._counters["hits"] += 1
+                tracing.mark("metadata-cache", "hit")
+                return entry.value
+            if age < self.ttls[level] + self.max_stale_seconds:
+                self._counters["stale_hits"] += 1
+                tracing.mark("metadata-cache", "stale")
+                if key not in self._inflight:
+                    refresh = asyncio.ensure_future(self._refresh_in_background(level, path))
+                    self._refreshes.add(refresh)
+                    refresh.add_done_callback(self._refreshes.discard)
+                return entry.value
+        self._counters["misses"] += 1
+        tracing.mark("metadata-cache", "miss")
+        return await self._load(level, path)
+
+    async def list_catalogs(self, force: bool = False):
+        return await self.get("catalogs", (), force)
+
+    async def list_schemas(self, catalog_name: str, force: bool = False):
+        return await self.get("schemas", (catalog_name,), force)
+
+    async def list_tables(self, catalog_name: str, schema_name: str, force: bool = False):
+        return await self.get("tables", (catalog_name, schema_name), force)
+
+    async def get_table(self, full_table_name: str, force: bool = False):
+        return await self.get("table", tuple(full_table_name.split(".")), force)
+
+    def invalidate(self, path: tuple = ()) -> int:
+        """Removes the given node and all its descendants (an empty path clears everything)."""
+        path = tuple(path)
+        targets = [key for key in self._entries if key[1][:len(path)] == path]
+        if path:
+            # The parent's listing changes too when a child appears or goes away
+            parent_level = {1: "catalogs", 2: "schemas", 3: "tables"}[len(path)]
+            targets.append((parent_level, path[:-1]))
+        for key in targets:
+            self._entries.pop(key, None)
+        # Loads already on their way would store the dropped nodes again
+        self._cancel_loads([key for key in self._inflight if key in targets or key[1][:len(path)] == path])
+        for listener in self._invalidation_listeners:
+            try:
+                listener(path)
+            except Exception:
+                logger.exception("Metadata cache invalidation listener failed for %s", path)
+        return len(targets)
+
+    def _cancel_loads(self, keys: list):
+        for key in keys:
+            task = self._inflight.pop(key, None)
+            if task is not None:
+                task.cancel()
+
+    async def warm(self, include_tables: bool = False):
+        """Preloads catalogs and schemas (and optionally tables) and starts the refresher."""
+        self._warmed_levels.update(("catalogs", "schemas", "tables") if include_tables else ("catalogs", "schemas"))
+        catalogs = await self.list_catalogs(force=True)
+        schema_lists = await asyncio.gather(
+            *(self.list_schemas(c["name"], force=True) for c in catalogs), return_exceptions=True
+        )
+        if include_tables:
+            pairs = [
+                (s["catalog_name"], s["name"])
+                for schemas in schema_lists if not isinstance(schemas, Exception)
+                for s in schemas
+            ]
+            await asyncio.gather(*(self.list_tables(c, s, force=True) for c, s in pairs), return_exceptions=True)
+        self.start_refresher()
+        return {"entries": len(self._entries)}
+
+    def start_refresher(self):
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop_refresher(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self._refresh_due()
+
+    async def _refresh_due(self) -> int:
+        """
+        Proactively renews entries past 80% of their TTL, but only those of the warmed
+        levels and those read within their TTL. Anything else (e.g. the table details
+        a crawl pulled in) is left to stale-while-revalidate and eventually evicted.
+        """
+        now = time.monotonic()
+        self._evict_expired(now)
+        due = [
+            (level, path) for (level, path), entry in list(self._entries.items())
+            if now - entry.fetched_at > self.ttls[level] * 0.8 and (level, path) not in self._inflight
+            and (level in self._warmed_levels
+                 or (entry.read_at is not None and now - entry.read_at < self.ttls[level]))
+        ]
+        for level, path in due:
+            await self._refresh_in_background(level, path)
+        return len(due)
+
+    def clear(self):
+        """Drops every entry and cancels the loads still running against the previous workspace."""
+        self._entries.clear()
+        self._warmed_levels.clear()
+        self._cancel_loads(list(self._inflight))
+        for refresh in list(self._refreshes):
+            refresh.cancel()
+        self._refreshes.clear()
+
+    def stats(self) -> dict:
+        by_level = {}
+        for level, _ in self._entries:
+            by_level[level] = by_level.get(level, 0) + 1
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "entries_by_level": by_level,
+            "ttls": self.ttls,
+            "max_stale_seconds": self.max_stale_seconds,
+            "max_entries": self.max_entries,
+            "warmed_levels": sorted(self._warmed_levels),
+            "refresher_running": self._refresher is not None and not self._refresher.done(),
+        }
+
+metadata_cache = MetadataCache()
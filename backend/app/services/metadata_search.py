@@ -0,0 +1,416 @@
+import bisect
+import re
+import time
+from collections import Counter
+from app.services.metadata_cache import MetadataCache, metadata_cache
+
+KINDS = ("catalog", "schema", "table", "column")
+
+# Weight of each kind of match; names count more than comments and types
+_NAME, _TEXT = "name", "text"
+_TIERS = (
+    (_NAME, "exact", 1.0),
+    (_NAME, "prefix", 0.7),
+    (_NAME, "fuzzy", 0.5),
+    (_TEXT, "exact", 0.35),
+    (_TEXT, "prefix", 0.25),
+    (_TEXT, "fuzzy", 0.15),
+)
+# On equal scores: tables first, then schemas/catalogs, then columns
+_KIND_RANK = {"table": 0, "schema": 1, "catalog": 2, "column": 3}
+
+MAX_PREFIX_EXPANSIONS = 64
+MIN_FUZZY_LENGTH = 4
+MAX_LIMIT = 200
+
+_SPLIT = re.compile(r"[^0-9A-Za-z]+")
+_CAMEL = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_STOPWORDS = frozenset({"a", "an", "and", "as", "at", "by", "de", "do", "da", "e", "for", "in", "is", "of",
+                        "on", "or", "the", "to", "with", "o", "os", "um", "uma", "para", "com"})
+
+def tokenize(text: str) -> list:
+    """Splits names and text into lowercase tokens (snake_case, camelCase, dots, spaces)."""
+    if not text:
+        return []
+    return [part.lower() for part in _SPLIT.split(_CAMEL.sub(" ", text)) if part]
+
+def _text_tokens(*texts) -> set:
+    tokens = set()
+    for text in texts:
+        tokens.update(t for t in tokenize(text) if len(t) > 1 and t not in _STOPWORDS)
+    return tokens
+
+def _trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """Bounded Levenshtein: stops as soon as the distance exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+class _Doc:
+    __slots__ = ("kind", "key", "name", "comment", "type_text", "table_type", "tokens")
+
+    def __init__(self, kind: str, key: str, name: str, comment: str = None, type_text: str = None,
+                 table_type: str = None):
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.comment = comment
+        self.type_text = type_text
+        self.table_type = table_type
+        self.tokens = {_NAME: set(tokenize(name)), _TEXT: _text_tokens(comment, type_text)}
+
+    @property
+    def rank(self) -> int:
+        # Tie-break within the same score: node kind, then shorter names
+        return _KIND_RANK[self.kind] * 1024 + min(len(self.name), 1023)
+
+    @property
+    def scopes(self) -> list:
+        parts = self.key.split(".")
+        return [".".join(parts[:depth]) for depth in (1, 2) if len(parts) >= depth]
+
+    def same_as(self, other) -> bool:
+        return (self.name, self.comment, self.type_text, self.table_type) == \
+               (other.name, other.comment, other.type_text, other.table_type)
+
+    def to_dict(self, score: float) -> dict:
+        result = {"kind": self.kind, "name": self.name, "full_name": self.key, "score": round(score, 3)}
+        if self.comment:
+            result["comment"] = self.comment
+        if self.type_text:
+            result["type_text"] = self.type_text
+        if self.table_type:
+            result["table_type"] = self.table_type
+        return result
+
+class MetadataSearchIndex:
+    """
+    In-memory inverted index over Unity Catalog names, comments and column types.
+
+    - Token (every term must match), prefix and fuzzy queries
+      (edit distance 1, or 2 for long terms, through vocabulary trigrams).
+    - Tiered ranking: exact name > prefix > fuzzy > comment/type.
+    - Incremental updates: the index subscribes to the MetadataCache and reindexes
+      only the reloaded node; children gone from Unity Catalog are dropped with their subtree.
+
+    Documents are keyed by full name (catalog.schema.table.column).
+    """
+
+    def __init__(self):
+        self._docs = {}  # doc id -> _Doc
+        self._ids = {}  # key -> doc id
+        self._children = {}  # parent key ("" for the root) -> set of keys
+        self._postings = {_NAME: {}, _TEXT: {}}  # field -> token -> set of doc ids
+        self._by_kind = {kind: set() for kind in KINDS}
+        self._by_scope = {}  # catalog or catalog.schema -> doc ids of the subtree
+        self._by_name = {}  # lowercase name -> set of doc ids
+        self._rank = {}  # doc id -> tie-break (see _Doc.rank)
+        self._by_rank = {}  # tie-break -> set of doc ids, to find the top k without sorting everything
+        self._sorted_ranks = []
+        self._ranks_dirty = False
+        self._trigram_index = {}  # trigram -> set of vocabulary tokens
+        self._vocabulary = Counter()  # token -> number of postings lists it appears in
+        self._sorted_vocabulary = []
+        self._vocabulary_dirty = False
+        self._next_id = 0
+        self._counters = {"searches": 0, "updates": 0}
+
+    # Maintenance --------------------------------------------------------------
+
+    def attach(self, cache: MetadataCache):
+        """Indexes what is already cached and follows every new load from then on."""
+        for level, path, value in cache.snapshot():
+            self.apply(level, path, value)
+        cache.subscribe(self.apply, on_invalidate=self.remove)
+
+    def apply(self, level: str, path: tuple, value):
+        """Updates the index with the result of a Unity Catalog call."""
+        self._counters["updates"] += 1
+        if level == "catalogs":
+            self._replace_children("", [
+                _Doc("catalog", c["name"], c["name"], c.get("comment")) for c in value
+            ])
+        elif level == "schemas":
+            parent = path[0]
+            self._replace_children(parent, [
+                _Doc("schema", f"{parent}.{s['name']}", s["name"], s.get("comment")) for s in value
+            ])
+        elif level == "tables":
+            parent = ".".join(path)
+            self._replace_children(parent, [self._table_doc(parent, t) for t in value])
+            for table in value:
+                if table.get("columns") is not None:
+                    self._replace_columns(f"{parent}.{table['name']}", table["columns"])
+        elif level == "table":
+            parent = ".".join(path[:2])
+            doc = self._table_doc(parent, value)
+            self._upsert(doc)
+            self._children.setdefault(parent, set()).add(doc.key)
+            self._replace_columns(doc.key, value.get("columns") or [])
+
+    def remove(self, path: tuple):
+        """Drops a node and its subtree (an empty path drops everything)."""
+        if not path:
+            self.clear()
+            return
+        key = ".".join(path)
+        self._remove_subtree(key)
+        siblings = self._children.get(".".join(path[:-1]))
+        if siblings is not None:
+            siblings.discard(key)
+
+    def _table_doc(self, parent: str, table: dict) -> _Doc:
+        return _Doc("table", f"{parent}.{table['name']}", table["name"], table.get("comment"),
+                    table_type=table.get("table_type"))
+
+    def _replace_columns(self, table_key: str, columns: list):
+        self._replace_children(table_key, [
+            _Doc("column", f"{table_key}.{c['name']}", c["name"], c.get("comment"), c.get("type_text"))
+            for c in columns
+        ])
+
+    def _replace_children(self, parent: str, docs: list):
+        new_keys = {doc.key for doc in docs}
+        for key in self._children.get(parent, set()) - new_keys:
+            self._remove_subtree(key)
+        for doc in docs:
+            self._upsert(doc)
+        self._children[parent] = new_keys
+
+    def _upsert(self, doc: _Doc):
+        doc_id = self._ids.get(doc.key)
+        if doc_id is not None:
+            current = self._docs[doc_id]
+            if current.same_as(doc):
+                return
+            self._unindex(doc_id, current)
+        else:
+            doc_id = self._next_id
+            self._next_id += 1
+            self._ids[doc.key] = doc_id
+        self._docs[doc_id] = doc
+        self._rank[doc_id] = doc.rank
+        if doc.rank not in self._by_rank:
+            self._by_rank[doc.rank] = set()
+            self._ranks_dirty = True
+        self._by_rank[doc.rank].add(doc_id)
+        self._by_kind[doc.kind].add(doc_id)
+        self._by_name.setdefault(doc.name.lower(), set()).add(doc_id)
+        for scope in doc.scopes:
+            self._by_scope.setdefault(scope, set()).add(doc_id)
+        for field, tokens in doc.tokens.items():
+            postings = self._postings[field]
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is None:
+                    postings[token] = ids = set()
+                    self._add_vocabulary(token)
+                ids.add(doc_id)
+
+    def _unindex(self, doc_id: int, doc: _Doc):
+        self._rank.pop(doc_id, None)
+        self._by_kind[doc.kind].discard(doc_id)
+        for index, key in ((self._by_name, doc.name.lower()), (self._by_rank, doc.rank),
+                           *((self._by_scope, scope) for scope in doc.scopes)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del index[key]
+        for field, tokens in doc.tokens.items():
+            postings = self._postings[field]
+            for token in tokens:
+                ids = postings.get(token)
+                if ids is None:
+                    continue
+                ids.discard(doc_id)
+                if not ids:
+                    del postings[token]
+                    self._remove_vocabulary(token)
+
+    def _remove_subtree(self, key: str):
+        for child in self._children.pop(key, set()):
+            self._remove_subtree(child)
+        doc_id = self._ids.pop(key, None)
+        if doc_id is not None:
+            self._unindex(doc_id, self._docs.pop(doc_id))
+
+    def _add_vocabulary(self, token: str):
+        self._vocabulary[token] += 1
+        if self._vocabulary[token] == 1:
+            self._vocabulary_dirty = True
+            for trigram in _trigrams(token):
+                self._trigram_index.setdefault(trigram, set()).add(token)
+
+    def _remove_vocabulary(self, token: str):
+        self._vocabulary[token] -= 1
+        if self._vocabulary[token] <= 0:
+            del self._vocabulary[token]
+            self._vocabulary_dirty = True
+            for trigram in _trigrams(token):
+                tokens = self._trigram_index.get(trigram)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._trigram_index[trigram]
+
+    def clear(self):
+        self.__init__()
+
+    def is_empty(self) -> bool:
+        return not self._docs
+
+    # Query --------------------------------------------------------------------
+
+    def _expand(self, term: str) -> dict:
+        """Vocabulary tokens matching the term, grouped by kind of match."""
+        if self._vocabulary_dirty:
+            self._sorted_vocabulary = sorted(self._vocabulary)
+            self._vocabulary_dirty = False
+        exact = [term] if term in self._vocabulary else []
+        prefix = []
+        start = bisect.bisect_right(self._sorted_vocabulary, term)
+        for token in self._sorted_vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(term):
+                break
+            prefix.append(token)
+        fuzzy = []
+        if len(term) >= MIN_FUZZY_LENGTH:
+            limit = 1 if len(term) < 8 else 2
+            trigrams = _trigrams(term)
+            shared = Counter()
+            for trigram in trigrams:
+                shared.update(self._trigram_index.get(trigram, ()))
+            threshold = max(1, len(trigrams) - 3 * limit)
+            fuzzy = [
+                token for token, count in shared.items()
+                if count >= threshold and token != term and not token.startswith(term)
+                and _within_distance(term, token, limit)
+            ]
+        return {"exact": exact, "prefix": prefix, "fuzzy": fuzzy}
+
+    def _tiers(self, term: str) -> list:
+        """For one query term: [(weight, set of doc ids)] from best to worst."""
+        expansions = self._expand(term)
+        tiers = []
+        for field, match, weight in _TIERS:
+            postings = self._postings[field]
+            sets = [postings[token] for token in expansions[match] if token in postings]
+            # A single token: use its postings set itself (only read, never modified)
+            ids = sets[0] if len(sets) == 1 else set().union(*sets)
+            if ids:
+                tiers.append((weight, ids))
+        return tiers
+
+    def search(self, query: str, kinds: list = None, scope: str = None, limit: int = 20, offset: int = 0) -> dict:
+        """
+        Ranked, paginated search. kinds restricts results to catalog/schema/table/column
+        and scope to a subtree ("main" or "main.default").
+        """
+        started = time.perf_counter()
+        self._counters["searches"] += 1
+        limit = max(1, min(limit, MAX_LIMIT))
+        offset = max(0, offset)
+        terms = list(dict.fromkeys(tokenize(query)))
+        normalized = query.strip().lower()
+
+        per_term = [self._tiers(term) for term in terms]
+        buckets = self._score_buckets(per_term)
+        if scope:
+            scope_ids = self._by_scope.get(scope, set())
+            buckets = [(score, ids & scope_ids) for score, ids in buckets]
+        if kinds:
+            kind_ids = [self._by_kind.get(kind, set()) for kind in kinds]
+            buckets = [(score, set().union(*(ids & k for k in kind_ids))) for score, ids in buckets]
+        buckets = [(score, ids) for score, ids in buckets if ids]
+        candidates = buckets[0][1] if len(buckets) == 1 else set().union(*(ids for _, ids in buckets))
+
+        wanted = offset + limit
+        exact = self._by_name.get(normalized, set()) | ({self._ids[query.strip()]} if query.strip() in self._ids else set())
+        ranked = []
+        seen = set()
+        for score, ids in buckets:
+            # A document can show up in more than one combination; the highest score wins
+            layer = ids - seen if seen else ids
+            needed = wanted - len(ranked)
+            # A name identical to the query comes before the others with the same score
+            first = sorted(layer & exact, key=self._rank.__getitem__)[:needed]
+            rest = self._top(layer - exact if first else layer, needed - len(first))
+            ranked.extend((score, doc_id) for doc_id in first + rest)
+            if len(ranked) >= wanted:
+                break
+            seen |= layer
+
+        return {
+            "query": query,
+            "total": len(candidates),
+            "offset": offset,
+            "limit": limit,
+            "results": [self._docs[doc_id].to_dict(score) for score, doc_id in ranked[offset:wanted]],
+            "took_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+
+    def _score_buckets(self, per_term: list) -> list:
+        """
+        Combines the tiers of every term into [(score, doc ids)] from highest to lowest score.
+        Each combination intersects one tier per term, so the cost follows the size of
+        the result; postings sets are never copied.
+        """
+        # Every term must match: one that matches nothing empties the result
+        if not per_term or not all(per_term):
+            return []
+        ordered = sorted(per_term, key=lambda tiers: sum(len(ids) for _, ids in tiers))
+        combos = {weight: ids for weight, ids in ordered[0]}
+        for tiers in ordered[1:]:
+            next_combos = {}
+            for score, current in combos.items():
+                for weight, ids in tiers:
+                    hits = current & ids
+                    if hits:
+                        key = round(score + weight, 6)
+                        next_combos[key] = next_combos[key] | hits if key in next_combos else hits
+            combos = next_combos
+            if not combos:
+                break
+        return sorted(combos.items(), reverse=True)
+
+    def _top(self, ids: set, needed: int) -> list:
+        """The `needed` documents with the lowest tie-break, walking the rank partitions."""
+        if needed <= 0:
+            return []
+        if len(ids) <= needed * 8:
+            return sorted(ids, key=lambda doc_id: (self._rank[doc_id], doc_id))[:needed]
+        if self._ranks_dirty:
+            self._sorted_ranks = sorted(self._by_rank)
+            self._ranks_dirty = False
+        top = []
+        for rank in self._sorted_ranks:
+            hits = ids & self._by_rank.get(rank, set())
+            if hits:
+                top.extend(sorted(hits)[:needed - len(top)])
+                if len(top) >= needed:
+                    break
+        return top
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "documents": len(self._docs),
+            "documents_by_kind": {kind: len(ids) for kind, ids in self._by_kind.items()},
+            "vocabulary": len(self._vocabulary),
+        }
+
+metadata_index = MetadataSearchIndex()
+metadata_index.attach(metadata_cache)
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+from app.services.metadata_cache import MetadataCache, metadata_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+MAX_CONCURRENCY = 32
+
+class MetastoreCrawler:
+    """
+    Walks the whole metastore (or a subtree) and builds the
+    catalog -> schema -> table (-> columns) hierarchy in a single response.
+
+    - Concurrency is capped by one semaphore shared by every level, so a crawl
+      never fires hundreds of REST calls at once.
+    - Calls go through the MetadataCache, so a crawl warms the explorer cache
+      and back-to-back crawls reuse whatever is still fresh.
+    - Throttling (429/503) is handled in DatabricksService, honouring Retry-After.
+    - A failing node becomes an entry in "errors" instead of failing the whole crawl.
+    """
+
+    def __init__(self, cache: MetadataCache = None):
+        self.cache = cache or metadata_cache
+
+    async def crawl(self, catalog_name: str = None, schema_name: str = None, include_columns: bool = False,
+                    max_concurrency: int = DEFAULT_CONCURRENCY, force: bool = False) -> dict:
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, min(max_concurrency, MAX_CONCURRENCY)))
+        errors = []
+        counts = {"catalogs": 0, "schemas": 0, "tables": 0, "columns": 0, "requests": 0}
+
+        async def fetch(path: tuple, call):
+            async with semaphore:
+                counts["requests"] += 1
+                try:
+                    return await call()
+                except Exception as e:
+                    errors.append({"path": ".".join(path), "error": str(e)})
+                    return None
+
+        async def crawl_table(table: dict) -> dict:
+            node = {"name": table["name"], "table_type": table.get("table_type")}
+            if include_columns:
+                columns = table.get("columns")
+                if columns is None:
+                    full_name = table.get("full_name") or f"{table['catalog_name']}.{table['schema_name']}.{table['name']}"
+                    details = await fetch(tuple(full_name.split(".")),
+                                          lambda: self.cache.get_table(full_name, force=force))
+                    columns = (details or {}).get("columns") or []
+                node["columns"] = [{"name": c["name"], "type_text": c.get("type_text")} for c in columns]
+                counts["columns"] += len(columns)
+            return node
+
+        async def crawl_schema(catalog: str, schema: dict) -> dict:
+            node = {"name": schema["name"], "comment": schema.get("comment"), "tables": []}
+            tables = await fetch((catalog, schema["name"]),
+                                 lambda: self.cache.list_tables(catalog, schema["name"], force=force))
+            if tables:
+                node["tables"] = list(await asyncio.gather(*(crawl_table(t) for t in tables)))
+                counts["tables"] += len(tables)
+            return node
+
+        async def crawl_catalog(catalog: dict) -> dict:
+            node = {"name": catalog["name"], "comment": catalog.get("comment"), "schemas": []}
+            if schema_name:
+                schemas = [{"name": schema_name}]
+            else:
+                schemas = await fetch((catalog["name"],),
+                                      lambda: self.cache.list_schemas(catalog["name"], force=force)) or []
+            node["schemas"] = list(await asyncio.gather(*(crawl_schema(catalog["name"], s) for s in schemas)))
+            counts["schemas"] += len(schemas)
+            return node
+
+        if catalog_name:
+            catalogs = [{"name": catalog_name}]
+        else:
+            catalogs = await fetch((), lambda: self.cache.list_catalogs(force=force)) or []
+        tree = list(await asyncio.gather(*(crawl_catalog(c) for c in catalogs)))
+        counts["catalogs"] = len(catalogs)
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("Metastore crawl: %s in %sms (%s errors)", counts, elapsed_ms, len(errors))
+        return {
+            "catalogs": tree,
+            "stats": {**counts, "elapsed_ms": elapsed_ms},
+            "errors": errors,
+        }
+
+metastore_crawler = MetastoreCrawler()
@@ -0,0 +1,550 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MOCK_ENGINE_DIR = "cache/mock_engine"
+# Bump when a generator changes so databases built by older code are not reused
+DATA_VERSION = 1
+
+TYPE_NAMES = {"BIGINT": "LONG", "INT": "INT", "DOUBLE": "DOUBLE", "STRING": "STRING",
+              "DATE": "DATE", "TIMESTAMP": "TIMESTAMP", "BOOLEAN": "BOOLEAN"}
+
+def type_name(type_text: str) -> str:
+    return "DECIMAL" if type_text.startswith("DECIMAL") else TYPE_NAMES.get(type_text, "STRING")
+
+def _rand(salt: int, n, key: str = "i") -> str:
+    """SQL for a deterministic pseudo-random integer in [0, n) derived from the row key."""
+    return f"((((({key} * 2654435761 + {salt * 40503}) % 4294967296) * {2 * salt + 1}) % 4294967296 >> 7) % ({n}))"
+
+def _pick(values: list, index: str) -> str:
+    """SQL picking values[index] out of a fixed-width string (much faster than CASE or a join)."""
+    width = max(len(v) for v in values)
+    padded = "".join(v.ljust(width) for v in values)
+    return f"rtrim(substr('{padded}', ({index}) * {width} + 1, {width}))"
+
+def _days(base: str, days: str) -> str:
+    return f"date('{base}', '+' || ({days}) || ' days')"
+
+class MockTable:
+    """
+    One synthetic table. select is a SELECT over seq(i) (i = 0..rows-1) producing
+    the columns in order; it is formatted with the row counts of every table, so
+    foreign keys stay within the referenced table. Small tables list their rows.
+    """
+
+    def __init__(self, catalog: str, schema: str, name: str, columns: list, size: str,
+                 select: str = None, values: list = None, comment: str = None,
+                 table_type: str = "MANAGED", primary_key: str = None):
+        self.catalog = catalog
+        self.schema = schema
+        self.name = name
+        # (name, type_text, comment)
+        self.columns = columns
+        self.size = size
+        self.select = select
+        self.values = values
+        self.comment = comment
+        self.table_type = table_type
+        self.primary_key = primary_key
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.catalog}.{self.schema}.{self.name}"
+
+    @property
+    def physical_name(self) -> str:
+        return f"{self.catalog}__{self.schema}__{self.name}"
+
+    def info(self, with_columns: bool = False) -> dict:
+        info = {"name": self.name, "catalog_name": self.catalog, "schema_name": self.schema,
+                "table_type": self.table_type, "full_name": self.full_name}
+        if with_columns:
+            info["comment"] = self.comment
+            info["columns"] = [{"name": c, "type_text": t, "type_name": type_name(t), "comment": d}
+                               for c, t, d in self.columns]
+        return info
+
+REGIONS = ["AFRICA", "AMERICA", "ASIA", "EUROPE", "MIDDLE EAST"]
+NATIONS = [("ALGERIA", 0), ("ARGENTINA", 1), ("BRAZIL", 1), ("CANADA", 1), ("EGYPT", 4), ("ETHIOPIA", 0),
+           ("FRANCE", 3), ("GERMANY", 3), ("INDIA", 2), ("INDONESIA", 2), ("IRAN", 4), ("IRAQ", 4), ("JAPAN", 2),
+           ("JORDAN", 4), ("KENYA", 0), ("MOROCCO", 0), ("MOZAMBIQUE", 0), ("PERU", 1), ("CHINA", 2),
+           ("ROMANIA", 3), ("SAUDI ARABIA", 4), ("VIETNAM", 2), ("RUSSIA", 3), ("UNITED KINGDOM", 3),
+           ("UNITED STATES", 1)]
+SEGMENTS = ["AUTOMOBILE", "BUILDING", "FURNITURE", "HOUSEHOLD", "MACHINERY"]
+PRIORITIES = ["1-URGENT", "2-HIGH", "3-MEDIUM", "4-NOT SPECIFIED", "5-LOW"]
+COLORS = ["almond", "azure", "blush", "chiffon", "coral", "forest", "ivory", "khaki", "lavender", "linen",
+          "maroon", "navy", "olive", "orchid", "peach", "plum", "rose", "salmon", "tan", "violet"]
+SHIP_MODES = ["AIR", "FOB", "MAIL", "RAIL", "REG AIR", "SHIP", "TRUCK"]
+INSTRUCTIONS = ["COLLECT COD", "DELIVER IN PERSON", "NONE", "TAKE BACK RETURN"]
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Elena", "Felipe", "Gabriela", "Hugo", "Isabel", "John",
+               "Jane", "Bob", "Lucas", "Maria", "Nina", "Oscar", "Paula", "Rafael", "Sofia", "Tiago"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Silva", "Santos", "Oliveira", "Souza", "Costa", "Pereira", "Almeida",
+              "Garcia", "Martins", "Rocha", "Lima", "Brown", "Miller", "Davis", "Wilson", "Moore", "Taylor"]
+CURRENCIES = ["USD", "USD", "USD", "EUR", "EUR", "GBP", "BRL", "JPY"]
+
+# The TPC-H "current date": orders before it are finished, later ones are open
+TPCH_CUTOFF = "1995-06-17"
+ORDER_DATE = _days("1992-01-01", _rand(40, 2406, "o"))
+
+TABLES = [
+    MockTable("samples", "nyctaxi", "trips", [
+        ("tpep_pickup_datetime", "TIMESTAMP", "Pickup time"),
+        ("tpep_dropoff_datetime", "TIMESTAMP", "Dropoff time"),
+        ("trip_distance", "DOUBLE", "Distance in miles"),
+        ("fare_amount", "DOUBLE", "Fare cost"),
+        ("pickup_zip", "INT", "Pickup ZIP code"),
+        ("dropoff_zip", "INT", "Dropoff ZIP code"),
+    ], "trips", comment="NYC Taxi Trip Data", select=f"""
+        SELECT datetime(t, 'unixepoch'), datetime(t + 120 + {_rand(2, 3000)}, 'unixepoch'), d,
+               round(2.5 + d * 2.5 + {_rand(4, 500)} / 100.0, 2), 10001 + {_rand(5, 300)}, 10001 + {_rand(6, 300)}
+        FROM (SELECT i, 1451606400 + i * 5184000 / {{trips}} + {_rand(1, 600)} AS t,
+                     round(0.1 + {_rand(3, 40)} * {_rand(7, 50)} / 100.0, 2) AS d FROM seq)
+    """),
+    MockTable("samples", "tpch", "region", [
+        ("r_regionkey", "BIGINT", None), ("r_name", "STRING", None), ("r_comment", "STRING", None),
+    ], "region", primary_key="r_regionkey",
+        values=[(i, name, f"{name.lower()} region") for i, name in enumerate(REGIONS)]),
+    MockTable("samples", "tpch", "nation", [
+        ("n_nationkey", "BIGINT", None), ("n_name", "STRING", None), ("n_regionkey", "BIGINT", None),
+        ("n_comment", "STRING", None),
+    ], "nation", primary_key="n_nationkey",
+        values=[(i, name, region, f"{name.lower()} nation") for i, (name, region) in enumerate(NATIONS)]),
+    MockTable("samples", "tpch", "supplier", [
+        ("s_suppkey", "BIGINT", None), ("s_name", "STRING", None), ("s_address", "STRING", None),
+        ("s_nationkey", "BIGINT", None), ("s_phone", "STRING", None), ("s_acctbal", "DECIMAL(18,2)", None),
+    ], "supplier", primary_key="s_suppkey", select=f"""
+        SELECT i + 1, printf('Supplier#%09d', i + 1), printf('%X', {_rand(301, 4294967)}), n,
+               printf('%02d-%03d-%03d-%04d', n + 10, 100 + {_rand(302, 900)}, 100 + {_rand(303, 900)}, {_rand(304, 10000)}),
+               round({_rand(305, 1099999)} / 100.0 - 999.99, 2)
+        FROM (SELECT i, {_rand(306, 25)} AS n FROM seq)
+    """),
+    MockTable("samples", "tpch", "customer", [
+        ("c_custkey", "BIGINT", None), ("c_name", "STRING", None), ("c_address", "STRING", None),
+        ("c_nationkey", "BIGINT", None), ("c_phone", "STRING", None), ("c_acctbal", "DECIMAL(18,2)", None),
+        ("c_mktsegment", "STRING", None),
+    ], "customer", primary_key="c_custkey", select=f"""
+        SELECT i + 1, printf('Customer#%09d', i + 1), printf('%X', {_rand(401, 4294967)}), n,
+               printf('%02d-%03d-%03d-%04d', n + 10, 100 + {_rand(402, 900)}, 100 + {_rand(403, 900)}, {_rand(404, 10000)}),
+               round({_rand(405, 1099999)} / 100.0 - 999.99, 2), {_pick(SEGMENTS, _rand(407, 5))}
+        FROM (SELECT i, {_rand(406, 25)} AS n FROM seq)
+    """),
+    MockTable("samples", "tpch", "part", [
+        ("p_partkey", "BIGINT", None), ("p_name", "STRING", None), ("p_mfgr", "STRING", None),
+        ("p_brand", "STRING", None), ("p_type", "STRING", None), ("p_size", "INT", None),
+        ("p_container", "STRING", None), ("p_retailprice", "DECIMAL(18,2)", None),
+    ], "part", primary_key="p_partkey", select=f"""
+        SELECT i + 1, {_pick(COLORS, _rand(501, 20))} || ' ' || {_pick(COLORS, _rand(502, 20))}, 'Manufacturer#' || m,
+               'Brand#' || m || (1 + {_rand(503, 5)}),
+               {_pick(["STANDARD", "SMALL", "MEDIUM", "LARGE", "ECONOMY", "PROMO"], _rand(504, 6))} || ' ' ||
+               {_pick(["ANODIZED", "BURNISHED", "PLATED", "POLISHED", "BRUSHED"], _rand(505, 5))} || ' ' ||
+               {_pick(["TIN", "NICKEL", "BRASS", "STEEL", "COPPER"], _rand(506, 5))},
+               1 + {_rand(507, 50)},
+               {_pick(["SM", "MED", "LG", "JUMBO", "WRAP"], _rand(508, 5))} || ' ' ||
+               {_pick(["CASE", "BOX", "BAG", "JAR", "PKG", "PACK", "CAN", "DRUM"], _rand(509, 8))},
+               (90000 + ((i + 1) / 10) % 20001 + 100 * ((i + 1) % 1000)) / 100.0
+        FROM (SELECT i, 1 + {_rand(510, 5)} AS m FROM seq)
+    """),
+    MockTable("samples", "tpch", "partsupp", [
+        ("ps_partkey", "BIGINT", None), ("ps_suppkey", "BIGINT", None), ("ps_availqty", "INT", None),
+        ("ps_supplycost", "DECIMAL(18,2)", None),
+    ], "partsupp", select=f"""
+        SELECT i / 4 + 1, (i / 4 + (i % 4) * ({{supplier}} / 4 + i / 4 / {{supplier}})) % {{supplier}} + 1,
+               1 + {_rand(601, 9999)}, round(1 + {_rand(602, 99900)} / 100.0, 2)
+        FROM seq
+    """),
+    MockTable("samples", "tpch", "orders", [
+        ("o_orderkey", "BIGINT", None), ("o_custkey", "BIGINT", None), ("o_orderstatus", "STRING", None),
+        ("o_totalprice", "DECIMAL(18,2)", None), ("o_orderdate", "DATE", None),
+        ("o_orderpriority", "STRING", None), ("o_clerk", "STRING", None), ("o_shippriority", "INT", None),
+    ], "orders", primary_key="o_orderkey", select=f"""
+        SELECT o + 1, 1 + {_rand(701, "{customer}", "o")}, CASE WHEN d < '{TPCH_CUTOFF}' THEN 'F' ELSE 'O' END,
+               round(850 + {_rand(702, 30000000, "o")} / 100.0, 2), d, {_pick(PRIORITIES, _rand(703, 5, "o"))},
+               printf('Clerk#%09d', 1 + {_rand(704, "{clerks}", "o")}), 0
+        FROM (SELECT o, {ORDER_DATE} AS d FROM (SELECT i AS o FROM seq))
+    """),
+    MockTable("samples", "tpch", "lineitem", [
+        ("l_orderkey", "BIGINT", None), ("l_partkey", "BIGINT", None), ("l_suppkey", "BIGINT", None),
+        ("l_linenumber", "INT", None), ("l_quantity", "DECIMAL(18,2)", None),
+        ("l_extendedprice", "DECIMAL(18,2)", None), ("l_discount", "DECIMAL(18,2)", None),
+        ("l_tax", "DECIMAL(18,2)", None), ("l_returnflag", "STRING", None), ("l_linestatus", "STRING", None),
+        ("l_shipdate", "DATE", None), ("l_commitdate", "DATE", None), ("l_receiptdate", "DATE", None),
+        ("l_shipinstruct", "STRING", None), ("l_shipmode", "STRING", None),
+    ], "lineitem_slots", select=f"""
+        SELECT o + 1, 1 + {_rand(801, "{part}")}, 1 + {_rand(802, "{supplier}")}, ln, q,
+               round(q * (9 + {_rand(803, 200000)} / 100.0), 2), {_rand(804, 11)} / 100.0, {_rand(805, 9)} / 100.0,
+               CASE WHEN r > '{TPCH_CUTOFF}' THEN 'N' ELSE {_pick(["R", "A"], _rand(806, 2))} END,
+               CASE WHEN s > '{TPCH_CUTOFF}' THEN 'O' ELSE 'F' END,
+               s, date(d, '+' || (30 + {_rand(807, 61)}) || ' days'), r,
+               {_pick(INSTRUCTIONS, _rand(808, 4))}, {_pick(SHIP_MODES, _rand(809, 7))}
+        FROM (SELECT i, o, ln, d, q, s, date(s, '+' || (1 + {_rand(810, 30)}) || ' days') AS r
+              FROM (SELECT i, o, ln, d, 1 + {_rand(811, 50)} AS q, date(d, '+' || (1 + {_rand(812, 121)}) || ' days') AS s
+                    FROM (SELECT i, o, ln, {ORDER_DATE} AS d
+                          FROM (SELECT i, i / 7 AS o, i % 7 + 1 AS ln FROM seq)
+                          -- 1 to 7 lines per order, 4 on average as in TPC-H
+                          WHERE ln <= 1 + {_rand(813, 7, "o")})))
+    """),
+    MockTable("main", "default", "users", [
+        ("id", "INT", "User ID"), ("name", "STRING", "Full name"), ("email", "STRING", "Email address"),
+        ("created_at", "TIMESTAMP", "Sign-up time"),
+    ], "users", comment="User registry", primary_key="id", select=f"""
+        SELECT i + 1, f || ' ' || l, lower(f) || '.' || lower(l) || (i + 1) || '@example.com',
+               datetime(1577836800 + (i * 7919 % 1461) * 86400 + {_rand(903, 86400)}, 'unixepoch')
+        FROM (SELECT i, {_pick(FIRST_NAMES, _rand(901, 20))} AS f, {_pick(LAST_NAMES, _rand(902, 20))} AS l FROM seq)
+    """),
+    MockTable("main", "default", "transactions", [
+        ("transaction_id", "STRING", "Transaction ID"), ("user_id", "INT", "Paying user"),
+        ("amount", "DOUBLE", "Amount in currency units"), ("currency", "STRING", "ISO currency code"),
+        ("created_at", "TIMESTAMP", "Transaction time"),
+    ], "transactions", comment="Payments", table_type="EXTERNAL", select=f"""
+        SELECT printf('tx_%08d', i + 1), 1 + {_rand(1001, "{users}")}, round(0.5 + {_rand(1002, 100)} * {_rand(1003, 10000)} / 100.0, 2),
+               {_pick(CURRENCIES, _rand(1004, 8))}, datetime(1640995200 + i * 63072000 / {{transactions}}, 'unixepoch')
+        FROM seq
+    """),
+]
+
+# Column name -> type_text, to type result columns that come straight from a table
+DECLARED_TYPES = {name: type_text for t in TABLES for name, type_text, _ in t.columns}
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, default))
+
+def table_sizes(trips: int = None, tpch_scale: float = None, users: int = None, transactions: int = None) -> dict:
+    """Row counts per table. TPC-H tables follow the benchmark ratios (scale 1 = 6M lineitems)."""
+    sf = tpch_scale if tpch_scale is not None else float(os.getenv("MOCK_TPCH_SCALE", 0.01))
+    orders = max(1, int(1500000 * sf))
+    part = max(1, int(200000 * sf))
+    sizes = {
+        "trips": trips or _env_int("MOCK_NYCTAXI_TRIPS_ROWS", 100000),
+        "region": len(REGIONS),
+        "nation": len(NATIONS),
+        "supplier": max(4, int(10000 * sf)),
+        "customer": max(1, int(150000 * sf)),
+        "part": part,
+        "partsupp": 4 * part,
+        "orders": orders,
+        "lineitem_slots": 7 * orders,
+        "clerks": max(1, int(1000 * sf)),
+        "users": users or _env_int("MOCK_MAIN_USERS_ROWS", 1000),
+        "transactions": transactions or _env_int("MOCK_MAIN_TRANSACTIONS_ROWS", 100000),
+    }
+    return sizes
+
+# catalog.schema.table (optionally `quoted`), or schema.table for the mock schemas
+_NAME = re.compile(r"(?<![\w.`])(?:`?(\w+)`?\.)?`?(\w+)`?\.`?(\w+)`?(?![\w`])")
+
+# Databricks SQL syntax SQLite doesn't parse. SQLite's LIKE is already case-insensitive.
+_SYNTAX = [
+    (re.compile(r"\bILIKE\b", re.IGNORECASE), "LIKE"),
+    (re.compile(r"\bAS\s+STRING\s*\)", re.IGNORECASE), "AS TEXT)"),
+]
+
+# Metadata commands answered from the table definitions instead of SQLite
+_SHOW_CATALOGS = re.compile(r"^\s*SHOW\s+CATALOGS\s*;?\s*$", re.IGNORECASE)
+_SHOW_SCHEMAS = re.compile(r"^\s*SHOW\s+(?:SCHEMAS|DATABASES)(?:\s+(?:IN|FROM)\s+([\w`]+))?\s*;?\s*$", re.IGNORECASE)
+_SHOW_TABLES = re.compile(r"^\s*SHOW\s+TABLES(?:\s+(?:IN|FROM)\s+([\w`.]+))?\s*;?\s*$", re.IGNORECASE)
+_DESCRIBE = re.compile(r"^\s*DESC(?:RIBE)?(?:\s+TABLE)?(?:\s+EXTENDED)?\s+([\w`.]+)\s*;?\s*$", re.IGNORECASE)
+_METADATA_COMMAND = re.compile(r"^\s*(?:SHOW|DESC(?:RIBE)?)\b", re.IGNORECASE)
+# Current catalog and schema of a mock session (what USE would have set)
+DEFAULT_CATALOG, DEFAULT_SCHEMA = "main", "default"
+
+def _year(value):
+    return int(value[:4]) if value else None
+
+def _month(value):
+    return int(value[5:7]) if value else None
+
+def _day(value):
+    return int(value[8:10]) if value else None
+
+def _hour(value):
+    if value is None:
+        return None
+    return int(value[11:13]) if len(value) >= 13 else 0
+
+def _quarter(value):
+    return (int(value[5:7]) - 1) // 3 + 1 if value else None
+
+def _weekday(value) -> int:
+    return datetime.date.fromisoformat(value[:10]).weekday()
+
+def _date_trunc(unit, value):
+    if value is None:
+        return None
+    value = value if len(value) > 10 else value[:10] + " 00:00:00"
+    unit = unit.upper()
+    if unit == "YEAR":
+        return value[:4] + "-01-01 00:00:00"
+    if unit == "QUARTER":
+        return f"{value[:4]}-{(_quarter(value) - 1) * 3 + 1:02d}-01 00:00:00"
+    if unit == "MONTH":
+        return value[:7] + "-01 00:00:00"
+    if unit == "WEEK":
+        monday = datetime.date.fromisoformat(value[:10]) - datetime.timedelta(days=_weekday(value))
+        return monday.isoformat() + " 00:00:00"
+    if unit == "DAY":
+        return value[:10] + " 00:00:00"
+    if unit == "HOUR":
+        return value[:13] + ":00:00"
+    return value
+
+# Databricks SQL functions missing from SQLite that dashboard queries commonly use
+FUNCTIONS = [
+    ("year", 1, _year), ("month", 1, _month), ("day", 1, _day), ("dayofmonth", 1, _day), ("hour", 1, _hour),
+    ("quarter", 1, _quarter), ("date_trunc", 2, _date_trunc),
+    ("to_date", 1, lambda value: value[:10] if value else None),
+    ("concat", -1, lambda *values: None if None in values else "".join(str(v) for v in values)),
+]
+
+def _parameter_value(parameter: dict):
+    """Statement Execution API parameters carry the value as a string plus its SQL type."""
+    value = parameter.get("value")
+    if value is None:
+        return None
+    type_name = (parameter.get("type") or "STRING").upper()
+    if type_name in ("BIGINT", "INT", "SMALLINT", "TINYINT"):
+        return int(value)
+    if type_name in ("DOUBLE", "FLOAT") or type_name.startswith("DECIMAL"):
+        return float(value)
+    if type_name == "BOOLEAN":
+        return int(str(value).lower() == "true")
+    return value
+
+class MockSqlEngine:
+    """
+    Embedded SQLite database holding deterministic synthetic versions of the mock
+    catalogs (samples.nyctaxi, samples.tpch, main.default), so offline queries
+    really filter, join and aggregate.
+
+    Data is generated inside SQLite (recursive CTEs, no Python per row) the first
+    time a query runs, into a file named after the table sizes under
+    MOCK_ENGINE_DIR; later runs with the same sizes reuse it. Sizes come from
+    MOCK_NYCTAXI_TRIPS_ROWS, MOCK_TPCH_SCALE, MOCK_MAIN_USERS_ROWS and
+    MOCK_MAIN_TRANSACTIONS_ROWS and can go up to millions of rows.
+
+    Queries are read-only. Three-part names (and schema.table for the mock
+    schemas) are mapped to the local tables; each thread gets its own connection.
+    SHOW CATALOGS / SCHEMAS / TABLES and DESCRIBE are answered from TABLES.
+    """
+
+    def __init__(self, directory: str = None, sizes: dict = None, rows_per_chunk: int = None,
+                 max_result_rows: int = None):
+        self.directory = directory or os.getenv("MOCK_ENGINE_DIR", MOCK_ENGINE_DIR)
+        self.sizes = sizes or table_sizes()
+        self.rows_per_chunk = rows_per_chunk or _env_int("MOCK_ENGINE_ROWS_PER_CHUNK", 10000)
+        # Like the real API, larger results are cut and flagged as truncated
+        self.max_result_rows = max_result_rows or _env_int("MOCK_ENGINE_MAX_RESULT_ROWS", 1000000)
+        self._tables = {(t.catalog, t.schema, t.name): t for t in TABLES}
+        self._schemas = {(t.catalog, t.schema) for t in TABLES}
+        self._path = None
+        self._build_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def path(self) -> str:
+        fingerprint = hashlib.sha256(json.dumps([DATA_VERSION, self.sizes], sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, f"mock-{fingerprint[:16]}.sqlite")
+
+    def table(self, catalog: str, schema: str, name: str):
+        return self._tables.get((catalog, schema, name))
+
+    def tables(self, catalog: str, schema: str) -> list:
+        return [t for t in TABLES if t.catalog == catalog and t.schema == schema]
+
+    def _ensure_database(self) -> str:
+        if self._path is not None:
+            return self._path
+        with self._build_lock:
+            if self._path is None:
+                path = self.path
+                if not os.path.exists(path):
+                    self._build(path)
+                self._path = path
+        return self._path
+
+    def _build(self, path: str):
+        os.makedirs(self.directory, exist_ok=True)
+        # Built next to the target and renamed, so concurrent workers never read a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        started = time.perf_counter()
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            for table in TABLES:
+                columns = ", ".join(
+                    f"{name} INTEGER PRIMARY KEY" if name == table.primary_key else f"{name} {self._storage(type_text)}"
+                    for name, type_text, _ in table.columns)
+                conn.execute(f"CREATE TABLE {table.physical_name} ({columns})")
+                if table.values is not None:
+                    marks = ", ".join("?" * len(table.columns))
+                    conn.executemany(f"INSERT INTO {table.physical_name} VALUES ({marks})", table.values)
+                else:
+                    rows = self.sizes[table.size]
+                    conn.execute(f"INSERT INTO {table.physical_name} WITH RECURSIVE "
+                                 f"seq(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM seq WHERE i + 1 < {rows}) "
+                                 + table.select.format(**self.sizes))
+            conn.execute("CREATE INDEX samples__tpch__lineitem_orderkey ON samples__tpch__lineitem (l_orderkey)")
+            conn.execute("CREATE INDEX main__default__transactions_user ON main__default__transactions (user_id)")
+            conn.execute("ANALYZE")
+            conn.commit()
+        finally:
+            conn.close()
+        os.replace(tmp, path)
+        logger.info("Built mock SQL database %s in %.1fs", path, time.perf_counter() - started)
+
+    @staticmethod
+    def _storage(type_text: str) -> str:
+        if type_text in ("BIGINT", "INT"):
+            return "INTEGER"
+        if type_text == "DOUBLE" or type_text.startswith("DECIMAL"):
+            return "REAL"
+        return "TEXT"
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self._ensure_database()}?mode=ro", uri=True)
+            for name, args, function in FUNCTIONS:
+                conn.create_function(name, args, function, deterministic=True)
+            self._local.conn = conn
+        return conn
+
+    def translate(self, query: str) -> str:
+        """
+        Maps catalog.schema.table (and schema.table of the mock schemas) to the local
+        tables, and rewrites ILIKE and CAST(... AS STRING) for SQLite.
+        """
+        schemas = {schema: catalog for catalog, schema in self._schemas}
+
+        def replace(match):
+            catalog, schema, name = (g.lower() if g else g for g in match.groups())
+            catalog = catalog or schemas.get(schema)
+            table = self._tables.get((catalog, schema, name))
+            if table is not None:
+                return table.physical_name
+            # Unknown three-part names fail as a missing table rather than a syntax error
+            return f'"{catalog}.{schema}.{name}"' if match.group(1) else match.group(0)
+
+        for pattern, replacement in _SYNTAX:
+            query = pattern.sub(replacement, query)
+        return _NAME.sub(replace, query)
+
+    def execute(self, query: str, parameters: list = None):
+        """
+        Runs one statement, binding the named :parameters of a Statement Execution
+        request. Returns (columns, rows, truncated); columns are manifest column
+        dicts and rows are tuples of native values (see format_rows).
+        Raises sqlite3.Error for invalid SQL, unknown tables and writes.
+        """
+        metadata = self._metadata_command(query)
+        if metadata is not None:
+            spec, rows = metadata
+            columns = [{"name": name, "type_text": t, "type_name": type_name(t), "position": i}
+                       for i, (name, t) in enumerate(spec)]
+            return columns, rows, False
+        bindings = {p["name"]: _parameter_value(p) for p in parameters or []}
+        cursor = self._connection().execute(self.translate(query), bindings)
+        try:
+            if cursor.description is None:
+                return None, [], False
+            rows = cursor.fetchmany(self.max_result_rows + 1)
+        finally:
+            cursor.close()
+        truncated = len(rows) > self.max_result_rows
+        if truncated:
+            rows = rows[:self.max_result_rows]
+        names = [d[0] for d in cursor.description]
+        columns = [{"name": name, "type_text": t, "type_name": type_name(t), "position": i}
+                   for i, (name, t) in enumerate(zip(names, self._result_types(names, rows)))]
+        return columns, rows, truncated
+
+    def _resolve(self, name: str, parts: int) -> tuple:
+        """Fills a partial name with the mock session's catalog and schema: "t" -> (catalog, schema, t)."""
+        given = tuple(part.lower() for part in name.replace("`", "").split("."))
+        if len(given) > parts:
+            raise sqlite3.OperationalError(f"no such table: {name}")
+        missing = parts - len(given)
+        if missing == 1:
+            # Only the catalog is missing: the mock schemas have unique names, as in translate()
+            schemas = {schema: catalog for catalog, schema in self._schemas}
+            return (schemas.get(given[0], DEFAULT_CATALOG),) + given
+        return (DEFAULT_CATALOG, DEFAULT_SCHEMA)[:missing] + given
+
+    def _metadata_command(self, query: str):
+        """
+        SHOW CATALOGS / SCHEMAS / TABLES and DESCRIBE TABLE, answered from the table
+        definitions with the columns Databricks returns. Returns (column spec, rows),
+        or None for other statements. Other SHOW and DESCRIBE forms are not supported.
+        """
+        if _SHOW_CATALOGS.match(query):
+            return [("catalog", "STRING")], [(c,) for c in sorted({c for c, _ in self._schemas})]
+        match = _SHOW_SCHEMAS.match(query)
+        if match:
+            catalog = self._resolve(match.group(1) or DEFAULT_CATALOG, 1)[0]
+            return [("databaseName", "STRING")], [(s,) for c, s in sorted(self._schemas) if c == catalog]
+        match = _SHOW_TABLES.match(query)
+        if match:
+            catalog, schema = self._resolve(match.group(1) or DEFAULT_SCHEMA, 2)
+            spec = [("database", "STRING"), ("tableName", "STRING"), ("isTemporary", "BOOLEAN")]
+            return spec, [(schema, t.name, False) for t in self.tables(catalog, schema)]
+        match = _DESCRIBE.match(query)
+        if match:
+            table = self.table(*self._resolve(match.group(1), 3))
+            if table is None:
+                raise sqlite3.OperationalError(f"no such table: {match.group(1)}")
+            spec = [("col_name", "STRING"), ("data_type", "STRING"), ("comment", "STRING")]
+            return spec, [(c, t.lower(), d) for c, t, d in table.columns]
+        if _METADATA_COMMAND.match(query):
+            raise sqlite3.NotSupportedError(f"{query.split()[0].upper()} in this form is not supported in mock mode")
+        return None
+
+    def _result_types(self, names: list, rows: list) -> list:
+        types = []
+        for i, name in enumerate(names):
+            sample = next((row[i] for row in rows if row[i] is not None), None)
+            inferred = ("BIGINT" if isinstance(sample, int) else "DOUBLE" if isinstance(sample, float)
+                        else "STRING" if sample is not None else None)
+            known = DECLARED_TYPES.get(name)
+            # Aliases reusing a column name keep its type only when the values agree with it
+            if known and (inferred is None or self._storage(known) == self._storage(inferred)):
+                types.append(known)
+            else:
+                types.append(inferred or "STRING")
+        return types
+
+    @staticmethod
+    def format_rows(columns: list, rows: list) -> list:
+        """JSON_ARRAY rows: every value as a string (DECIMAL with its scale), nulls kept."""
+        formatters = []
+        for column in columns:
+            scale = re.match(r"DECIMAL\(\d+,\s*(\d+)\)", column["type_text"])
+            if scale:
+                formatters.append(lambda v, s=int(scale.group(1)): f"{v:.{s}f}")
+            elif column["type_text"] == "BOOLEAN":
+                formatters.append(lambda v: "true" if v else "false")
+            else:
+                formatters.append(str)
+        return [[None if v is None else f(v) for f, v in zip(formatters, row)] for row in rows]
+
+    @staticmethod
+    def error(e: sqlite3.Error) -> dict:
+        """Statement status error in the shape the real API uses."""
+        message = str(e)
+        if message.startswith("no such table"):
+            return {"error_code": "BAD_REQUEST",
+                    "message": f"[TABLE_OR_VIEW_NOT_FOUND] The table or view {message.split(':', 1)[-1].strip()} cannot be found."}
+        if isinstance(e, sqlite3.NotSupportedError):
+            return {"error_code": "BAD_REQUEST", "message": f"[NOT_SUPPORTED] {message}"}
+        if "readonly" in message:
+            return {"error_code": "BAD_REQUEST", "message": f"[NOT_SUPPORTED] The mock SQL engine is read-only: {message}"}
+        return {"error_code": "BAD_REQUEST", "message": f"[PARSE_SYNTAX_ERROR] {message}"}
+
+mock_engine = MockSqlEngine()
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from app.core import tracing
+
+# Only statements that cannot change data are cached
+_CACHEABLE_PREFIXES = ("SELECT", "WITH", "SHOW", "DESCRIBE", "EXPLAIN")
+
+def normalize_sql(query: str) -> str:
+    """Collapses whitespace and trailing semicolons so formatting differences share an entry."""
+    return re.sub(r"\s+", " ", query.strip()).rstrip(";").strip()
+
+def is_cacheable(query: str) -> bool:
+    return normalize_sql(query).upper().startswith(_CACHEABLE_PREFIXES)
+
+def estimate_size(result) -> int:
+    """
+    Approximate in-memory size of a cached result.
+    Arrow tables report their buffer size; JSON results are sampled rather than fully serialized.
+    """
+    if hasattr(result, "nbytes"):
+        return int(result.nbytes)
+    if isinstance(result, tuple):
+        return sum(estimate_size(part) for part in result)
+    if not isinstance(result, dict):
+        return len(json.dumps(result, default=str))
+    rows = (result.get("result") or {}).get("data_array") or []
+    sample = rows[:100]
+    row_bytes = len(json.dumps(sample, default=str)) / len(sample) if sample else 0
+    overhead = len(json.dumps(result.get("manifest") or {}, default=str))
+    return int(row_bytes * len(rows)) + overhead
+
+class _Entry:
+    __slots__ = ("value", "size", "expires_at")
+
+    def __init__(self, value, size: int, expires_at: float):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+class QueryResultCache:
+    """
+    In-process result cache for SQL statements.
+
+    - TTL per entry, LRU eviction once max_bytes or max_entries is exceeded.
+    - Single-flight: concurrent identical queries await the same upstream statement.
+    - Hit, miss, coalesced and eviction counters for observability.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, ttl_seconds: float = None, max_bytes: int = None, max_entries: int = None,
+                 enabled: bool = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("QUERY_CACHE_TTL_SECONDS", 300))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("QUERY_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv("QUERY_CACHE_MAX_ENTRIES", 1000))
+        if enabled is None:
+            enabled = os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._waiters = {}
+        self._bytes = 0
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "oversized": 0,
+        }
+
+    def make_key(self, query: str, warehouse_id: str = None, catalog: str = None, schema: str = None, **options):
+        extras = tuple(sorted((k, v) for k, v in options.items() if v is not None))
+        return (normalize_sql(query), warehouse_id, catalog, schema, extras)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self._counters["expirations"] += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            # Never let a single result flush the whole cache
+            self._counters["oversized"] += 1
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(value, size, time.monotonic() + self.ttl_seconds)
+        self._bytes += size
+        while self._entries and (self._bytes > self.max_bytes or len(self._entries) > self.max_entries):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    async def get_or_execute(self, key, loader):
+        """
+        Returns the cached value for key, or runs loader() once for all concurrent callers.
+        The load runs as its own task, so a caller that goes away does not fail the others;
+        it is cancelled only once every caller waiting for it has gone away.
+        """
+        if not self.enabled:
+            return await loader()
+
+        entry = self.get(key)
+        if entry is not None:
+            self._counters["hits"] += 1
+            tracing.mark("query-cache", "hit")
+            return entry.value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+            tracing.mark("query-cache", "coalesced")
+        else:
+            self._counters["misses"] += 1
+            tracing.mark("query-cache", "miss")
+            task = asyncio.ensure_future(self._load(key, loader))
+            # Mark failures as retrieved even if every caller has gone away
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    async def _load(self, key, loader):
+        try:
+            value = await loader()
+            self.put(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self._counters["hits"] + self._counters["misses"] + self._counters["coalesced"]
+        return {
+            **self._counters,
+            "hit_ratio": round((self._counters["hits"] + self._counters["coalesced"]) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "enabled": self.enabled,
+        }
+
+query_cache = QueryResultCache()
@@ -0,0 +1,47 @@
+from app.services import arrow_results
+
+# Response layouts supported by /api/query
+ROWS = "rows"
+COLUMNAR = "columnar"
+ARROW = "arrow"
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+def rows_payload(column_names: list, data_array: list) -> list:
+    """Row dicts (the historical /api/query layout)."""
+    return [dict(zip(column_names, row)) for row in data_array]
+
+def columnar_payload(schema_columns: list, data_array: list) -> dict:
+    """
+    {columns, types, data} where data holds one list per column.
+    Column names are sent once instead of once per row.
+    """
+    names = [col["name"] for col in schema_columns]
+    types = [col.get("type_name", "STRING") for col in schema_columns]
+    if data_array:
+        data = [list(values) for values in zip(*data_array)]
+    else:
+        data = [[] for _ in names]
+    return {"columns": names, "types": types, "data": data}
+
+def table_columnar_payload(table, schema_columns: list = None) -> dict:
+    """
+    Columnar layout straight from a pyarrow.Table, without going through rows.
+    Types are Databricks type names, as in columnar_payload: taken from the
+    manifest schema when given, otherwise mapped from the Arrow field types.
+    """
+    types = {col["name"]: col.get("type_name", "STRING") for col in schema_columns or []}
+    return {
+        "columns": table.column_names,
+        "types": [types.get(field.name) or arrow_results.type_name(field.type) for field in table.schema],
+        "data": [column.to_pylist() for column in table.columns],
+    }
+
+def arrow_ipc_bytes(table) -> bytes:
+    """Serializes a pyarrow.Table as an Arrow IPC stream."""
+    arrow_results.require_pyarrow()
+    pa = arrow_results.pa
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from app.services import arrow_results
+
+RESULT_STORE_DIR = "cache/results"
+INDEX_FILE = "index.json"
+_META_KEY = b"databricks_meta"
+
+def fingerprint(key) -> str:
+    """Stable file name for a query cache key (see QueryResultCache.make_key)."""
+    return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:32]
+
+def strings_table(columns: list, data_array: list):
+    """
+    Stores JSON_ARRAY rows as string columns so they round-trip exactly
+    (the Statement Execution API returns every JSON_ARRAY value as a string).
+    """
+    pa = arrow_results.pa
+    names = [col["name"] for col in columns]
+    arrays = [
+        pa.array([None if row[i] is None else str(row[i]) for row in data_array], pa.string())
+        for i in range(len(names))
+    ]
+    return pa.table(arrays, names=names)
+
+def table_to_data_array(table) -> list:
+    return [list(row) for row in zip(*(column.to_pylist() for column in table.columns))]
+
+class ResultStore:
+    """
+    Persistent on-disk store for query results, so a restart or deploy does not start cold.
+
+    Each result is an uncompressed Arrow IPC file named by its query fingerprint;
+    index.json keeps size, creation and last access times. Reads go through
+    pyarrow.memory_map, so tables are served from the page cache without copying
+    them into the heap. Oversized stores are trimmed least-recently-used first and
+    entries older than max_age_seconds are dropped.
+
+    Methods are blocking; async callers should run them with asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, max_age_seconds: float = None,
+                 enabled: bool = None):
+        self.directory = directory or os.getenv("RESULT_STORE_DIR", RESULT_STORE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv("RESULT_STORE_MAX_BYTES", 2 * 1024 ** 3))
+        # By default a stored result lives as long as its in-memory copy would (QUERY_CACHE_TTL_SECONDS)
+        self.max_age_seconds = max_age_seconds if max_age_seconds is not None else float(
+            os.getenv("RESULT_STORE_MAX_AGE_SECONDS", os.getenv("QUERY_CACHE_TTL_SECONDS", 300)))
+        if enabled is None:
+            enabled = os.getenv("RESULT_STORE_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.enabled = enabled and arrow_results.pa is not None
+        self._lock = threading.Lock()
+        self._index = None
+        self._counters = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expirations": 0}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self._path(INDEX_FILE), "r") as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(INDEX_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self._path(INDEX_FILE))
+
+    def _drop(self, fp: str):
+        entry = self._index.pop(fp, None)
+        if entry is not None:
+            try:
+                os.remove(self._path(entry["file"]))
+            except OSError:
+                pass
+
+    def get(self, key):
+        """Returns (meta, pyarrow.Table) backed by a memory map, or None."""
+        if not self.enabled:
+            return None
+        fp = fingerprint(key)
+        pa = arrow_results.pa
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(fp)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            if time.time() - entry["created_at"] > self.max_age_seconds:
+                self._drop(fp)
+                self._save_index()
+                self._counters["expirations"] += 1
+                self._counters["misses"] += 1
+                return None
+            try:
+                source = pa.memory_map(self._path(entry["file"]), "r")
+                table = pa.ipc.open_file(source).read_all()
+            except (OSError, pa.ArrowInvalid):
+                # File vanished or is corrupt: forget it
+                self._drop(fp)
+                self._save_index()
+                self._counters["misses"] += 1
+                return None
+            entry["last_access"] = time.time()
+            self._counters["hits"] += 1
+        meta = json.loads((table.schema.metadata or {}).get(_META_KEY, b"{}"))
+        return meta, table.replace_schema_metadata(None)
+
+    def put(self, key, meta: dict, table, query: str = None):
+        """Persists a result table with its statement metadata (manifest, status, ...)."""
+        if not self.enabled:
+            return
+        fp = fingerprint(key)
+        pa = arrow_results.pa
+        name = f"{fp}.arrow"
+        table = table.replace_schema_metadata({_META_KEY: json.dumps(meta, default=str)})
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(name + ".tmp")
+        # Uncompressed IPC file format so reads can be memory-mapped without decoding
+        with pa.OSFile(tmp_path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return
+        with self._lock:
+            os.replace(tmp_path, self._path(name))
+            index = self._load_index()
+            now = time.time()
+            index[fp] = {
+                "file": name,
+                "size": size,
+                "rows": table.num_rows,
+                "created_at": now,
+                "last_access": now,
+                "query": (query or "")[:500],
+            }
+            self._counters["writes"] += 1
+            self._evict()
+            self._save_index()
+
+    def _evict(self):
+        total = sum(entry["size"] for entry in self._index.values())
+        for fp, entry in sorted(self._index.items(), key=lambda item: item[1]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            self._drop(fp)
+            self._counters["evictions"] += 1
+
+    def invalidate(self, fp: str = None, older_than_seconds: float = None) -> int:
+        """Drops one fingerprint, every entry older than older_than_seconds, or everything."""
+        if not self.enabled:
+            # Nothing is read from a disabled store, so leave its directory alone
+            return 0
+        with self._lock:
+            index = self._load_index()
+            now = time.time()
+            if fp is not None:
+                targets = [fp] if fp in index else []
+            elif older_than_seconds is not None:
+                targets = [k for k, e in index.items() if now - e["created_at"] > older_than_seconds]
+            else:
+                targets = list(index.keys())
+            for target in targets:
+                self._drop(target)
+            self._save_index()
+            return len(targets)
+
+    def stats(self, recent: int = 20) -> dict:
+        """Usage and counters, plus the `recent` most recently used entries with their fingerprints."""
+        with self._lock:
+            index = self._load_index()
+            latest = sorted(index.items(), key=lambda item: item[1]["last_access"], reverse=True)[:recent]
+            return {
+                **self._counters,
+                "entries": len(index),
+                "bytes": sum(entry["size"] for entry in index.values()),
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "directory": self.directory,
+                "enabled": self.enabled,
+                "recent": [
+                    {"fingerprint": fp, **{k: entry[k] for k in ("rows", "size", "last_access", "query")}}
+                    for fp, entry in latest
+                ],
+            }
+
+result_store = ResultStore()
@@ -0,0 +1,246 @@
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict, deque
+import httpx
+from app.services.http_pool import WorkspaceClientPool, serving_pool
+from app.services.sse_relay import SSEParser, StreamLatency, StreamRelay
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+def sse_event(payload: dict) -> bytes:
+    return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+class EndpointBusy(Exception):
+    """Raised when a serving endpoint's wait queue is full or the wait timed out."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class FairLimiter:
+    """
+    Concurrency limit with a wait queue that is served round-robin across users,
+    so one user firing many agent turns cannot starve everyone else.
+    """
+
+    def __init__(self, limit: int, max_waiting: int, wait_timeout: float):
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.active = 0
+        self._queues = OrderedDict()  # user -> deque of waiter futures
+        self._waiting = 0
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    async def acquire(self, user: str):
+        if self.active < self.limit and not self._waiting:
+            self.active += 1
+            self._counters["admitted"] += 1
+            return
+        if self._waiting >= self.max_waiting:
+            self._counters["rejected"] += 1
+            raise EndpointBusy("Too many queued requests for this endpoint", retry_after=5)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append(waiter)
+        self._waiting += 1
+        self._counters["queued"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.wait_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                waiter.cancel()
+                self._discard(user, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self._counters["timed_out"] += 1
+                raise EndpointBusy("Timed out waiting for a free slot on this endpoint", retry_after=10)
+            raise
+        self._counters["admitted"] += 1
+
+    def _discard(self, user: str, waiter):
+        queue = self._queues.get(user)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self._waiting -= 1
+            if not queue:
+                del self._queues[user]
+
+    def release(self):
+        self.active -= 1
+        while self.active < self.limit and self._queues:
+            # Oldest user first, then they go to the back of the line
+            user, queue = next(iter(self._queues.items()))
+            waiter = queue.popleft()
+            self._waiting -= 1
+            if queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            if not waiter.done():
+                self.active += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "active": self.active,
+            "waiting": self._waiting,
+            "waiting_users": len(self._queues),
+            "limit": self.limit,
+        }
+
+class ServingProxy:
+    """
+    Relays chat completion streams from model serving endpoints.
+
+    - One shared keep-alive client pool (serving_pool) instead of a client per turn.
+    - Per-endpoint FairLimiter: at most max_streams concurrent upstream streams,
+      a bounded wait queue beyond that, served round-robin across users.
+    - Backpressure: upstream events go through a queue of at most max_buffered_chunks.
+      The upstream read pauses while the browser is slow; if it stays stalled for
+      stall_timeout the upstream stream is closed and its slot freed.
+    - Batching: content deltas are coalesced by StreamRelay over batch_window
+      seconds or batch_max_chars characters (SERVING_BATCH_WINDOW_MS=0 disables),
+      and TTFT, duration and tokens/s are recorded per endpoint.
+    """
+
+    def __init__(self, pool: WorkspaceClientPool = None, max_streams: int = None, max_waiting: int = None,
+                 wait_timeout: float = None, stall_timeout: float = None, max_buffered_chunks: int = None,
+                 batch_window: float = None, batch_max_chars: int = None):
+        self.pool = pool or serving_pool
+        self.max_streams = max_streams or int(os.getenv("SERVING_MAX_CONCURRENT_STREAMS", 8))
+        self.max_waiting = max_waiting or int(os.getenv("SERVING_MAX_QUEUED", 64))
+        self.wait_timeout = wait_timeout or float(os.getenv("SERVING_QUEUE_TIMEOUT_SECONDS", 30))
+        self.stall_timeout = stall_timeout or float(os.getenv("SERVING_STALL_TIMEOUT_SECONDS", 30))
+        self.max_buffered_chunks = max_buffered_chunks or int(os.getenv("SERVING_MAX_BUFFERED_CHUNKS", 16))
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("SERVING_BATCH_WINDOW_MS", 50)) / 1000
+        self.batch_max_chars = batch_max_chars or int(os.getenv("SERVING_BATCH_MAX_CHARS", 512))
+        self._limiters = {}
+        self._latency = {}
+        self._counters = {"streams": 0, "upstream_errors": 0, "stalled": 0, "disconnected": 0}
+
+    def limiter(self, endpoint: str) -> FairLimiter:
+        limiter = self._limiters.get(endpoint)
+        if limiter is None:
+            limiter = FairLimiter(self.max_streams, self.max_waiting, self.wait_timeout)
+            self._limiters[endpoint] = limiter
+        return limiter
+
+    async def acquire(self, endpoint: str, user: str):
+        """Waits for a slot on the endpoint; returns an idempotent release callback."""
+        limiter = self.limiter(endpoint)
+        await limiter.acquire(user)
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                limiter.release()
+        return release
+
+    async def stream(self, url: str, headers, payload: dict, release, on_complete=None):
+        """
+        Yields the upstream SSE stream, deltas coalesced, closed by a timing frame.
+        release() is called as soon as the upstream is done. on_complete(chunks),
+        if given, receives the raw upstream chunks once the whole stream was relayed
+        without an error event.
+        """
+        self._counters["streams"] += 1
+        relay = StreamRelay(self.batch_window, self.batch_max_chars)
+        # Room for at least one chunk plus the final error/end markers
+        queue = asyncio.Queue(maxsize=max(2, self.max_buffered_chunks))
+        completed = None  # every upstream chunk, once the upstream finished with a 200
+
+        async def pump():
+            nonlocal completed
+            try:
+                client = self.pool.get_client(url.split("/serving-endpoints/")[0])
+                async with client.stream("POST", url, headers=headers, json=payload) as response:
+                    if response.status_code != 200:
+                        error_msg = await response.aread()
+                        self._counters["upstream_errors"] += 1
+                        await queue.put(sse_event({"error": f"Error {response.status_code}: {error_msg.decode()}"}))
+                    else:
+                        parser = SSEParser()
+                        received = [] if on_complete is not None else None
+                        async for chunk in response.aiter_bytes():
+                            if received is not None:
+                                received.append(chunk)
+                            for event in parser.feed(chunk):
+                                # Blocks while the browser is behind; gives up if it never catches up
+                                await asyncio.wait_for(queue.put(event), self.stall_timeout)
+                        for event in parser.flush():
+                            await asyncio.wait_for(queue.put(event), self.stall_timeout)
+                        completed = received
+                await queue.put(_END)
+            except asyncio.TimeoutError:
+                self._counters["stalled"] += 1
+                logger.warning("Chat stream to %s stalled on a slow client; closing upstream", url)
+                _put_final(queue, sse_event({"error": "Stream stalled: client is not reading."}))
+            except httpx.ReadTimeout:
+                self._counters["upstream_errors"] += 1
+                _put_final(queue, sse_event({"error": "Timeout connecting to model."}))
+            except Exception as e:
+                self._counters["upstream_errors"] += 1
+                _put_final(queue, sse_event({"error": str(e)}))
+            finally:
+                release()
+
+        task = asyncio.ensure_future(pump())
+        try:
+            while True:
+                timeout = relay.due()
+                try:
+                    item = await (queue.get() if timeout is None else asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    # The window closed while upstream was quiet: send what is pending
+                    item = None
+                if item is _END:
+                    frames = relay.finish()
+                    if not relay.failed:
+                        self._latency.setdefault(url, StreamLatency()).record(relay.timing())
+                        if completed is not None:
+                            # Decided on the parsed events, so content that merely mentions "error" still counts
+                            on_complete(completed)
+                else:
+                    frames = relay.flush() if item is None else relay.push(item)
+                if frames:
+                    # One write per batch instead of one per event
+                    yield b"".join(frames)
+                if item is _END:
+                    break
+        except asyncio.CancelledError:
+            self._counters["disconnected"] += 1
+            raise
+        finally:
+            task.cancel()
+            release()
+
+    def stats(self) -> dict:
+        return {
+            **self._counters,
+            "max_concurrent_streams": self.max_streams,
+            "max_buffered_chunks": self.max_buffered_chunks,
+            "batch_window_ms": self.batch_window * 1000,
+            "batch_max_chars": self.batch_max_chars,
+            "endpoints": {endpoint: limiter.stats() for endpoint, limiter in self._limiters.items()},
+            "latency": {endpoint: latency.stats() for endpoint, latency in self._latency.items()},
+            "pool": self.pool.stats(),
+        }
+
+def _put_final(queue: asyncio.Queue, item):
+    # The consumer may be stalled with a full queue: drop what it has not read yet
+    while queue.qsize() > queue.maxsize - 2 and not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(item)
+    queue.put_nowait(_END)
+
+serving_proxy = ServingProxy()
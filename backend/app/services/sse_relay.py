@@ -0,0 +1,216 @@
+import json
+import time
+from collections import deque
+
+DONE_EVENT = b"data: [DONE]\n\n"
+
+class SSEParser:
+    """Incremental SSE framing: feed() raw upstream bytes, get back complete events."""
+
+    def __init__(self, max_event_bytes: int = 1024 * 1024):
+        self.max_event_bytes = max_event_bytes
+        self._buffer = b""
+
+    def feed(self, chunk: bytes) -> list:
+        # A "\r" split from its "\n" stays in the buffer until the next chunk joins it
+        self._buffer = (self._buffer + chunk).replace(b"\r\n", b"\n")
+        *events, self._buffer = self._buffer.split(b"\n\n")
+        if len(self._buffer) > self.max_event_bytes:
+            # Not SSE after all (or a runaway event): pass it through rather than buffer forever
+            events.append(self._buffer)
+            self._buffer = b""
+            return [event + b"\n\n" for event in events[:-1] if event.strip()] + [events[-1]]
+        return [event + b"\n\n" for event in events if event.strip()]
+
+    def flush(self) -> list:
+        # Upstream closed without a trailing blank line
+        event, self._buffer = self._buffer.strip(b"\n"), b""
+        return [event + b"\n\n"] if event.strip() else []
+
+def event_data(event: bytes):
+    lines = [line[5:].lstrip() for line in event.split(b"\n") if line.startswith(b"data:")]
+    return b"\n".join(lines) if lines else None
+
+def _frame(payload: dict) -> bytes:
+    return b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n"
+
+class StreamRelay:
+    """
+    Coalesces chat completion deltas into fewer, larger SSE frames.
+
+    Consecutive content deltas are merged into one chunk (the first chunk's id,
+    model and role are kept, contents are concatenated) until window seconds
+    passed since the first pending delta or max_chars characters are pending.
+    Everything else (role-only deltas, finish_reason, usage, errors, comments)
+    flushes the pending text and is forwarded unchanged, so the concatenated
+    content the frontend parses is byte-for-byte the same. window <= 0 forwards
+    every event as is and only measures. The first content delta is never held
+    back.
+
+    finish() ends the stream with a timing frame (object
+    "chat.completion.timing", no choices, so clients ignore it) before [DONE].
+    """
+
+    def __init__(self, window: float, max_chars: int, started: float = None):
+        self.window = window
+        self.max_chars = max_chars
+        self.started = started if started is not None else time.monotonic()
+        self.first_token_at = None
+        self.finished_at = None
+        self.deltas = 0
+        self.usage = None
+        self.done = False
+        self.failed = False
+        self.frames_in = 0
+        self.frames_out = 0
+        self._pending = None  # (first chunk dict, first raw event)
+        self._parts = []
+        self._chars = 0
+        self._deadline = None
+
+    def push(self, event: bytes) -> list:
+        """One upstream event in, the frames to send now out."""
+        self.frames_in += 1
+        data = event_data(event)
+        if data is None:
+            return self.flush() + self._emit([event])
+        if data == b"[DONE]":
+            self.done = True
+            return self.flush()
+        try:
+            chunk = json.loads(data)
+        except ValueError:
+            return self.flush() + self._emit([event])
+        if not isinstance(chunk, dict):
+            return self.flush() + self._emit([event])
+        if "error" in chunk or "error_code" in chunk:
+            self.failed = True
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        content = _delta_content(chunk)
+        if content:
+            now = time.monotonic()
+            first = self.first_token_at is None
+            if first:
+                self.first_token_at = now
+            self.deltas += 1
+            # The first token always goes out at once, so batching never delays TTFT
+            if self.window > 0 and not first and _mergeable(chunk):
+                if self._pending is None:
+                    self._pending = (chunk, event)
+                    self._deadline = now + self.window
+                self._parts.append(content)
+                self._chars += len(content)
+                if self._chars >= self.max_chars or now >= self._deadline:
+                    return self.flush()
+                return []
+        return self.flush() + self._emit([event])
+
+    def due(self):
+        """Seconds until the pending text must be flushed, None when nothing is pending."""
+        if self._pending is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def flush(self) -> list:
+        if self._pending is None:
+            return []
+        chunk, event = self._pending
+        parts = self._parts
+        self._pending, self._parts, self._chars, self._deadline = None, [], 0, None
+        if len(parts) == 1:
+            # Nothing was merged: forward the original bytes untouched
+            return self._emit([event])
+        merged = dict(chunk)
+        choice = dict(chunk["choices"][0])
+        choice["delta"] = {**choice["delta"], "content": "".join(parts)}
+        merged["choices"] = [choice]
+        return self._emit([_frame(merged)])
+
+    def finish(self) -> list:
+        """Frames that close the stream: pending text, then the timing frame and [DONE]."""
+        self.finished_at = time.monotonic()
+        frames = self.flush()
+        closing = []
+        if not self.failed:
+            # frames_out counts the timing frame itself and [DONE]
+            self.frames_out += 1 + self.done
+            closing.append(_frame({"object": "chat.completion.timing", "usage": self.usage, "timing": self.timing()}))
+        elif self.done:
+            self.frames_out += 1
+        if self.done:
+            closing.append(DONE_EVENT)
+        return frames + closing
+
+    def timing(self) -> dict:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        tokens = (self.usage or {}).get("completion_tokens") or self.deltas
+        ttft = self.first_token_at - self.started if self.first_token_at is not None else None
+        generation = end - self.first_token_at if self.first_token_at is not None else 0.0
+        return {
+            "ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "duration_ms": round((end - self.started) * 1000, 1),
+            "tokens": tokens,
+            "tokens_per_second": round(tokens / generation, 1) if generation > 0 else None,
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+        }
+
+    def _emit(self, frames: list) -> list:
+        self.frames_out += len(frames)
+        return frames
+
+def _delta_content(chunk: dict):
+    choices = chunk.get("choices")
+    if not isinstance(choices, list) or len(choices) != 1 or not isinstance(choices[0], dict):
+        return None
+    delta = choices[0].get("delta")
+    content = delta.get("content") if isinstance(delta, dict) else None
+    return content if isinstance(content, str) else None
+
+def _mergeable(chunk: dict) -> bool:
+    # Chunks that also end the choice or carry tool calls are forwarded on their own
+    choice = chunk["choices"][0]
+    return choice.get("finish_reason") is None and set(choice["delta"]) <= {"content", "role"}
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+class StreamLatency:
+    """Per-endpoint TTFT, duration and throughput over the most recent streams."""
+
+    def __init__(self, window: int = 512):
+        self.streams = 0
+        self.frames_in = 0
+        self.frames_out = 0
+        self._ttft = deque(maxlen=window)
+        self._duration = deque(maxlen=window)
+        self._throughput = deque(maxlen=window)
+
+    def record(self, timing: dict):
+        self.streams += 1
+        self.frames_in += timing["frames_in"]
+        self.frames_out += timing["frames_out"]
+        self._duration.append(timing["duration_ms"])
+        if timing["ttft_ms"] is not None:
+            self._ttft.append(timing["ttft_ms"])
+        if timing["tokens_per_second"] is not None:
+            self._throughput.append(timing["tokens_per_second"])
+
+    def stats(self) -> dict:
+        return {
+            "streams": self.streams,
+            "ttft_ms": _percentiles(self._ttft),
+            "duration_ms": _percentiles(self._duration),
+            "tokens_per_second": _percentiles(self._throughput),
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+        }
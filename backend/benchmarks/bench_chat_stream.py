@@ -0,0 +1,160 @@
+"""
+Frame batching of the chat proxy against a local fake serving endpoint.
+
+Starts a fake model serving endpoint and the app itself on 127.0.0.1
+(uvicorn, so the client sees real network writes). The endpoint streams
+OpenAI-style deltas of a few characters each after a fixed time to first
+token; concurrent chats then go through /api/chat/completions with
+different batching windows. Reports frames and writes per stream, TTFT and
+duration as seen by the client, and checks that the concatenated content is
+identical to what the endpoint produced.
+
+Run from the backend directory:
+    python -m benchmarks.bench_chat_stream [tokens per answer]
+"""
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+os.environ.setdefault("DATABRICKS_HOST", "https://bench.cloud.databricks.com")
+os.environ.setdefault("DATABRICKS_TOKEN", "bench-token")
+os.environ.setdefault("DATABRICKS_WAREHOUSE_ID", "bench-warehouse")
+os.environ.setdefault("RESULT_STORE_ENABLED", "false")
+
+from app.main import app
+from app.services.serving import serving_proxy
+
+CONCURRENT_CHATS = 8
+DEFAULT_TOKENS = 400
+TTFT = 0.1
+TOKEN_INTERVAL = 0.002
+WINDOWS_MS = [0, 25, 50]
+
+WORDS = ["The ", "revenue ", "table ", "shows ", "<thought>", "</thought>", "```sql\n", "SELECT ", "*\n", "```", "é ", "\"q\" "]
+
+
+def answer(tokens: int) -> list:
+    return [WORDS[i % len(WORDS)] for i in range(tokens)]
+
+
+def fake_serving_endpoint(tokens: int) -> FastAPI:
+    fake = FastAPI()
+
+    @fake.post("/serving-endpoints/fake/invocations")
+    async def invocations():
+        async def events():
+            await asyncio.sleep(TTFT)
+            head = {"id": "bench", "object": "chat.completion.chunk", "model": "fake"}
+            yield "data: " + json.dumps({**head, "choices": [{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]}) + "\n\n"
+            for piece in answer(tokens):
+                await asyncio.sleep(TOKEN_INTERVAL)
+                yield "data: " + json.dumps({**head, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}) + "\n\n"
+            yield "data: " + json.dumps({**head, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                                         "usage": {"completion_tokens": tokens}}) + "\n\n"
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def parse(body: str):
+    """The same line handling as the frontend chat client: content plus the timing frame."""
+    content, timing = "", None
+    for line in body.split("\n"):
+        if not line.startswith("data: ") or line.strip() == "data: [DONE]":
+            continue
+        chunk = json.loads(line[6:])
+        if chunk.get("object") == "chat.completion.timing":
+            timing = chunk["timing"]
+        content += ((chunk.get("choices") or [{}])[0].get("delta") or {}).get("content") or ""
+    return content, timing
+
+
+async def chat(client: httpx.AsyncClient, url: str) -> dict:
+    start = time.perf_counter()
+    first_token = None
+    writes = 0
+    body = ""
+    async with client.stream("POST", "/api/chat/completions", json={
+        "messages": [{"role": "user", "content": "Describe the revenue table"}], "endpoint_name": url,
+    }) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.aiter_text():
+            writes += 1
+            body += chunk
+            if first_token is None and parse(body[:body.rfind("\n") + 1])[0]:
+                first_token = time.perf_counter() - start
+    content, timing = parse(body)
+    return {
+        "content": content,
+        "frames": body.count("data: "),
+        "writes": writes,
+        "ttft": first_token,
+        "duration": time.perf_counter() - start,
+        "timing": timing,
+    }
+
+
+async def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_TOKENS
+    expected = "".join(answer(tokens))
+    servers = []
+    for asgi_app in (fake_serving_endpoint(tokens), app):
+        server = uvicorn.Server(uvicorn.Config(asgi_app, host="127.0.0.1", port=free_port(), log_level="warning"))
+        servers.append((server, asyncio.create_task(server.serve())))
+    while not all(server.started for server, _ in servers):
+        await asyncio.sleep(0.01)
+    fake_port, app_port = (server.config.port for server, _ in servers)
+    url = f"http://127.0.0.1:{fake_port}/serving-endpoints/fake/invocations"
+
+    print(f"chats:          {CONCURRENT_CHATS} concurrent, {tokens} deltas each")
+    print(f"endpoint:       ttft {TTFT * 1000:.0f}ms, {TOKEN_INTERVAL * 1000:.0f}ms per delta")
+    print(f"\n{'window':>8} {'frames':>8} {'writes':>8} {'ttft ms':>8} {'total ms':>9} {'tok/s':>8}  content")
+    failed = False
+    baseline_frames = None
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", timeout=60) as client:
+            for window_ms in WINDOWS_MS:
+                serving_proxy.batch_window = window_ms / 1000
+                results = await asyncio.gather(*(chat(client, url) for _ in range(CONCURRENT_CHATS)))
+                intact = all(r["content"] == expected for r in results)
+                frames = statistics.mean(r["frames"] for r in results)
+                baseline_frames = baseline_frames or frames
+                failed |= not intact
+                print(f"{window_ms:>6}ms {frames:>8.0f} {statistics.mean(r['writes'] for r in results):>8.0f} "
+                      f"{statistics.median(r['ttft'] for r in results) * 1000:>8.1f} "
+                      f"{statistics.median(r['duration'] for r in results) * 1000:>9.1f} "
+                      f"{statistics.median(r['timing']['tokens_per_second'] for r in results):>8.0f}  "
+                      f"{'identical' if intact else 'MISMATCH'}")
+    finally:
+        for server, task in servers:
+            server.should_exit = True
+            await task
+
+    latency = serving_proxy.stats()["latency"][url]
+    print(f"\nproxy metrics:  ttft p50 {latency['ttft_ms']['p50']}ms, p95 {latency['ttft_ms']['p95']}ms; "
+          f"{latency['frames_in']:,} frames in, {latency['frames_out']:,} out")
+    if failed:
+        raise SystemExit("FAIL: batched stream content differs from the upstream answer")
+    if frames >= baseline_frames:
+        raise SystemExit("FAIL: batching did not reduce the number of frames")
+    print("OK: content identical with batching, fewer frames per stream")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
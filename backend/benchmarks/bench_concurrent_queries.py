@@ -0,0 +1,69 @@
+"""
+Concurrency check for /api/query.
+
+Fires N parallel queries against the app, with the Databricks HTTP layer
+replaced by an httpx.MockTransport that answers each statement after a
+different delay. With a non-blocking service the wall time should track the
+slowest statement, not the sum of all of them.
+
+Run from the backend directory:
+    python -m benchmarks.bench_concurrent_queries
+"""
+import asyncio
+import json
+import os
+import re
+import time
+
+import httpx
+
+os.environ.setdefault("DATABRICKS_HOST", "https://bench.cloud.databricks.com")
+os.environ.setdefault("DATABRICKS_TOKEN", "bench-token")
+os.environ.setdefault("DATABRICKS_WAREHOUSE_ID", "bench-warehouse")
+os.environ.setdefault("RESULT_STORE_ENABLED", "false")
+
+from app.main import app
+from app.services.http_pool import workspace_pool
+
+N_QUERIES = 10
+BASE_LATENCY = 0.2
+
+
+async def fake_statements(request: httpx.Request) -> httpx.Response:
+    statement = json.loads(request.content)["statement"]
+    # Each statement encodes its own latency (ms) in the "delay_ms_N" table name
+    delay = int(re.search(r"delay_ms_(\d+)", statement).group(1)) / 1000
+    await asyncio.sleep(delay)
+    return httpx.Response(200, json={
+        "statement_id": "bench",
+        "status": {"state": "SUCCEEDED"},
+        "manifest": {"schema": {"columns": [{"name": "value"}]}},
+        "result": {"data_array": [[str(delay)]]},
+    })
+
+
+async def main():
+    await workspace_pool.configure(transport=httpx.MockTransport(fake_statements))
+    latencies = [BASE_LATENCY + i * 0.05 for i in range(N_QUERIES)]
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def run(latency):
+            query = f"SELECT * FROM delay_ms_{int(latency * 1000)} LIMIT 1"
+            resp = await client.post("/api/query", json={"query": query})
+            resp.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run(latency) for latency in latencies))
+        elapsed = time.perf_counter() - start
+
+    print(f"queries:        {N_QUERIES}")
+    print(f"slowest:        {max(latencies):.2f}s")
+    print(f"sum (serial):   {sum(latencies):.2f}s")
+    print(f"wall (parallel):{elapsed:.2f}s")
+    if elapsed > max(latencies) * 1.5:
+        raise SystemExit("FAIL: queries were serialized")
+    print("OK: parallel queries finished in roughly the time of the slowest one")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+"""
+Build time and query latency of the explorer search index.
+
+Feeds a synthetic metastore (default: 4 catalogs x 25 schemas x 60 tables x
+50 columns = 300k columns) into MetadataSearchIndex the same way the metadata
+cache does, then runs token, prefix, fuzzy, multi-term and scoped queries and
+reports p50/p95/max latency. Also times an incremental refresh of one table.
+
+Run from the backend directory:
+    python -m benchmarks.bench_metadata_search [columns per table]
+"""
+import random
+import statistics
+import sys
+import time
+
+from app.services.metadata_search import MetadataSearchIndex
+
+CATALOGS = 4
+SCHEMAS = 25
+TABLES = 60
+DEFAULT_COLUMNS = 50
+REPEAT = 50
+P95_BUDGET_MS = 10.0
+
+WORDS = [
+    "customer", "order", "invoice", "payment", "product", "store", "region", "country", "city",
+    "revenue", "amount", "price", "discount", "tax", "quantity", "status", "created", "updated",
+    "pickup", "dropoff", "trip", "fare", "vendor", "driver", "session", "event", "campaign",
+    "channel", "device", "account", "balance", "ledger", "shipment", "warehouse", "inventory",
+]
+TYPES = ["STRING", "INT", "BIGINT", "DOUBLE", "DECIMAL(18,2)", "TIMESTAMP", "DATE", "BOOLEAN"]
+
+QUERIES = {
+    "token": "revenue",
+    "prefix": "custo",
+    "fuzzy": "invoyce",
+    "multi-term": "customer amount",
+    "type": "timestamp",
+    "snake_case": "pickup_city",
+    "no match": "zzzqqq",
+}
+
+
+def feed(index: MetadataSearchIndex, columns_per_table: int, rng: random.Random):
+    index.apply("catalogs", (), [{"name": f"cat_{c}", "comment": "Business catalog"} for c in range(CATALOGS)])
+    for c in range(CATALOGS):
+        catalog = f"cat_{c}"
+        index.apply("schemas", (catalog,), [
+            {"name": f"{rng.choice(WORDS)}_{s}", "catalog_name": catalog} for s in range(SCHEMAS)
+        ])
+        for schema in sorted(index._children[catalog]):
+            schema_name = schema.split(".")[1]
+            tables = [
+                {"name": f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{t}", "table_type": "MANAGED",
+                 "comment": f"{rng.choice(WORDS)} facts by {rng.choice(WORDS)}"}
+                for t in range(TABLES)
+            ]
+            index.apply("tables", (catalog, schema_name), tables)
+            for table in tables:
+                index.apply("table", (catalog, schema_name, table["name"]), {
+                    **table,
+                    "columns": [
+                        {"name": f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{i}", "type_text": rng.choice(TYPES),
+                         "comment": f"{rng.choice(WORDS)} {rng.choice(WORDS)} of the {rng.choice(WORDS)}"}
+                        for i in range(columns_per_table)
+                    ],
+                })
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    columns_per_table = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COLUMNS
+    rng = random.Random(42)
+    index = MetadataSearchIndex()
+
+    start = time.perf_counter()
+    feed(index, columns_per_table, rng)
+    build = time.perf_counter() - start
+    stats = index.stats()
+    print(f"documents:      {stats['documents']:,} ({stats['documents_by_kind'].get('column', 0):,} columns)")
+    print(f"vocabulary:     {stats['vocabulary']:,} tokens")
+    print(f"build:          {build:.2f}s")
+
+    worst_p95 = 0.0
+    print(f"\n{'query':<12} {'text':<18} {'total':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    cases = [(name, text, {}) for name, text in QUERIES.items()]
+    cases.append(("scoped", "amount", {"scope": "cat_1", "kinds": ["column"]}))
+    cases.append(("page 5", "order", {"offset": 100, "limit": 20}))
+    for name, text, options in cases:
+        samples = []
+        for _ in range(REPEAT):
+            t0 = time.perf_counter()
+            result = index.search(text, **options)
+            samples.append((time.perf_counter() - t0) * 1000)
+        p95 = percentile(samples, 0.95)
+        worst_p95 = max(worst_p95, p95)
+        print(f"{name:<12} {text:<18} {result['total']:>8,} {statistics.median(samples):>8.2f} {p95:>8.2f} {max(samples):>8.2f}")
+
+    schema = sorted(index._children["cat_0"])[0]
+    table = sorted(index._children[schema])[0]
+    t0 = time.perf_counter()
+    index.apply("table", tuple(table.split(".")), {"name": table.split(".")[-1], "table_type": "MANAGED",
+                                                   "columns": [{"name": "refreshed_column", "type_text": "STRING"}]})
+    print(f"\nincremental refresh of one table: {(time.perf_counter() - t0) * 1000:.2f}ms")
+
+    if worst_p95 > P95_BUDGET_MS:
+        raise SystemExit(f"FAIL: p95 {worst_p95:.2f}ms exceeds {P95_BUDGET_MS}ms")
+    print(f"OK: every query p95 within {P95_BUDGET_MS}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Payload size and end-to-end latency of the /api/query response formats.
+
+Compares format=rows (default), format=columnar and format=arrow for results of
+10k, 100k and 1M rows. The Databricks HTTP layer is an httpx.MockTransport that
+serves pre-encoded JSON_ARRAY chunks, so the numbers cover chunk download,
+transformation and serialization inside the backend.
+
+Run from the backend directory:
+    python -m benchmarks.bench_query_formats [row counts...]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+import httpx
+
+os.environ.setdefault("DATABRICKS_HOST", "https://bench.cloud.databricks.com")
+os.environ.setdefault("DATABRICKS_TOKEN", "bench-token")
+os.environ.setdefault("DATABRICKS_WAREHOUSE_ID", "bench-warehouse")
+os.environ.setdefault("RESULT_STORE_ENABLED", "false")
+
+from app.main import app
+from app.services.http_pool import workspace_pool
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+CHUNK_ROWS = 100_000
+FORMATS = ["rows", "columnar", "arrow"]
+COLUMNS = [
+    {"name": "trip_id", "type_name": "LONG"},
+    {"name": "pickup_zip", "type_name": "INT"},
+    {"name": "trip_distance", "type_name": "DOUBLE"},
+    {"name": "fare_amount", "type_name": "DOUBLE"},
+    {"name": "vendor", "type_name": "STRING"},
+]
+
+
+def build_chunks(total_rows: int):
+    """Pre-encodes the JSON_ARRAY chunk bodies (values as strings, like the real API)."""
+    chunks = []
+    for start in range(0, total_rows, CHUNK_ROWS):
+        rows = [
+            [str(i), str(10000 + i % 500), f"{(i % 97) / 7:.2f}", f"{(i % 311) / 3:.2f}", f"vendor_{i % 7}"]
+            for i in range(start, min(start + CHUNK_ROWS, total_rows))
+        ]
+        chunks.append(json.dumps({"chunk_index": len(chunks), "row_offset": start, "data_array": rows}).encode())
+    return chunks
+
+
+def make_handler(total_rows: int, chunks: list):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            return httpx.Response(200, json={
+                "statement_id": "bench",
+                "status": {"state": "SUCCEEDED"},
+                "manifest": {
+                    "schema": {"columns": COLUMNS},
+                    "total_row_count": total_rows,
+                    "chunks": [
+                        {"chunk_index": i, "row_count": min(CHUNK_ROWS, total_rows - i * CHUNK_ROWS)}
+                        for i in range(len(chunks))
+                    ],
+                },
+            })
+        index = int(request.url.path.rsplit("/", 1)[1])
+        return httpx.Response(200, content=chunks[index], headers={"Content-Type": "application/json"})
+    return handler
+
+
+async def run_size(client: httpx.AsyncClient, total_rows: int):
+    chunks = build_chunks(total_rows)
+    await workspace_pool.configure(transport=httpx.MockTransport(make_handler(total_rows, chunks)))
+    query = f"SELECT * FROM bench.trips LIMIT {total_rows}"
+    results = []
+    for fmt in FORMATS:
+        start = time.perf_counter()
+        resp = await client.post("/api/query", json={"query": query, "format": fmt, "cache": False})
+        resp.raise_for_status()
+        elapsed = time.perf_counter() - start
+        results.append((fmt, len(resp.content), elapsed))
+    return results
+
+
+async def main(sizes):
+    print(f"{'rows':>10} {'format':>9} {'payload MB':>11} {'latency s':>10}")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=None) as client:
+        for total_rows in sizes:
+            for fmt, size, elapsed in await run_size(client, total_rows):
+                print(f"{total_rows:>10} {fmt:>9} {size / 1e6:>11.2f} {elapsed:>10.3f}")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    asyncio.run(main(sizes))
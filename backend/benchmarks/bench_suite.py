@@ -0,0 +1,298 @@
+"""
+Repeatable load scenarios against the whole backend, for tracking regressions.
+
+Starts benchmarks.fake_databricks and the app (uvicorn app.main:app) as
+subprocesses on 127.0.0.1, with the app's DATABRICKS_HOST pointing at the
+fake server and the query, completion and result caches off, so every request
+goes through the real client pool, polling, chunk fetching and decoding paths.
+Each scenario runs a fixed number of requests at a fixed concurrency and
+reports latency p50/p99 (plus time to first byte for streams), throughput,
+errors and the app's resident memory (current and peak, from /proc).
+
+--output writes the results as JSON; --baseline compares against a previous
+output and exits non-zero when p99, throughput or peak memory regress by more
+than --tolerance.
+
+Run from the backend directory:
+    python -m benchmarks.bench_suite [--only query_small,chat] [--scale 0.5]
+                                     [--latency-ms 10] [--output results.json]
+                                     [--baseline results.json --tolerance 0.25]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Scenario:
+    def __init__(self, name: str, method: str, path: str, requests: int, concurrency: int,
+                 body: dict = None, stream: bool = False, fake: dict = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.requests = requests
+        self.concurrency = concurrency
+        self.body = body
+        # Streamed responses also report the time to the first body byte
+        self.stream = stream
+        # Fake server settings for this scenario only (PUT /fake/settings)
+        self.fake = fake or {}
+
+
+def query(limit: int, **options) -> dict:
+    return {"query": f"SELECT * FROM bench.events LIMIT {limit}", "cache": False, **options}
+
+
+SCENARIOS = [
+    Scenario("query_small", "POST", "/api/query", 400, 16, query(100)),
+    Scenario("query_chunked", "POST", "/api/query", 60, 8, query(20000)),
+    Scenario("query_chunked_sequential", "POST", "/api/query", 60, 8, query(20000), fake={"chunk_plan": False}),
+    Scenario("query_columnar", "POST", "/api/query", 60, 8, query(20000, format="columnar")),
+    Scenario("query_arrow", "POST", "/api/query", 40, 4, query(100000, arrow=True, format="arrow")),
+    Scenario("query_stream", "POST", "/api/query", 60, 8, query(20000, stream=True), stream=True),
+    Scenario("explorer_catalogs", "GET", "/api/explorer/catalogs?refresh=true", 200, 16),
+    Scenario("explorer_tables", "GET", "/api/explorer/tables?catalog_name=cat_0&schema_name=schema_0&refresh=true",
+             200, 16),
+    Scenario("explorer_tables_cached", "GET", "/api/explorer/tables?catalog_name=cat_0&schema_name=schema_0",
+             1000, 16),
+    Scenario("explorer_table_details", "GET", "/api/explorer/table/cat_0.schema_0.table_1?refresh=true", 200, 16),
+    Scenario("files_read", "GET", "/api/files?path=/bench/dir_0/file_0.csv", 400, 16),
+    Scenario("files_read_range", "GET", "/api/files?path=/bench/dir_0/file_1.csv&offset=1024&length=16384", 400, 16),
+    Scenario("files_download", "GET", "/api/files/download?path=/bench/dir_1/file_0.csv", 200, 16, stream=True),
+    Scenario("listdir_recursive", "GET", "/api/listdir?path=/bench&recursive=true&refresh=true", 100, 8),
+    Scenario("chat", "POST", "/api/chat/completions", 32, 8, {
+        "messages": [{"role": "user", "content": "Describe the events table"}], "cache": False,
+    }, stream=True),
+]
+
+# Fake workspace shared by every scenario
+FAKE_SETTINGS = {
+    "rows_per_chunk": 2000,
+    "page_size": 25,
+    "dbfs_dirs": 4,
+    "dbfs_files_per_dir": 25,
+    "dbfs_file_size": 256 * 1024,
+    "serving_ttft_ms": 100,
+    "serving_token_interval_ms": 2,
+    "serving_tokens": 200,
+}
+
+APP_ENV = {
+    "DATABRICKS_TOKEN": "bench-token",
+    "DATABRICKS_WAREHOUSE_ID": "bench-warehouse",
+    "DATABRICKS_SERVING_ENDPOINT": "bench",
+    "QUERY_CACHE_ENABLED": "false",
+    "COMPLETION_CACHE_ENABLED": "false",
+    "RESULT_STORE_ENABLED": "false",
+    "SERVING_HTTP2": "false",
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory(pid: int) -> dict:
+    """Resident and peak resident memory in MB (Linux only)."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("VmRSS", "VmHWM"):
+                    values[key] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        pass
+    return {"rss_mb": values.get("VmRSS"), "peak_rss_mb": values.get("VmHWM")}
+
+
+def percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered) + 0.5) - 1))]
+
+
+def start(args: list, env: dict = None) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], cwd=BACKEND_DIR, env={**os.environ, **(env or {})})
+
+
+async def wait_ready(url: str, process: subprocess.Popen, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise SystemExit(f"{url}: process exited with code {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise SystemExit(f"{url}: not ready after {timeout:.0f}s")
+
+
+async def one_request(client: httpx.AsyncClient, scenario: Scenario) -> tuple:
+    """(ok, seconds, seconds to first byte, bytes)."""
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    try:
+        async with client.stream(scenario.method, scenario.path, json=scenario.body) as resp:
+            async for chunk in resp.aiter_raw():
+                if first_byte is None:
+                    first_byte = time.perf_counter() - started
+                size += len(chunk)
+            ok = resp.status_code < 400
+    except httpx.HTTPError:
+        ok = False
+    return ok, time.perf_counter() - started, first_byte, size
+
+
+async def run_scenario(client: httpx.AsyncClient, fake_url: str, app_pid: int, scenario: Scenario,
+                       scale: float) -> dict:
+    total = max(1, round(scenario.requests * scale))
+    if scenario.fake:
+        (await client.put(f"{fake_url}/fake/settings", json=scenario.fake)).raise_for_status()
+    try:
+        # Warm-up: connections, lazy imports and first-request caches are not measured
+        for _ in range(min(scenario.concurrency, total)):
+            await one_request(client, scenario)
+
+        results = []
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                results.append(await one_request(client, scenario))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        if scenario.fake:
+            defaults = (await client.get(f"{fake_url}/fake/defaults")).json()
+            await client.put(f"{fake_url}/fake/settings", json={k: defaults[k] for k in scenario.fake})
+
+    latencies = [seconds for ok, seconds, _, _ in results if ok]
+    result = {
+        "requests": total,
+        "concurrency": scenario.concurrency,
+        "errors": sum(1 for ok, *_ in results if not ok),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "rps": round(total / elapsed, 1),
+        "mb_per_s": round(sum(size for *_, size in results) / elapsed / 1024 ** 2, 1),
+        **memory(app_pid),
+    }
+    if scenario.stream:
+        result["ttfb_p50_ms"] = round(percentile([fb for ok, _, fb, _ in results if ok and fb], 50) * 1000, 1)
+    return result
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of p99, throughput and peak memory beyond tolerance, as messages."""
+    problems = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["errors"] > base["errors"]:
+            problems.append(f"{name}: {result['errors']} errors (baseline {base['errors']})")
+        if result["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {result['p99_ms']}ms (baseline {base['p99_ms']}ms)")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {result['rps']} req/s (baseline {base['rps']} req/s)")
+        if result.get("peak_rss_mb") and base.get("peak_rss_mb") and \
+                result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            problems.append(f"{name}: peak RSS {result['peak_rss_mb']}MB (baseline {base['peak_rss_mb']}MB)")
+    return problems
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", help="Comma separated scenario names")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier for the number of requests")
+    parser.add_argument("--latency-ms", type=float, default=10.0, help="Fake Databricks latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.only:
+        names = set(args.only.split(","))
+        unknown = names - {s.name for s in SCENARIOS}
+        if unknown:
+            raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+        scenarios = [s for s in SCENARIOS if s.name in names]
+
+    fake_port, app_port = free_port(), free_port()
+    fake_url, app_url = f"http://127.0.0.1:{fake_port}", f"http://127.0.0.1:{app_port}"
+    fake_args = [f"--{k.replace('_', '-')}={v}" for k, v in FAKE_SETTINGS.items()]
+    fake = start(["benchmarks.fake_databricks", "--port", str(fake_port), f"--latency-ms={args.latency_ms}",
+                  f"--jitter-ms={args.jitter_ms}", *fake_args])
+    app = start(["uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port), "--log-level", "warning"],
+                {**APP_ENV, "DATABRICKS_HOST": fake_url})
+    results = {}
+    try:
+        await wait_ready(f"{fake_url}/fake/settings", fake)
+        await wait_ready(f"{app_url}/health", app)
+        print(f"fake databricks: {args.latency_ms:.0f}ms +/- {args.jitter_ms:.0f}ms per call; "
+              f"app pid {app.pid}, idle RSS {memory(app.pid)['rss_mb']}MB\n")
+        print(f"{'scenario':<26} {'reqs':>5} {'conc':>5} {'p50 ms':>8} {'p99 ms':>8} {'ttfb ms':>8} "
+              f"{'req/s':>8} {'MB/s':>7} {'errors':>6} {'rss MB':>7} {'peak MB':>8}")
+        limits = httpx.Limits(max_connections=64, max_keepalive_connections=64)
+        async with httpx.AsyncClient(base_url=app_url, timeout=120, limits=limits) as client:
+            for scenario in scenarios:
+                result = await run_scenario(client, fake_url, app.pid, scenario, args.scale)
+                results[scenario.name] = result
+                print(f"{scenario.name:<26} {result['requests']:>5} {result['concurrency']:>5} "
+                      f"{result['p50_ms']:>8} {result['p99_ms']:>8} {result.get('ttfb_p50_ms', '-'):>8} "
+                      f"{result['rps']:>8} {result['mb_per_s']:>7} {result['errors']:>6} "
+                      f"{result['rss_mb'] or '-':>7} {result['peak_rss_mb'] or '-':>8}")
+    finally:
+        for process in (app, fake):
+            process.terminate()
+        for process in (app, fake):
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "latency_ms": args.latency_ms,
+                "scale": args.scale,
+                "scenarios": results,
+            }, f, indent=2)
+        print(f"\nresults written to {args.output}")
+
+    failed = [name for name, result in results.items() if result["errors"]]
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare(results, json.load(f)["scenarios"], args.tolerance)
+        if problems:
+            raise SystemExit("REGRESSION (tolerance {:.0%}):\n  ".format(args.tolerance) + "\n  ".join(problems))
+        print(f"OK: no regression beyond {args.tolerance:.0%} of {args.baseline}")
+    if failed:
+        raise SystemExit(f"FAIL: errors in {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,516 @@
+"""
+Local stand-in for the Databricks REST APIs the backend calls.
+
+Unlike DatabricksMockService, which replaces the service layer, this is a real
+HTTP server: pointing DATABRICKS_HOST at it exercises the client pool,
+statement polling, chunk and external link fetching, Unity Catalog paging,
+DBFS block reads/uploads and the chat SSE relay end to end.
+
+- Statement Execution: statements go PENDING -> RUNNING -> SUCCEEDED after
+  pending_seconds (wait_timeout is honoured), results are split into chunks of
+  rows_per_chunk rows, INLINE or EXTERNAL_LINKS (JSON_ARRAY or ARROW_STREAM),
+  with or without a chunk plan in the manifest. The row count is the query's
+  LIMIT (default_rows without one); every row is derived from its index.
+- Unity Catalog: catalogs/schemas/tables with max_results + page_token paging.
+- DBFS: an in-memory tree under /bench (get-status, list, read, put, create,
+  add-block, close, delete, mkdirs).
+- Serving endpoints: chat completion chunks as SSE after a time to first token.
+
+Every response waits latency_ms (+/- jitter_ms). Settings can be changed at
+runtime with PUT /fake/settings.
+
+Run from the backend directory:
+    python -m benchmarks.fake_databricks --port 8001 [--latency-ms 20 ...]
+"""
+import argparse
+import asyncio
+import base64
+import datetime
+import itertools
+import json
+import random
+import re
+import time
+import uuid
+from collections import OrderedDict
+
+import pyarrow as pa
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+CATEGORIES = ["fruit", "vegetable", "dairy", "bakery", "meat", "seafood", "frozen", "beverage"]
+COLUMNS = [
+    {"name": "id", "type_text": "BIGINT", "type_name": "LONG"},
+    {"name": "category", "type_text": "STRING", "type_name": "STRING"},
+    {"name": "amount", "type_text": "DOUBLE", "type_name": "DOUBLE"},
+    {"name": "event_date", "type_text": "DATE", "type_name": "DATE"},
+]
+EPOCH = datetime.date(2024, 1, 1)
+MAX_STATEMENTS = 10000
+STATEMENTS_PATH = "/api/2.0/sql/statements"
+
+
+class FakeSettings:
+    def __init__(self, **overrides):
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.pending_seconds = 0.0
+        self.default_rows = 1000
+        self.rows_per_chunk = 5000
+        self.chunk_plan = True
+        self.page_size = 50
+        self.catalogs = 3
+        self.schemas_per_catalog = 10
+        self.tables_per_schema = 50
+        self.columns_per_table = 20
+        self.dbfs_dirs = 5
+        self.dbfs_files_per_dir = 20
+        self.dbfs_file_size = 64 * 1024
+        self.serving_ttft_ms = 100.0
+        self.serving_token_interval_ms = 5.0
+        self.serving_tokens = 200
+        self.update(**overrides)
+
+    def update(self, **values):
+        for name, value in values.items():
+            if not hasattr(self, name) or name.startswith("_"):
+                raise ValueError(f"Unknown setting: {name}")
+            current = getattr(self, name)
+            if isinstance(current, bool) and isinstance(value, str):
+                value = value.lower() in ("1", "true", "yes")
+            setattr(self, name, type(current)(value))
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def row_values(i: int) -> tuple:
+    return i, CATEGORIES[i % len(CATEGORIES)], (i * 37 % 100000) / 100, EPOCH + datetime.timedelta(days=i % 730)
+
+
+def json_rows(start: int, stop: int) -> list:
+    # JSON_ARRAY results carry every value as a string, like the real API
+    return [[str(i), category, repr(amount), date.isoformat()]
+            for i, category, amount, date in map(row_values, range(start, stop))]
+
+
+def arrow_rows(start: int, stop: int) -> bytes:
+    ids = list(range(start, stop))
+    table = pa.table({
+        "id": pa.array(ids, pa.int64()),
+        "category": pa.array([CATEGORIES[i % len(CATEGORIES)] for i in ids], pa.string()),
+        "amount": pa.array([(i * 37 % 100000) / 100 for i in ids], pa.float64()),
+        "event_date": pa.array([EPOCH + datetime.timedelta(days=i % 730) for i in ids], pa.date32()),
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def parse_seconds(value: str, default: float) -> float:
+    match = re.fullmatch(r"(\d+)s", value or "")
+    return float(match.group(1)) if match else default
+
+
+class Statement:
+    def __init__(self, payload: dict, settings: FakeSettings):
+        self.id = uuid.uuid4().hex
+        self.query = payload.get("statement", "")
+        limit = re.search(r"\bLIMIT\s+(\d+)", self.query, re.IGNORECASE)
+        self.rows = int(limit.group(1)) if limit else settings.default_rows
+        self.format = payload.get("format", "JSON_ARRAY")
+        self.disposition = payload.get("disposition", "INLINE")
+        self.rows_per_chunk = max(1, settings.rows_per_chunk)
+        self.chunk_plan = settings.chunk_plan
+        self.submitted_at = time.monotonic()
+        self.ready_at = self.submitted_at + settings.pending_seconds
+        self.canceled = False
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.rows // self.rows_per_chunk))
+
+    def chunk_bounds(self, index: int) -> tuple:
+        start = index * self.rows_per_chunk
+        return start, min(self.rows, start + self.rows_per_chunk)
+
+    def state(self) -> str:
+        if self.canceled:
+            return "CANCELED"
+        now = time.monotonic()
+        if now >= self.ready_at:
+            return "SUCCEEDED"
+        return "RUNNING" if now >= (self.submitted_at + self.ready_at) / 2 else "PENDING"
+
+    def link(self, index: int, base_url: str) -> dict:
+        start, stop = self.chunk_bounds(index)
+        link = {
+            "chunk_index": index,
+            "row_offset": start,
+            "row_count": stop - start,
+            "external_link": f"{base_url}fake-storage/{self.id}/{index}",
+            "expiration": (datetime.datetime.utcnow() + datetime.timedelta(minutes=15)).isoformat() + "Z",
+        }
+        if index + 1 < self.chunk_count:
+            link["next_chunk_index"] = index + 1
+            link["next_chunk_internal_link"] = f"{STATEMENTS_PATH}/{self.id}/result/chunks/{index + 1}"
+        return link
+
+    def chunk(self, index: int, base_url: str) -> dict:
+        if self.disposition == "EXTERNAL_LINKS":
+            return {"external_links": [self.link(index, base_url)]}
+        start, stop = self.chunk_bounds(index)
+        chunk = {"chunk_index": index, "row_offset": start, "row_count": stop - start,
+                 "data_array": json_rows(start, stop)}
+        if index + 1 < self.chunk_count:
+            chunk["next_chunk_index"] = index + 1
+            chunk["next_chunk_internal_link"] = f"{STATEMENTS_PATH}/{self.id}/result/chunks/{index + 1}"
+        return chunk
+
+    def body(self, base_url: str) -> dict:
+        state = self.state()
+        body = {"statement_id": self.id, "status": {"state": state}}
+        if state != "SUCCEEDED":
+            return body
+        manifest = {
+            "format": self.format,
+            "schema": {"column_count": len(COLUMNS),
+                       "columns": [{**c, "position": i} for i, c in enumerate(COLUMNS)]},
+            "total_chunk_count": self.chunk_count,
+            "total_row_count": self.rows,
+            "truncated": False,
+        }
+        if self.chunk_plan:
+            manifest["chunks"] = [
+                {"chunk_index": i, "row_offset": self.chunk_bounds(i)[0],
+                 "row_count": self.chunk_bounds(i)[1] - self.chunk_bounds(i)[0]}
+                for i in range(self.chunk_count)
+            ]
+        body["manifest"] = manifest
+        body["result"] = self.chunk(0, base_url)
+        return body
+
+
+def respond(body: dict) -> Response:
+    # Skips FastAPI's jsonable_encoder: big chunks would make the fake the bottleneck
+    return Response(json.dumps(body), media_type="application/json")
+
+
+def not_found(message: str) -> JSONResponse:
+    return JSONResponse({"error_code": "RESOURCE_DOES_NOT_EXIST", "message": message}, status_code=404)
+
+
+def page(items: list, key: str, request: Request, settings: FakeSettings) -> dict:
+    offset = int(request.query_params.get("page_token") or 0)
+    size = int(request.query_params.get("max_results") or settings.page_size) or settings.page_size
+    body = {key: items[offset:offset + size]}
+    if offset + size < len(items):
+        body["next_page_token"] = str(offset + size)
+    return body
+
+
+def create_app(settings: FakeSettings = None) -> FastAPI:
+    settings = settings or FakeSettings()
+    defaults = settings.as_dict()
+    fake = FastAPI(title="Fake Databricks")
+    statements = OrderedDict()
+    files = {}
+    directories = {"/", "/bench"}
+    handles = {}
+    handle_ids = itertools.count(1)
+    jitter = random.Random(7)
+
+    def seed_dbfs():
+        files.clear()
+        directories.clear()
+        directories.update({"/", "/bench"})
+        line = b"id,category,amount,event_date\n" + b"".join(
+            f"{i},{c},{a},{d}\n".encode() for i, c, a, d in map(row_values, range(200)))
+        for d in range(settings.dbfs_dirs):
+            directories.add(f"/bench/dir_{d}")
+            for f in range(settings.dbfs_files_per_dir):
+                content = (line * (settings.dbfs_file_size // len(line) + 1))[:settings.dbfs_file_size]
+                files[f"/bench/dir_{d}/file_{f}.csv"] = (content, time.time())
+
+    seed_dbfs()
+
+    @fake.middleware("http")
+    async def latency(request: Request, call_next):
+        delay = settings.latency_ms + (jitter.uniform(-1, 1) * settings.jitter_ms if settings.jitter_ms else 0)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        return await call_next(request)
+
+    @fake.get("/fake/settings")
+    async def get_settings():
+        return settings.as_dict()
+
+    @fake.get("/fake/defaults")
+    async def get_defaults():
+        # Settings the server was started with, to restore after a scenario
+        return defaults
+
+    @fake.put("/fake/settings")
+    async def put_settings(request: Request):
+        values = await request.json()
+        try:
+            settings.update(**values)
+        except ValueError as e:
+            return JSONResponse({"message": str(e)}, status_code=400)
+        if any(name.startswith("dbfs_") for name in values):
+            seed_dbfs()
+        return settings.as_dict()
+
+    # --- Statement Execution ---------------------------------------------------------------
+
+    @fake.post(STATEMENTS_PATH)
+    async def submit(request: Request):
+        payload = await request.json()
+        statement = Statement(payload, settings)
+        statements[statement.id] = statement
+        while len(statements) > MAX_STATEMENTS:
+            statements.popitem(last=False)
+        # Like the real API: block up to wait_timeout, then answer with the current state
+        wait = min(parse_seconds(payload.get("wait_timeout"), 10.0), statement.ready_at - time.monotonic())
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return respond(statement.body(str(request.base_url)))
+
+    @fake.get(STATEMENTS_PATH + "/{statement_id}")
+    async def get_statement(statement_id: str, request: Request):
+        statement = statements.get(statement_id)
+        if statement is None:
+            return not_found(f"Statement {statement_id} not found")
+        return respond(statement.body(str(request.base_url)))
+
+    @fake.post(STATEMENTS_PATH + "/{statement_id}/cancel")
+    async def cancel(statement_id: str):
+        statement = statements.get(statement_id)
+        if statement is None:
+            return not_found(f"Statement {statement_id} not found")
+        statement.canceled = True
+        return {}
+
+    @fake.get(STATEMENTS_PATH + "/{statement_id}/result/chunks/{index}")
+    async def get_chunk(statement_id: str, index: int, request: Request):
+        statement = statements.get(statement_id)
+        if statement is None or statement.state() != "SUCCEEDED" or not 0 <= index < statement.chunk_count:
+            return not_found(f"Chunk {index} of {statement_id} not found")
+        return respond(statement.chunk(index, str(request.base_url)))
+
+    @fake.get("/fake-storage/{statement_id}/{index}")
+    async def external_link(statement_id: str, index: int):
+        statement = statements.get(statement_id)
+        if statement is None or not 0 <= index < statement.chunk_count:
+            return Response(status_code=404)
+        start, stop = statement.chunk_bounds(index)
+        if statement.format == "ARROW_STREAM":
+            return Response(arrow_rows(start, stop), media_type="application/vnd.apache.arrow.stream")
+        return Response(json.dumps(json_rows(start, stop)).encode(), media_type="application/json")
+
+    # --- Unity Catalog ---------------------------------------------------------------------
+
+    def catalog_names():
+        return [f"cat_{i}" for i in range(settings.catalogs)]
+
+    def schema_names(catalog: str):
+        return [f"schema_{i}" for i in range(settings.schemas_per_catalog)] if catalog in catalog_names() else None
+
+    def table_info(catalog: str, schema: str, index: int, with_columns: bool) -> dict:
+        name = f"table_{index}"
+        table = {
+            "name": name, "catalog_name": catalog, "schema_name": schema,
+            "full_name": f"{catalog}.{schema}.{name}",
+            "table_type": "VIEW" if index % 10 == 9 else "MANAGED",
+            "comment": f"{CATEGORIES[index % len(CATEGORIES)]} facts",
+        }
+        if with_columns:
+            table["columns"] = [
+                {"name": f"{CATEGORIES[c % len(CATEGORIES)]}_{c}", "type_text": COLUMNS[c % len(COLUMNS)]["type_text"],
+                 "type_name": COLUMNS[c % len(COLUMNS)]["type_name"], "position": c}
+                for c in range(settings.columns_per_table)
+            ]
+        return table
+
+    @fake.get("/api/2.1/unity-catalog/catalogs")
+    async def list_catalogs(request: Request):
+        items = [{"name": name, "comment": "Benchmark catalog"} for name in catalog_names()]
+        return page(items, "catalogs", request, settings)
+
+    @fake.get("/api/2.1/unity-catalog/schemas")
+    async def list_schemas(request: Request, catalog_name: str):
+        names = schema_names(catalog_name)
+        if names is None:
+            return not_found(f"Catalog '{catalog_name}' does not exist.")
+        items = [{"name": name, "catalog_name": catalog_name, "full_name": f"{catalog_name}.{name}"} for name in names]
+        return page(items, "schemas", request, settings)
+
+    @fake.get("/api/2.1/unity-catalog/tables")
+    async def list_tables(request: Request, catalog_name: str, schema_name: str, omit_columns: bool = False):
+        if schema_name not in (schema_names(catalog_name) or []):
+            return not_found(f"Schema '{catalog_name}.{schema_name}' does not exist.")
+        items = [table_info(catalog_name, schema_name, i, not omit_columns) for i in range(settings.tables_per_schema)]
+        return page(items, "tables", request, settings)
+
+    @fake.get("/api/2.1/unity-catalog/tables/{full_name}")
+    async def get_table(full_name: str):
+        parts = full_name.split(".")
+        if len(parts) == 3 and parts[1] in (schema_names(parts[0]) or []):
+            match = re.fullmatch(r"table_(\d+)", parts[2])
+            if match and int(match.group(1)) < settings.tables_per_schema:
+                return table_info(parts[0], parts[1], int(match.group(1)), True)
+        return not_found(f"Table '{full_name}' does not exist.")
+
+    # --- DBFS ------------------------------------------------------------------------------
+
+    def normalize(path: str) -> str:
+        path = path.removeprefix("dbfs:")
+        return "/" + path.strip("/")
+
+    def status(path: str) -> dict:
+        if path in directories:
+            return {"path": path, "is_dir": True, "file_size": 0}
+        content, mtime = files[path]
+        return {"path": path, "is_dir": False, "file_size": len(content), "modification_time": int(mtime * 1000)}
+
+    def add_parents(path: str):
+        while path != "/":
+            path = path.rsplit("/", 1)[0] or "/"
+            directories.add(path)
+
+    @fake.get("/api/2.0/dbfs/get-status")
+    async def get_status(path: str):
+        path = normalize(path)
+        if path not in directories and path not in files:
+            return not_found(f"No file or directory exists on path {path}.")
+        return status(path)
+
+    @fake.get("/api/2.0/dbfs/list")
+    async def list_directory(path: str):
+        path = normalize(path)
+        if path not in directories:
+            return not_found(f"No file or directory exists on path {path}.")
+        prefix = path.rstrip("/") + "/"
+        children = [p for p in itertools.chain(directories, files)
+                    if p.startswith(prefix) and "/" not in p[len(prefix):] and p != path]
+        return {"files": [status(p) for p in sorted(children)]}
+
+    @fake.get("/api/2.0/dbfs/read")
+    async def read(path: str, offset: int = 0, length: int = 1024 * 1024):
+        path = normalize(path)
+        if path not in files:
+            return not_found(f"No file exists on path {path}.")
+        block = files[path][0][offset:offset + min(length, 1024 * 1024)]
+        return {"bytes_read": len(block), "data": base64.b64encode(block).decode()}
+
+    @fake.post("/api/2.0/dbfs/put")
+    async def put(request: Request):
+        payload = await request.json()
+        path = normalize(payload["path"])
+        if path in files and not payload.get("overwrite", False):
+            return JSONResponse({"error_code": "RESOURCE_ALREADY_EXISTS", "message": path}, status_code=400)
+        files[path] = (base64.b64decode(payload.get("contents", "")), time.time())
+        add_parents(path)
+        return {}
+
+    @fake.post("/api/2.0/dbfs/create")
+    async def create(request: Request):
+        payload = await request.json()
+        handle = next(handle_ids)
+        handles[handle] = (normalize(payload["path"]), bytearray())
+        return {"handle": handle}
+
+    @fake.post("/api/2.0/dbfs/add-block")
+    async def add_block(request: Request):
+        payload = await request.json()
+        if payload["handle"] not in handles:
+            return not_found(f"Handle {payload['handle']} not found")
+        handles[payload["handle"]][1].extend(base64.b64decode(payload["data"]))
+        return {}
+
+    @fake.post("/api/2.0/dbfs/close")
+    async def close(request: Request):
+        payload = await request.json()
+        entry = handles.pop(payload["handle"], None)
+        if entry is None:
+            return not_found(f"Handle {payload['handle']} not found")
+        files[entry[0]] = (bytes(entry[1]), time.time())
+        add_parents(entry[0])
+        return {}
+
+    @fake.post("/api/2.0/dbfs/delete")
+    async def delete(request: Request):
+        payload = await request.json()
+        path = normalize(payload["path"])
+        prefix = path.rstrip("/") + "/"
+        files.pop(path, None)
+        if payload.get("recursive"):
+            for p in [p for p in files if p.startswith(prefix)]:
+                del files[p]
+            directories.difference_update({d for d in directories if d.startswith(prefix)})
+        directories.discard(path)
+        return {}
+
+    @fake.post("/api/2.0/dbfs/mkdirs")
+    async def mkdirs(request: Request):
+        path = normalize((await request.json())["path"])
+        directories.add(path)
+        add_parents(path)
+        return {}
+
+    # --- Serving endpoints -----------------------------------------------------------------
+
+    @fake.post("/serving-endpoints/{endpoint}/invocations")
+    async def invocations(endpoint: str, request: Request):
+        payload = await request.json()
+        head = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "object": "chat.completion.chunk",
+                "created": int(time.time()), "model": endpoint}
+        pieces = [CATEGORIES[i % len(CATEGORIES)] + " " for i in range(settings.serving_tokens)]
+        usage = {"prompt_tokens": sum(len(m.get("content", "").split()) for m in payload.get("messages", [])),
+                 "completion_tokens": settings.serving_tokens}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if not payload.get("stream"):
+            await asyncio.sleep((settings.serving_ttft_ms + settings.serving_tokens * settings.serving_token_interval_ms) / 1000)
+            return {**head, "object": "chat.completion", "usage": usage, "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": "".join(pieces)}, "finish_reason": "stop"}]}
+
+        def event(choice: dict, **extra) -> str:
+            return "data: " + json.dumps({**head, "choices": [{"index": 0, "finish_reason": None, **choice}], **extra}) + "\n\n"
+
+        async def events():
+            await asyncio.sleep(settings.serving_ttft_ms / 1000)
+            yield event({"delta": {"role": "assistant", "content": ""}})
+            for piece in pieces:
+                if settings.serving_token_interval_ms:
+                    await asyncio.sleep(settings.serving_token_interval_ms / 1000)
+                yield event({"delta": {"content": piece}})
+            yield event({"delta": {}, "finish_reason": "stop"}, usage=usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return fake
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Databricks REST server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    defaults = FakeSettings()
+    for name, value in defaults.as_dict().items():
+        option = "--" + name.replace("_", "-")
+        if isinstance(value, bool):
+            parser.add_argument(option, type=lambda v: v.lower() in ("1", "true", "yes"), default=value)
+        else:
+            parser.add_argument(option, type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    uvicorn.run(create_app(FakeSettings(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import asyncio
+import os
+import tempfile
+
+import httpx
+import pytest
+
+# Offline mode: no workspace configured, queries run on a small mock SQL engine
+for name in ("DATABRICKS_HOST", "DATABRICKS_TOKEN", "DATABRICKS_WAREHOUSE_ID"):
+    os.environ.pop(name, None)
+os.environ["RESULT_STORE_ENABLED"] = "false"
+os.environ["MOCK_ENGINE_DIR"] = tempfile.mkdtemp(prefix="mock-engine-")
+os.environ.setdefault("MOCK_NYCTAXI_TRIPS_ROWS", "2000")
+os.environ.setdefault("MOCK_TPCH_SCALE", "0.001")
+os.environ.setdefault("MOCK_MAIN_USERS_ROWS", "100")
+os.environ.setdefault("MOCK_MAIN_TRANSACTIONS_ROWS", "2000")
+
+from app.main import app  # noqa: E402
+from app.services.query_cache import query_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def clear_query_cache():
+    query_cache.clear()
+    yield
+    query_cache.clear()
+
+
+@pytest.fixture
+def call_api():
+    """Runs `await fn(client)` with an httpx client bound to the app, on a fresh event loop."""
+    def call(fn):
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test",
+                                         timeout=30) as client:
+                return await fn(client)
+        return asyncio.run(main())
+    return call
@@ -0,0 +1,18 @@
+def get_profiling(call_api, token: str = None):
+    headers = {"X-Admin-Token": token} if token is not None else {}
+    return call_api(lambda client: client.get("/api/admin/profiling", headers=headers))
+
+
+def test_admin_routes_are_hidden_without_admin_token(call_api, monkeypatch):
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert get_profiling(call_api).status_code == 404
+    assert get_profiling(call_api, "anything").status_code == 404
+
+
+def test_admin_routes_require_the_admin_token(call_api, monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    assert get_profiling(call_api).status_code == 403
+    assert get_profiling(call_api, "wrong").status_code == 403
+    resp = get_profiling(call_api, "s3cret")
+    assert resp.status_code == 200
+    assert "profiles" in resp.json()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.api.routes_chat import SlotStreamingResponse
+from app.services.completion_cache import CompletionCache
+from app.services.http_pool import WorkspaceClientPool
+from app.services.serving import ServingProxy
+
+URL = "https://workspace.cloud.databricks.com/serving-endpoints/chat/invocations"
+
+
+def test_slot_is_released_when_the_client_leaves_before_streaming():
+    async def never_iterated():
+        yield b"data: {}\n\n"
+
+    async def gone(message):
+        raise OSError("client disconnected")
+
+    async def scenario():
+        proxy = ServingProxy(max_streams=1)
+        release = await proxy.acquire(URL, "user")
+        response = SlotStreamingResponse(never_iterated(), release, media_type="text/event-stream")
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        with pytest.raises(ClientDisconnect):
+            await response(scope, None, gone)
+        return proxy.limiter(URL).stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0
+
+
+def sse(payload) -> bytes:
+    return b"data: " + (payload if isinstance(payload, bytes) else json.dumps(payload).encode()) + b"\n\n"
+
+
+@pytest.mark.parametrize("events, cached", [
+    # Content that talks about errors is a normal answer
+    ([{"choices": [{"delta": {"content": 'Raise "error" early'}}]}, b"[DONE]"], True),
+    ([{"choices": [{"delta": {"content": "partial"}}]}, {"error": "overloaded"}], False),
+])
+def test_only_streams_without_error_events_are_cached(events, cached):
+    body = b"".join(sse(event) for event in events)
+    cache = CompletionCache(enabled=True)
+
+    async def scenario():
+        pool = WorkspaceClientPool()
+        await pool.configure(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+        proxy = ServingProxy(pool=pool)
+        try:
+            release = await proxy.acquire(URL, "user")
+            stream = proxy.stream(URL, {}, {"messages": []}, release,
+                                  on_complete=lambda chunks: cache.put("key", chunks))
+            async for _ in stream:
+                pass
+        finally:
+            await pool.reset()
+
+    asyncio.run(scenario())
+    assert (cache.get("key") is not None) is cached
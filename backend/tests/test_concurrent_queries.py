@@ -0,0 +1,36 @@
+import asyncio
+import re
+import time
+
+from app.services.databricks_mock import databricks_mock_service
+
+# At most the default executor size on one CPU (min(32, cpu_count + 4)), so no query waits for a thread
+LATENCIES = [0.2, 0.25, 0.3, 0.35, 0.4]
+
+
+def test_parallel_queries_take_as_long_as_the_slowest(call_api, monkeypatch):
+    execute_sql = databricks_mock_service.execute_sql
+
+    def slow_execute_sql(query: str, *args):
+        # The LIMIT doubles as the simulated warehouse latency, in milliseconds
+        time.sleep(int(re.search(r"LIMIT (\d+)", query).group(1)) / 1000)
+        return execute_sql(query, *args)
+
+    monkeypatch.setattr(databricks_mock_service, "execute_sql", slow_execute_sql)
+
+    async def scenario(client):
+        async def query(latency: float) -> float:
+            started = time.perf_counter()
+            resp = await client.post("/api/query", json={
+                "query": f"SELECT * FROM main.default.users LIMIT {int(latency * 1000)}", "cache": False})
+            assert resp.status_code == 200, resp.text
+            assert resp.json()["data"]
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        durations = await asyncio.gather(*(query(latency) for latency in LATENCIES))
+        return time.perf_counter() - started, durations
+
+    elapsed, durations = call_api(scenario)
+    assert elapsed < max(durations) + 0.15
+    assert elapsed < sum(LATENCIES) / 2
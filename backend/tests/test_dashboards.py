@@ -0,0 +1,53 @@
+import json
+
+from app.services.mock_engine import mock_engine
+
+
+def expected(sql):
+    columns, rows, _ = mock_engine.execute(sql)
+    return [dict(zip((c["name"] for c in columns), row)) for row in rows]
+
+
+def test_filtered_aggregate_runs_on_the_mock(call_api):
+    spec = {
+        "data_source": "main.default.transactions",
+        "dimensions": ["currency"],
+        "measures": [{"column": "amount", "aggregation": "sum", "alias": "total"},
+                     {"aggregation": "count", "alias": "payments"}],
+        "filters": [{"column": "amount", "operator": ">", "value": 50},
+                    {"column": "user_id", "operator": "<=", "value": 10},
+                    {"column": "currency", "operator": "contains", "value": "u"}],
+        "sort": [{"column": "currency"}],
+    }
+
+    async def run(client):
+        return await client.post("/api/widgets/aggregate", json=spec)
+
+    response = call_api(run)
+    assert response.status_code == 200, response.text
+    rows = response.json()["data"]
+    want = expected("SELECT currency, SUM(amount) AS total, COUNT(*) AS payments FROM main.default.transactions "
+                    "WHERE amount > 50 AND user_id <= 10 AND upper(currency) LIKE '%U%' "
+                    "GROUP BY currency ORDER BY currency")
+    assert want
+    assert [row["currency"] for row in rows] == [row["currency"] for row in want]
+    assert [int(row["payments"]) for row in rows] == [row["payments"] for row in want]
+    assert [round(float(row["total"]), 2) for row in rows] == [round(row["total"], 2) for row in want]
+
+
+def test_dashboard_data_binds_widget_filters(call_api):
+    body = {"widgets": [{
+        "widget_id": "kpi",
+        "aggregate": {"data_source": "samples.nyctaxi.trips",
+                      "measures": [{"aggregation": "count", "alias": "trips"}],
+                      "filters": [{"column": "trip_distance", "operator": ">=", "value": 2.5}]},
+    }]}
+
+    async def run(client):
+        return await client.post("/api/dashboards/data", json=body)
+
+    response = call_api(run)
+    widget = json.loads(response.text.splitlines()[0])
+    assert "error" not in widget, widget["error"]
+    want = expected("SELECT COUNT(*) AS trips FROM samples.nyctaxi.trips WHERE trip_distance >= 2.5")
+    assert int(widget["data"][0]["trips"]) == want[0]["trips"]
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import routes
+from app.api.routes_files import parse_range
+from app.services.dbfs_listing import DirectoryListingCache
+from app.services.file_cache import FileContentCache
+
+
+def test_parse_range_forms():
+    assert parse_range("bytes=0-99", 1000) == (0, 100)
+    assert parse_range("bytes=900-", 1000) == (900, 100)
+    assert parse_range("bytes=-100", 1000) == (900, 100)
+    assert parse_range("bytes=-5000", 1000) == (0, 1000)
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+    ("bytes=1000-", 1000),
+    ("bytes=20-10", 1000),
+    ("bytes=0-1,5-9", 1000),
+])
+def test_parse_range_not_satisfiable(header, size):
+    with pytest.raises(HTTPException) as excinfo:
+        parse_range(header, size)
+    assert excinfo.value.status_code == 416
+    assert excinfo.value.headers["Content-Range"] == f"bytes */{size}"
+
+
+class FakeDbfsService:
+    async def list_directory(self, path):
+        return {"files": [{"path": f"{path.rstrip('/')}/a.csv", "is_dir": False, "file_size": 1}]}
+
+
+def test_workspace_reset_clears_file_and_listing_caches(monkeypatch):
+    listings = DirectoryListingCache(service=FakeDbfsService(), ttl_seconds=60)
+    contents = FileContentCache()
+    asyncio.run(listings.list("dbfs:/data"))
+    contents.put("dbfs:/data/a.csv", '"1-1"', "x", 1)
+    assert listings.stats()["entries"] == 1 and contents.stats()["entries"] == 1
+
+    monkeypatch.setattr(routes, "listing_cache", listings)
+    monkeypatch.setattr(routes, "file_cache", contents)
+    routes.reset_workspace_state()
+    assert listings.stats()["entries"] == 0
+    assert contents.stats()["entries"] == 0
+    assert contents.stats()["bytes"] == 0
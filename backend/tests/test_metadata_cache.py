@@ -0,0 +1,142 @@
+import asyncio
+
+from app.services.metadata_cache import MetadataCache
+from app.services.metadata_search import MetadataSearchIndex
+
+
+class FakeCatalogService:
+    def __init__(self):
+        self.calls = []
+
+    async def list_catalogs(self):
+        self.calls.append(("catalogs",))
+        return [{"name": "main"}]
+
+    async def list_schemas(self, catalog_name):
+        self.calls.append(("schemas", catalog_name))
+        return [{"name": "default", "catalog_name": catalog_name}]
+
+    async def list_tables(self, catalog_name, schema_name):
+        self.calls.append(("tables", catalog_name, schema_name))
+        return [{"name": f"t{i}"} for i in range(3)]
+
+    async def get_table(self, full_name):
+        self.calls.append(("table", full_name))
+        return {"full_name": full_name, "columns": []}
+
+
+def make_cache(ttl: float, **options):
+    ttls = {level: ttl for level in ("catalogs", "schemas", "tables", "table")}
+    return MetadataCache(service=FakeCatalogService(), ttls=ttls, **options)
+
+
+def test_refresh_skips_entries_nobody_reads():
+    async def scenario():
+        cache = make_cache(0.5)
+        await cache.warm()
+        # What a crawl leaves behind: table details loaded once and never read again
+        for i in range(3):
+            await cache.get_table(f"main.default.t{i}")
+        await cache.get_table("main.default.t0")  # read again from the cache
+        cache.service.calls.clear()
+        await asyncio.sleep(0.42)  # past 80% of the TTL, still within it since the last read
+        await cache._refresh_due()
+        await cache.stop_refresher()
+        return sorted(cache.service.calls)
+
+    assert asyncio.run(scenario()) == [("catalogs",), ("schemas", "main"), ("table", "main.default.t0")]
+
+
+def test_entries_past_max_stale_are_evicted():
+    async def scenario():
+        cache = make_cache(0.05, max_stale_seconds=0.05)
+        await cache.get_table("main.default.t0")
+        await asyncio.sleep(0.11)
+        await cache._refresh_due()
+        return cache.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["entries"] == 0
+    assert stats["evictions"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_past_max_entries():
+    async def scenario():
+        cache = MetadataCache(service=FakeCatalogService(), max_entries=2)
+        await cache.get_table("main.default.t0")
+        await cache.get_table("main.default.t1")
+        await cache.get_table("main.default.t0")  # t1 is now the least recently used
+        await cache.get_table("main.default.t2")
+        return [path for _, path, _ in cache.snapshot()]
+
+    assert sorted(asyncio.run(scenario())) == [("main", "default", "t0"), ("main", "default", "t2")]
+
+
+class SlowCatalogService(FakeCatalogService):
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def get_table(self, full_name):
+        await self.release.wait()
+        return await super().get_table(full_name)
+
+
+def test_clear_drops_a_load_still_in_flight():
+    async def scenario():
+        cache = MetadataCache(service=SlowCatalogService())
+        load = asyncio.ensure_future(cache.get_table("main.default.t0"))
+        await asyncio.sleep(0)
+        cache.clear()  # workspace switched while the old one was still answering
+        cache.service.release.set()
+        try:
+            await load
+        except RuntimeError:
+            pass
+        return cache.stats()["entries"], cache._inflight
+
+    assert asyncio.run(scenario()) == (0, {})
+
+
+def test_invalidate_drops_a_load_still_in_flight():
+    async def scenario():
+        cache = MetadataCache(service=SlowCatalogService())
+        load = asyncio.ensure_future(cache.get_table("main.default.t0"))
+        await asyncio.sleep(0)
+        cache.invalidate(("main", "default"))
+        cache.service.release.set()
+        try:
+            await load
+        except RuntimeError:
+            pass
+        return cache.stats()["entries"]
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_invalidate_removes_the_subtree_from_the_search_index():
+    async def scenario():
+        cache = make_cache(60)
+        index = MetadataSearchIndex()
+        index.attach(cache)
+        await cache.list_catalogs()
+        await cache.list_schemas("main")
+        await cache.list_tables("main", "default")
+        assert index.search("t1")["total"] >= 1
+        cache.invalidate(("main", "default", "t1"))
+        return [r["full_name"] for r in index.search("t")["results"]]
+
+    assert "main.default.t1" not in asyncio.run(scenario())
+
+
+def test_background_refreshes_are_tracked_until_done():
+    async def scenario():
+        cache = make_cache(0.01)
+        await cache.get_table("main.default.t0")
+        await asyncio.sleep(0.02)
+        await cache.get_table("main.default.t0")  # stale: served and refreshed in the background
+        tracked = len(cache._refreshes)
+        await asyncio.sleep(0.01)
+        return tracked, len(cache._refreshes)
+
+    assert asyncio.run(scenario()) == (1, 0)
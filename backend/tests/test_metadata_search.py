@@ -0,0 +1,26 @@
+from app.services.metadata_search import MetadataSearchIndex
+
+
+def make_index():
+    index = MetadataSearchIndex()
+    index.apply("catalogs", (), [{"name": "main"}])
+    index.apply("schemas", ("main",), [{"name": "sales"}])
+    index.apply("tables", ("main", "sales"), [
+        {"name": "orders", "comment": "Customer orders"},
+        {"name": "order_items"},
+        {"name": "customers"},
+    ])
+    return index
+
+
+def test_every_term_must_match():
+    index = make_index()
+    assert index.search("orders")["total"] >= 1
+    assert index.search("orders zzzzqqq")["total"] == 0
+    assert index.search("zzzzqqq orders")["results"] == []
+
+
+def test_terms_are_intersected():
+    index = make_index()
+    names = [r["full_name"] for r in index.search("order items")["results"]]
+    assert names == ["main.sales.order_items"]
@@ -0,0 +1,11 @@
+def test_requests_are_labelled_by_route_template(call_api):
+    async def scenario(client):
+        await client.get("/api/query/jobs/mock-does-not-exist")
+        await client.get("/api/no/such/route")
+        return (await client.get("/metrics")).text
+
+    text = call_api(scenario)
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/query/jobs/{statement_id}",status="404"}' in text
+    assert 'route="unmatched",status="404"' in text
+    # Raw paths would give one series per statement id
+    assert "mock-does-not-exist" not in text
@@ -0,0 +1,15 @@
+def test_metadata_commands_are_answered_in_mock_mode(call_api):
+    async def scenario(client):
+        return [await client.post("/api/query", json={"query": query}) for query in (
+            "SHOW TABLES IN samples.tpch",
+            "DESCRIBE TABLE main.default.users",
+            "SHOW FUNCTIONS",
+        )]
+
+    tables, described, unsupported = call_api(scenario)
+    assert tables.status_code == 200, tables.text
+    assert {"database": "tpch", "tableName": "region", "isTemporary": "false"} in tables.json()["data"]
+    assert described.status_code == 200, described.text
+    assert described.json()["data"][0] == {"col_name": "id", "data_type": "int", "comment": "User ID"}
+    assert unsupported.status_code == 400
+    assert "not supported in mock mode" in unsupported.json()["detail"]
@@ -0,0 +1,24 @@
+from app.services.databricks import databricks_service
+
+
+def test_statement_without_result_set_returns_an_empty_page(call_api, monkeypatch):
+    async def get_statement(statement_id):
+        # What the warehouse returns for a finished CREATE/DROP: no manifest, no result
+        return {"statement_id": statement_id, "status": {"state": "SUCCEEDED"}}
+
+    async def get_statement_chunk(statement_id, chunk_index=0):
+        raise AssertionError("no chunk to fetch for a statement without a result set")
+
+    monkeypatch.setattr(databricks_service, "get_statement", get_statement)
+    monkeypatch.setattr(databricks_service, "get_statement_chunk", get_statement_chunk)
+
+    async def scenario(client):
+        rows = await client.get("/api/query/jobs/ddl-1/result")
+        columnar = await client.get("/api/query/jobs/ddl-1/result", params={"format": "columnar"})
+        return rows, columnar
+
+    rows, columnar = call_api(scenario)
+    assert rows.status_code == 200, rows.text
+    assert rows.json()["data"] == []
+    assert rows.json()["next_chunk_index"] is None
+    assert columnar.json()["columns"] == [] and columnar.json()["data"] == []
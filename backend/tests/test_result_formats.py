@@ -0,0 +1,27 @@
+import pyarrow as pa
+
+from app.services import arrow_results, result_formats
+
+COLUMNS = [
+    {"name": "id", "type_name": "LONG"},
+    {"name": "amount", "type_name": "DECIMAL"},
+    {"name": "city", "type_name": "STRING"},
+]
+ROWS = [["1", "2.50", "Lisbon"], ["2", "3.75", "Porto"]]
+
+
+def test_arrow_columnar_types_match_the_json_path():
+    table = arrow_results.rows_to_table(COLUMNS, ROWS)
+    expected = result_formats.columnar_payload(COLUMNS, ROWS)["types"]
+    assert result_formats.table_columnar_payload(table, COLUMNS)["types"] == expected
+
+
+def test_arrow_types_map_to_databricks_type_names():
+    table = pa.table({
+        "id": pa.array([1], pa.int64()),
+        "ratio": pa.array([0.5], pa.float64()),
+        "ok": pa.array([True]),
+        "at": pa.array([0], pa.timestamp("us")),
+        "name": pa.array(["a"]),
+    })
+    assert result_formats.table_columnar_payload(table)["types"] == ["LONG", "DOUBLE", "BOOLEAN", "TIMESTAMP", "STRING"]
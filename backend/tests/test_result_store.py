@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+
+from app.api import routes
+from app.core.config import DatabricksConfig
+from app.services import databricks
+from app.services.databricks import DatabricksService
+from app.services.http_pool import WorkspaceClientPool
+from app.services.query_cache import QueryResultCache
+from app.services.result_store import ResultStore, strings_table
+
+HOST = "https://workspace.cloud.databricks.com"
+
+
+def test_max_age_defaults_to_query_cache_ttl(tmp_path, monkeypatch):
+    monkeypatch.delenv("RESULT_STORE_MAX_AGE_SECONDS", raising=False)
+    monkeypatch.setenv("QUERY_CACHE_TTL_SECONDS", "120")
+    assert ResultStore(str(tmp_path)).max_age_seconds == 120
+
+
+def test_results_are_not_shared_between_tokens(tmp_path, monkeypatch):
+    statements = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        statements.append(request.headers["authorization"])
+        return httpx.Response(200, json={
+            "statement_id": f"s{len(statements)}",
+            "status": {"state": "SUCCEEDED"},
+            "manifest": {"schema": {"columns": [{"name": "owner", "type_name": "STRING"}]}},
+            "result": {"data_array": [[request.headers["authorization"]]]},
+        })
+
+    alice = DatabricksConfig(host=HOST, token="alice-token", warehouse_id="wh")
+    bob = DatabricksConfig(host=HOST, token="bob-token", warehouse_id="wh")
+    current = {"config": alice}
+    monkeypatch.setattr(databricks, "get_databricks_config", lambda: current["config"])
+
+    async def scenario():
+        pool = WorkspaceClientPool()
+        await pool.configure(transport=httpx.MockTransport(handler))
+        # A fresh memory cache per call: only the on-disk store could leak results
+        store = ResultStore(str(tmp_path), enabled=True)
+        try:
+            results = []
+            for config in (alice, bob, alice):
+                current["config"] = config
+                service = DatabricksService(pool=pool, cache=QueryResultCache(enabled=True), store=store)
+                meta = await service.execute_sql("SELECT current_user() LIMIT 1")
+                await service.flush_writes()
+                results.append(meta["result"]["data_array"][0][0])
+            return results
+        finally:
+            await pool.reset()
+
+    results = asyncio.run(scenario())
+    assert results == ["Bearer alice-token", "Bearer bob-token", "Bearer alice-token"]
+    # Bob's query went to the warehouse; Alice's second one came from her own stored result
+    assert statements == ["Bearer alice-token", "Bearer bob-token"]
+
+
+def test_query_response_carries_the_result_fingerprint(call_api, tmp_path, monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={
+            "statement_id": "s1",
+            "status": {"state": "SUCCEEDED"},
+            "manifest": {"schema": {"columns": [{"name": "n", "type_name": "INT"}]}},
+            "result": {"data_array": [["1"]]},
+        })
+
+    config = DatabricksConfig(host=HOST, token="token", warehouse_id="wh")
+    store = ResultStore(str(tmp_path), enabled=True)
+    monkeypatch.setattr(databricks, "get_databricks_config", lambda: config)
+    monkeypatch.setattr(routes.databricks_service, "store", store)
+    monkeypatch.setattr(routes, "result_store", store)
+
+    async def scenario(client):
+        await routes.workspace_pool.configure(transport=httpx.MockTransport(handler))
+        try:
+            resp = await client.post("/api/query", json={"query": "SELECT 1 AS n"})
+            # The store is written after the response, in the background
+            await routes.databricks_service.flush_writes()
+            stats = await client.get("/api/query/store/stats")
+            return resp, stats.json()
+        finally:
+            await routes.workspace_pool.reset()
+
+    resp, stats = call_api(scenario)
+    assert resp.status_code == 200, resp.text
+    fp = resp.headers["X-Result-Fingerprint"]
+    assert [entry["fingerprint"] for entry in stats["recent"]] == [fp]
+
+
+def test_workspace_reset_clears_the_result_store(tmp_path, monkeypatch):
+    store = ResultStore(str(tmp_path), enabled=True)
+    columns = [{"name": "value"}]
+    store.put(("SELECT 1", "wh", None, None, ()), {"manifest": {}}, strings_table(columns, [["1"]]))
+    assert store.stats()["entries"] == 1
+
+    monkeypatch.setattr(routes, "result_store", store)
+    routes.reset_workspace_state()
+    assert store.stats()["entries"] == 0
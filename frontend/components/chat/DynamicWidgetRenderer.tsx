@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { WidgetConfig, TableChartWidgetConfig } from '../../types';
-import { getDataForSource, getDashboardConfig, createDashboard, addWidgetToDashboard } from '../../services/dashboardService';
+import { getDataForSource, getWidgetData, getDashboardConfig, createDashboard, addWidgetToDashboard } from '../../services/dashboardService';
 import { useSpreadsheet } from '../../hooks/useSpreadsheet';
 import BarChartComponent from '../charts/BarChartComponent';
 import LineChartComponent from '../charts/LineChartComponent';
@@ -23,6 +23,8 @@ interface DynamicWidgetRendererProps {
 
 export const DynamicWidgetRenderer: React.FC<DynamicWidgetRendererProps> = ({ config, activeFilters = {}, onCodeExecuted }) => {
     const [data, setData] = useState<any[]>([]);
+    // The config the chart renders with; differs from config when the data comes pre-aggregated
+    const [renderConfig, setRenderConfig] = useState<WidgetConfig>(config);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState<string | null>(null);
     const [showConfig, setShowConfig] = useState(false);
@@ -36,18 +38,23 @@ export const DynamicWidgetRenderer: React.FC<DynamicWidgetRendererProps> = ({ co
             setLoading(true);
             setError(null);
             try {
-                let options = undefined;
                 if (config.type === 'table') {
                     const tableConfig = config as TableChartWidgetConfig;
+                    let options = undefined;
                     if (tableConfig.limit || tableConfig.sort) {
                         options = {
                             limit: tableConfig.limit,
                             sort: tableConfig.sort
                         };
                     }
+                    setRenderConfig(config);
+                    setData(await getDataForSource(config.dataSource, options));
+                } else {
+                    // KPI, bar and pie widgets over a table come back aggregated by the warehouse
+                    const result = await getWidgetData(config);
+                    setRenderConfig(result.config);
+                    setData(result.data);
                 }
-                const result = await getDataForSource(config.dataSource, options);
-                setData(result);
             } catch (err) {
                 setError("Failed to load data");
                 console.error(err);
@@ -120,7 +127,7 @@ export const DynamicWidgetRenderer: React.FC<DynamicWidgetRendererProps> = ({ co
 
         switch (config.type) {
             case 'bar':
-                return <BarChartComponent config={config} {...commonProps} />;
+                return <BarChartComponent config={renderConfig as typeof config} {...commonProps} />;
             case 'line':
                 return <LineChartComponent config={config} activeFilters={activeFilters} {...commonProps} />;
             case 'scatter':
@@ -130,11 +137,11 @@ export const DynamicWidgetRenderer: React.FC<DynamicWidgetRendererProps> = ({ co
             case 'table':
                 return <TableChartComponent config={config} {...commonProps} />;
             case 'pie':
-                return <PieChartComponent config={config} {...commonProps} />;
+                return <PieChartComponent config={renderConfig as typeof config} {...commonProps} />;
             case 'donut':
                 return <DonutChartComponent config={config} {...commonProps} />;
             case 'kpi':
-                return <KPIComponent config={config} data={data} onSeeData={commonProps.onSeeData} />;
+                return <KPIComponent config={renderConfig as typeof config} data={data} onSeeData={commonProps.onSeeData} />;
             case 'gauge':
                 return <GaugeChartComponent config={config} {...commonProps} />;
             case 'markdown':
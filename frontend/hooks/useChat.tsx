@@ -3,7 +3,7 @@ import type { Message, ToolCall, Session, StructuredInquiry, TreeMessage, AgentD
 import { streamChatResponse } from '../services/chatService';
 import { parseStreamedContent } from '../utils/streamParser';
 import { getDataForSource, executeRawQuery } from '../services/dashboardService';
-import { fetchCatalogs, fetchSchemas, fetchTables, fetchTableDetails } from '../services/explorerService';
+import { listCatalogs, listSchemas, listTables, fetchTableDetails } from '../services/explorerService';
 import { saveSession, getSession, createSession, deleteSession as deleteSessionService, updateSessionTitle, clearAllSessions as clearAllSessionsService } from '../services/sessionService';
 import { agentRegistry, DEFAULT_AGENTS } from '../services/agentRegistry';
 
@@ -498,21 +498,21 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
                   summary: `Successfully fetched ${(data || []).length} rows from ${params.dataSource}`
               };
           } else if (command.tool === 'list_catalogs') {
-               const catalogs = await fetchCatalogs();
+               const catalogs = await listCatalogs();
                return {
                    status: 'success',
                    data: catalogs,
                    summary: `Found ${catalogs.length} catalogs.`
                };
           } else if (command.tool === 'list_schemas') {
-               const schemas = await fetchSchemas(params.catalog_name);
+               const schemas = await listSchemas(params.catalog_name);
                return {
                    status: 'success',
                    data: schemas,
                    summary: `Found ${schemas.length} schemas in ${params.catalog_name}.`
                };
           } else if (command.tool === 'list_tables') {
-               const tables = await fetchTables(params.catalog_name, params.schema_name);
+               const tables = await listTables(params.catalog_name, params.schema_name);
                return {
                    status: 'success',
                    data: tables,
@@ -1,5 +1,5 @@
 import { useState, useMemo, useCallback, useRef, useEffect } from 'react';
-import { fetchCatalogs, fetchSchemas, fetchTables } from '../services/explorerService';
+import { fetchCatalogs, fetchSchemas, fetchTables, getMetastoreTree, catalogsFromTree, schemasFromTree, tablesFromTree, Catalog, Schema, Table } from '../services/explorerService';
 
 export type NodeType = 'CATALOG' | 'SCHEMA' | 'TABLE';
 
@@ -15,6 +15,24 @@ export interface TreeNode {
   data?: any;           // Objeto original (Catalog/Schema/Table)
 }
 
+const schemaNode = (catalog: string, schema: Schema): TreeNode => ({
+  id: `${catalog}.${schema.name}`,
+  label: schema.name,
+  type: 'SCHEMA',
+  level: 1,
+  parentId: catalog,
+  data: schema
+});
+
+const tableNode = (catalog: string, schema: string, table: Table): TreeNode => ({
+  id: `${catalog}.${schema}.${table.name}`,
+  label: table.name,
+  type: 'TABLE',
+  level: 2,
+  parentId: `${catalog}.${schema}`,
+  data: table
+});
+
 export const useDatabaseTree = () => {
   const [catalogs, setCatalogs] = useState<any[]>([]);
   const [isLoadingCatalogs, setIsLoadingCatalogs] = useState(true);
@@ -27,13 +45,31 @@ export const useDatabaseTree = () => {
 
   const [loadingNodes, setLoadingNodes] = useState<Set<string>>(new Set());
 
-  // 1. Carregar Catálogos (Raiz) na montagem
+  // 1. Carregar a árvore inteira numa única requisição (/explorer/tree) na montagem.
+  // Os níveis que o crawl não conseguiu listar ficam fora do cache e são buscados ao expandir.
   useEffect(() => {
     const loadCatalogs = async () => {
       try {
         setIsLoadingCatalogs(true);
-        const data = await fetchCatalogs();
-        setCatalogs(data);
+        let data: Catalog[] | null = null;
+        try {
+          const tree = await getMetastoreTree();
+          data = catalogsFromTree(tree);
+          for (const catalog of data ?? []) {
+            const schemas = schemasFromTree(tree, catalog.name);
+            if (!schemas) continue;
+            loadedChildrenRef.current[catalog.name] = schemas.map(s => schemaNode(catalog.name, s));
+            for (const schema of schemas) {
+              const tables = tablesFromTree(tree, catalog.name, schema.name);
+              if (tables) {
+                loadedChildrenRef.current[`${catalog.name}.${schema.name}`] = tables.map(t => tableNode(catalog.name, schema.name, t));
+              }
+            }
+          }
+        } catch (err) {
+          console.warn("Failed to load the metastore tree, listing level by level", err);
+        }
+        setCatalogs(data ?? await fetchCatalogs());
       } catch (err) {
         console.error("Failed to load catalogs", err);
       } finally {
@@ -64,26 +100,12 @@ export const useDatabaseTree = () => {
           
           if (node.type === 'CATALOG') {
             const schemas = await fetchSchemas(node.label);
-            children = schemas.map(s => ({
-              id: `${node.label}.${s.name}`,
-              label: s.name,
-              type: 'SCHEMA',
-              level: 1,
-              parentId: node.id,
-              data: s
-            }));
+            children = schemas.map(s => schemaNode(node.label, s));
           } else if (node.type === 'SCHEMA') {
             // node.id assume formato "catalog.schema"
             const [catalog, schema] = node.id.split('.');
             const tables = await fetchTables(catalog, schema);
-            children = tables.map(t => ({
-              id: `${catalog}.${schema}.${t.name}`,
-              label: t.name,
-              type: 'TABLE',
-              level: 2,
-              parentId: node.id,
-              data: t
-            }));
+            children = tables.map(t => tableNode(catalog, schema, t));
           }
 
           loadedChildrenRef.current[node.id] = children;
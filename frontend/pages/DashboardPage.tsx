@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import DashboardGrid from '../components/DashboardGrid';
 import { DashboardBuilder } from '../components/builder/DashboardBuilder';
 import KPIComponent from '../components/charts/KPIComponent';
@@ -29,7 +29,15 @@ import CandlestickChartComponent from '../components/charts/CandlestickChartComp
 import FormComponent from '../components/charts/FormComponent';
 import CodeExecutionWidget from '../components/widgets/CodeExecutionWidget';
 import DashboardFilters from '../components/DashboardFilters';
-import { getDashboardConfig, getDataForSource, updateDashboardLayout } from '../services/dashboardService';
+import {
+    getDashboardConfig,
+    updateDashboardLayout,
+    toAggregateFilters,
+    getWidgetAggregateSpec,
+    getAggregatedWidgetConfig,
+    loadDashboardWidgets,
+} from '../services/dashboardService';
+import type { AggregateSpec } from '../services/api';
 import type { AppConfig, WidgetConfig, DashboardFilterConfig } from '../types';
 import DataSourceSelector from '../components/DataSourceSelector';
 import { ExclamationTriangleIcon } from '../components/icons/ExclamationTriangleIcon';
@@ -128,6 +136,7 @@ interface DashboardPageProps {
 const DashboardPage: React.FC<DashboardPageProps> = ({ dashboardId }) => {
     const [config, setConfig] = useState<AppConfig | null>(null);
     const [data, setData] = useState<{ [key: string]: any[] }>({});
+    const [aggregatedData, setAggregatedData] = useState<{ [widgetId: string]: any[] }>({});
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState<string | null>(null);
     const [activeFilters, setActiveFilters] = useState<{ [key: string]: any }>({});
@@ -139,39 +148,18 @@ const DashboardPage: React.FC<DashboardPageProps> = ({ dashboardId }) => {
     const [editingWidgetId, setEditingWidgetId] = useState<string | null>(null);
 
     useEffect(() => {
-        const fetchData = async () => {
+        const fetchConfig = async () => {
             setLoading(true);
             setError(null);
             setConfig(null);
             setData({});
+            setAggregatedData({});
             setActiveFilters({});
             setIsEditMode(false); // Reset edit mode on dashboard change
             try {
                 const dashboardConfig = await getDashboardConfig(dashboardId);
                 setConfig(dashboardConfig);
                 setLocalWidgets(dashboardConfig.dashboard.widgets); // Initialize local widgets
-
-                const requiredSources = [...new Set(dashboardConfig.dashboard.widgets.map(w => w.dataSource))];
-                if (dashboardConfig.dashboard.filters) {
-                    dashboardConfig.dashboard.filters.forEach(f => {
-                        if (!requiredSources.includes(f.dataSource)) {
-                            requiredSources.push(f.dataSource);
-                        }
-                    });
-                }
-                
-                const dataPromises = requiredSources.map(sourceName => 
-                    getDataForSource(sourceName).then(data => ({ name: sourceName, data }))
-                );
-                const resolvedData = await Promise.all(dataPromises);
-
-                const dataMap = resolvedData.reduce((acc, { name, data }) => {
-                    acc[name] = data;
-                    return acc;
-                }, {} as { [key: string]: any[] });
-
-                setData(dataMap);
-
             } catch (err) {
                 console.error("Failed to load dashboard data", err);
                 if (err instanceof Error) {
@@ -183,9 +171,55 @@ const DashboardPage: React.FC<DashboardPageProps> = ({ dashboardId }) => {
                 setLoading(false);
             }
         };
-        fetchData();
+        fetchConfig();
     }, [dashboardId]);
 
+    // KPI, bar and pie widgets over a warehouse table are aggregated there, with the active
+    // dashboard filters pushed down. Every other widget renders the rows of its data source.
+    const aggregateSpecs = useMemo(() => {
+        const specs: { [widgetId: string]: AggregateSpec } = {};
+        if (!config) return specs;
+        localWidgets.forEach(widget => {
+            const filters = toAggregateFilters(widget, activeFilters, config.dashboard.filters);
+            const spec = filters && getWidgetAggregateSpec(widget, filters);
+            if (spec) specs[widget.id] = spec;
+        });
+        return specs;
+    }, [config, localWidgets, activeFilters]);
+
+    const rawSources = useMemo(() => {
+        if (!config) return [];
+        const sources = new Set(localWidgets.filter(w => w.dataSource && !aggregateSpecs[w.id]).map(w => w.dataSource));
+        // Filter options are read from their data source
+        config.dashboard.filters?.forEach(f => sources.add(f.dataSource));
+        return [...sources];
+    }, [config, localWidgets, aggregateSpecs]);
+
+    const aggregateSpecsKey = JSON.stringify(aggregateSpecs);
+    const rawSourcesKey = JSON.stringify(rawSources);
+
+    useEffect(() => {
+        if (!config) return;
+        const controller = new AbortController();
+        const missingSources = rawSources.filter(name => !(name in data));
+
+        // Everything the dashboard still needs comes back in one streamed request
+        loadDashboardWidgets(
+            missingSources,
+            aggregateSpecs,
+            (sourceName, rows) => {
+                if (!controller.signal.aborted) setData(prev => ({ ...prev, [sourceName]: rows }));
+            },
+            (widgetId, rows) => {
+                if (!controller.signal.aborted) setAggregatedData(prev => ({ ...prev, [widgetId]: rows }));
+            },
+            { signal: controller.signal }
+        ).catch(err => {
+            if (!controller.signal.aborted) console.error("Failed to load dashboard data", err);
+        });
+        return () => controller.abort();
+    }, [config, aggregateSpecsKey, rawSourcesKey]);
+
     const handleChartCategoryClick = (column: string, value: string) => {
         if (!config?.dashboard.filters) return;
 
@@ -332,10 +366,18 @@ const DashboardPage: React.FC<DashboardPageProps> = ({ dashboardId }) => {
         setEditingWidgetId(null);
     };
 
-    const renderWidget = (widget: WidgetConfig) => {
-                        const widgetData = data[widget.dataSource] || [];
-        const dashboardFilteredData = applyDashboardFilters(widgetData, activeFilters, config?.dashboard.filters);
-                        const filteredData = applyWidgetFilters(dashboardFilteredData, widget.filters);
+    const renderWidget = (widgetConfig: WidgetConfig) => {
+        let widget = widgetConfig;
+        let filteredData: any[];
+        if (aggregateSpecs[widget.id]) {
+            // Already filtered and aggregated by the warehouse
+            widget = getAggregatedWidgetConfig(widget);
+            filteredData = aggregatedData[widget.id] || [];
+        } else {
+            const widgetData = data[widget.dataSource] || [];
+            const dashboardFilteredData = applyDashboardFilters(widgetData, activeFilters, config?.dashboard.filters);
+            filteredData = applyWidgetFilters(dashboardFilteredData, widget.filters);
+        }
                         const seeDataHandler = () => handleSeeData(widget.title, filteredData, widget.dataSource);
                         
                         if (widget.type === 'kpi') {
@@ -44,3 +44,151 @@ export const executeQuery = async (query: string, language: string = 'sql') => {
   }
   return response.json();
 };
+
+export interface QueryStreamFrame {
+  type: 'schema' | 'rows' | 'end' | 'error';
+  columns?: { name: string; type_name?: string; type_text?: string }[];
+  data?: any[];
+  row_count?: number;
+  truncated?: boolean;
+  detail?: string;
+}
+
+/**
+ * Streams /api/query as NDJSON frames so rows can be rendered as each result chunk arrives.
+ * Calls onFrame for every frame and resolves once the stream ends.
+ */
+export const executeQueryStream = async (
+  query: string,
+  onFrame: (frame: QueryStreamFrame) => void,
+  options?: { maxRows?: number; signal?: AbortSignal }
+): Promise<void> => {
+  const response = await fetch('/api/query', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ query, language: 'sql', stream: true, max_rows: options?.maxRows }),
+    signal: options?.signal,
+  });
+  if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+      throw new Error(error.detail || 'Failed to execute query');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline = buffer.indexOf('\n');
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) {
+        const frame: QueryStreamFrame = JSON.parse(line);
+        if (frame.type === 'error') throw new Error(frame.detail || 'Failed to execute query');
+        onFrame(frame);
+      }
+      newline = buffer.indexOf('\n');
+    }
+  }
+};
+
+export interface AggregateSpec {
+  dataSource: string;
+  dimensions?: string[];
+  measures?: { column?: string; aggregation: 'sum' | 'avg' | 'min' | 'max' | 'count' | 'count_distinct'; alias?: string }[];
+  filters?: { column: string; operator: string; value: any }[];
+  sort?: { column: string; direction: 'asc' | 'desc' }[];
+  limit?: number;
+}
+
+/**
+ * Runs a widget aggregation on the warehouse (GROUP BY pushdown) and returns only the aggregated rows.
+ */
+export const aggregateWidgetData = async (spec: AggregateSpec): Promise<any[]> => {
+  const response = await fetch('/api/widgets/aggregate', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      data_source: spec.dataSource,
+      dimensions: spec.dimensions,
+      measures: spec.measures,
+      filters: spec.filters,
+      sort: spec.sort,
+      limit: spec.limit,
+    }),
+  });
+  if (!response.ok) {
+      const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+      throw new Error(error.detail || 'Failed to aggregate widget data');
+  }
+  const result = await response.json();
+  return result.data || [];
+};
+
+export interface WidgetDataRequest {
+  widgetId: string;
+  query?: string;
+  dataSource?: string;
+  aggregate?: AggregateSpec;
+  maxRows?: number;
+}
+
+/**
+ * Loads the data of every widget in one request. onWidget is called as soon as each widget's result arrives.
+ */
+export const loadDashboardData = async (
+  widgets: WidgetDataRequest[],
+  onWidget: (widgetId: string, data: any[] | null, error?: string) => void,
+  options?: { maxConcurrency?: number; signal?: AbortSignal }
+): Promise<void> => {
+  const response = await fetch('/api/dashboards/data', {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      widgets: widgets.map(w => ({
+        widget_id: w.widgetId,
+        query: w.query,
+        data_source: w.dataSource,
+        max_rows: w.maxRows,
+        aggregate: w.aggregate && {
+          data_source: w.aggregate.dataSource,
+          dimensions: w.aggregate.dimensions,
+          measures: w.aggregate.measures,
+          filters: w.aggregate.filters,
+          sort: w.aggregate.sort,
+          limit: w.aggregate.limit,
+        },
+      })),
+      max_concurrency: options?.maxConcurrency,
+    }),
+    signal: options?.signal,
+  });
+  if (!response.ok || !response.body) {
+      const error = await response.json().catch(() => ({ detail: 'Unknown error' }));
+      throw new Error(error.detail || 'Failed to load dashboard data');
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let newline = buffer.indexOf('\n');
+    while (newline !== -1) {
+      const line = buffer.slice(0, newline).trim();
+      buffer = buffer.slice(newline + 1);
+      if (line) {
+        const frame = JSON.parse(line);
+        if (frame.type === 'widget') {
+          onWidget(frame.widget_id, frame.error ? null : frame.data, frame.error);
+        }
+      }
+      newline = buffer.indexOf('\n');
+    }
+  }
+};
@@ -48,7 +48,7 @@ export async function streamChatResponse(
       body: JSON.stringify({
         messages: apiMessages,
         endpoint_name: config?.serving_endpoint, // Optional override
-        temperature: sessionConfig?.modelTemperature || 0.7
+        temperature: sessionConfig?.modelTemperature ?? 0.7
       }),
       signal
     });
@@ -1,5 +1,5 @@
-import type { Dashboard, AppConfig, WidgetConfig, SortConfig } from '../types';
-import { executeQuery } from './api';
+import type { Dashboard, AppConfig, WidgetConfig, SortConfig, DashboardFilterConfig } from '../types';
+import { executeQuery, aggregateWidgetData, loadDashboardData, AggregateSpec, WidgetDataRequest } from './api';
 import { cacheService } from './cacheService';
 import { fruitSalesDashboardConfig } from './dashboards/fruitSales';
 import {
@@ -184,6 +184,9 @@ const getStaticDataForSource = (sourceName: string): Promise<any[]> | null => {
     return null;
 };
 
+const isTableSource = (sourceName: string): boolean =>
+    !!sourceName && sourceName.includes('.') && sourceName.split('.').length >= 2;
+
 export const getDataForSource = (sourceName: string, options?: { limit?: number, sort?: SortConfig[] }): Promise<any[]> => {
     const staticDataPromise = getStaticDataForSource(sourceName);
     if (staticDataPromise) {
@@ -197,7 +200,7 @@ export const getDataForSource = (sourceName: string, options?: { limit?: number,
     }
 
     // If sourceName looks like a table (e.g. "catalog.schema.table"), try to fetch it
-    if (sourceName.includes('.') && sourceName.split('.').length >= 2) {
+    if (isTableSource(sourceName)) {
         let query = `SELECT * FROM ${sourceName}`;
         
         if (options?.sort && options.sort.length > 0) {
@@ -228,6 +231,177 @@ export const getDataForSource = (sourceName: string, options?: { limit?: number,
     return Promise.resolve([]);
 };
 
+type AggregateFilter = NonNullable<AggregateSpec['filters']>[number];
+
+/**
+ * Translates the active dashboard filters into aggregate filters for a widget.
+ * Returns null when one of them can't be pushed down (a filter of another data source,
+ * or a multiselect with several values), in which case the widget keeps filtering raw rows.
+ */
+export const toAggregateFilters = (
+    widget: WidgetConfig,
+    activeFilters: { [key: string]: any },
+    filterConfigs: DashboardFilterConfig[] = []
+): AggregateFilter[] | null => {
+    const filters: AggregateFilter[] = [];
+    for (const column of Object.keys(activeFilters)) {
+        const value = activeFilters[column];
+        const config = filterConfigs.find(f => f.column === column);
+        if (!config) continue;
+
+        if (config.type === 'daterange') {
+            const { start, end } = value || {};
+            if (!start && !end) continue;
+            if (config.dataSource !== widget.dataSource) return null;
+            if (start) filters.push({ column, operator: '>=', value: start });
+            if (end) {
+                // Same as the client-side filter: the end date is inclusive
+                const endDate = new Date(end);
+                endDate.setDate(endDate.getDate() + 1);
+                filters.push({ column, operator: '<', value: endDate.toISOString().slice(0, 10) });
+            }
+            continue;
+        }
+
+        if (value === null || value === undefined || value === '' || (Array.isArray(value) && value.length === 0)) continue;
+        if (config.dataSource !== widget.dataSource) return null;
+        if (config.type === 'multiselect') {
+            if (value.length > 1) return null;
+            filters.push({ column, operator: '===', value: value[0] });
+        } else if (config.type === 'text') {
+            filters.push({ column, operator: 'contains', value });
+        } else {
+            filters.push({ column, operator: '===', value });
+        }
+    }
+    return filters;
+};
+
+/**
+ * Builds the /api/widgets/aggregate spec of a KPI, bar or pie widget over a warehouse table,
+ * so only the aggregated rows are fetched. Returns null for widgets that need the raw rows.
+ */
+export const getWidgetAggregateSpec = (widget: WidgetConfig, extraFilters: AggregateFilter[] = []): AggregateSpec | null => {
+    if (!isTableSource(widget.dataSource)) return null;
+    const filters = [...(widget.filters || []), ...extraFilters];
+
+    switch (widget.type) {
+        case 'kpi':
+            return {
+                dataSource: widget.dataSource,
+                measures: [{
+                    // The client-side count is a row count, so count rows rather than non-null values
+                    column: widget.aggregation === 'count' ? undefined : widget.dataColumn,
+                    aggregation: widget.aggregation,
+                    alias: widget.dataColumn,
+                }],
+                filters,
+            };
+        case 'bar': {
+            const dimensions = [widget.categoryColumn];
+            if (widget.colorCategoryColumn) dimensions.push(widget.colorCategoryColumn);
+            if (dimensions.includes(widget.valueColumn)) return null;
+            return {
+                dataSource: widget.dataSource,
+                dimensions,
+                measures: [{
+                    column: widget.aggregation === 'count' ? undefined : widget.valueColumn,
+                    aggregation: widget.aggregation,
+                    alias: widget.valueColumn,
+                }],
+                filters,
+                limit: 1000,
+            };
+        }
+        case 'pie':
+            if (widget.categoryColumn === widget.valueColumn) return null;
+            return {
+                dataSource: widget.dataSource,
+                dimensions: [widget.categoryColumn],
+                measures: [{ column: widget.valueColumn, aggregation: 'sum', alias: widget.valueColumn }],
+                filters,
+                limit: 1000,
+            };
+        case 'histogram':
+            // Not pushed down: the chart picks its bin thresholds from the extent of every
+            // distribution (d3 ticks), so it needs the raw values, not pre-counted buckets
+            return null;
+    }
+    return null;
+};
+
+/**
+ * The config to render an aggregated widget with. The charts aggregate their rows again;
+ * with one row per group every aggregation is already a no-op except the counts, which
+ * become sums of the counted rows.
+ */
+export const getAggregatedWidgetConfig = (widget: WidgetConfig): WidgetConfig => {
+    if ((widget.type === 'kpi' || widget.type === 'bar') && (widget.aggregation === 'count' || widget.aggregation === 'count_distinct')) {
+        return { ...widget, aggregation: 'sum' } as WidgetConfig;
+    }
+    return widget;
+};
+
+/**
+ * Loads the rows a widget renders: aggregated on the warehouse when the widget allows it,
+ * otherwise the raw rows of its data source.
+ */
+export const getWidgetData = async (widget: WidgetConfig, extraFilters: AggregateFilter[] = []): Promise<{ data: any[]; config: WidgetConfig }> => {
+    const spec = getWidgetAggregateSpec(widget, extraFilters);
+    if (!spec) {
+        return { data: await getDataForSource(widget.dataSource), config: widget };
+    }
+    try {
+        return { data: await aggregateWidgetData(spec), config: getAggregatedWidgetConfig(widget) };
+    } catch (err) {
+        console.error(`Failed to aggregate data for widget ${widget.id}:`, err);
+        return { data: [], config: widget };
+    }
+};
+
+// Request ids of raw data sources in /api/dashboards/data, kept apart from widget ids
+const SOURCE_REQUEST_PREFIX = 'source:';
+
+/**
+ * Loads what a dashboard renders in one /api/dashboards/data request: the raw rows of its
+ * table data sources and the aggregated rows of its pushed-down widgets. Static and cached
+ * sources are served locally. onSource / onWidget fire as each result arrives.
+ */
+export const loadDashboardWidgets = async (
+    sources: string[],
+    aggregates: { [widgetId: string]: AggregateSpec },
+    onSource: (sourceName: string, data: any[]) => void,
+    onWidget: (widgetId: string, data: any[]) => void,
+    options?: { signal?: AbortSignal }
+): Promise<void> => {
+    const requests: WidgetDataRequest[] = [];
+    const local: Promise<void>[] = [];
+    for (const sourceName of sources) {
+        if (!isTableSource(sourceName) || cacheService.getCachedData(sourceName)) {
+            local.push(getDataForSource(sourceName).then(data => onSource(sourceName, data)));
+        } else {
+            requests.push({ widgetId: SOURCE_REQUEST_PREFIX + sourceName, dataSource: sourceName });
+        }
+    }
+    for (const [widgetId, aggregate] of Object.entries(aggregates)) {
+        requests.push({ widgetId, aggregate });
+    }
+
+    if (requests.length > 0) {
+        local.push(loadDashboardData(requests, (requestId, data, error) => {
+            if (error) console.error(`Failed to load dashboard data for ${requestId}:`, error);
+            if (requestId.startsWith(SOURCE_REQUEST_PREFIX)) {
+                const sourceName = requestId.slice(SOURCE_REQUEST_PREFIX.length);
+                if (data && data.length > 0) cacheService.cacheData(sourceName, data);
+                onSource(sourceName, data || []);
+            } else {
+                onWidget(requestId, data || []);
+            }
+        }, { signal: options?.signal }));
+    }
+    await Promise.all(local);
+};
+
 export const executeRawQuery = async (query: string, language: string): Promise<any[]> => {
     if (language === 'python') {
         return Promise.resolve([{ output: "Python execution is mocked. Result: [1, 2, 3, 4, 5]" }]);
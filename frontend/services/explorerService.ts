@@ -79,6 +79,28 @@ const fetchApi = async <T>(endpoint: string): Promise<T> => {
             return [] as unknown as T;
         }
 
+        if (endpoint.includes('/explorer/tree')) {
+            return {
+                catalogs: [
+                    { name: "main", comment: "Main catalog (Mock)", schemas: [
+                        { name: "default", comment: "Default schema (Mock)", tables: [
+                            { name: "users", table_type: "MANAGED" },
+                            { name: "transactions", table_type: "EXTERNAL" }
+                        ] },
+                        { name: "analytics", comment: "Analytics data (Mock)", tables: [] }
+                    ] },
+                    { name: "samples", comment: "Sample datasets (Mock)", schemas: [
+                        { name: "nyctaxi", comment: "NYC Taxi data (Mock)", tables: [
+                            { name: "trips", table_type: "MANAGED" }
+                        ] },
+                        { name: "tpch", comment: "TPC-H benchmark data (Mock)", tables: [] }
+                    ] }
+                ],
+                stats: {},
+                errors: []
+            } as unknown as T;
+        }
+
         if (endpoint.includes('/explorer/table/')) {
              // Mock table details
              return {
@@ -115,3 +137,93 @@ export const fetchTableDetails = async (fullTableName: string): Promise<TableDet
   return fetchApi<TableDetails>(`/explorer/table/${encodeURIComponent(fullTableName)}`);
 };
 
+export interface TreeTable {
+  name: string;
+  table_type: string;
+  columns?: { name: string; type_text: string }[];
+}
+
+export interface TreeSchema {
+  name: string;
+  comment?: string;
+  tables: TreeTable[];
+}
+
+export interface TreeCatalog {
+  name: string;
+  comment?: string;
+  schemas: TreeSchema[];
+}
+
+export interface MetastoreTree {
+  catalogs: TreeCatalog[];
+  stats: Record<string, number>;
+  errors: { path: string; error: string }[];
+}
+
+// Whole hierarchy (or a catalog / schema subtree) in a single request
+export const fetchMetastoreTree = async (options: { catalog?: string; schema?: string; includeColumns?: boolean; refresh?: boolean } = {}): Promise<MetastoreTree> => {
+  const params = new URLSearchParams();
+  if (options.catalog) params.set('catalog_name', options.catalog);
+  if (options.schema) params.set('schema_name', options.schema);
+  if (options.includeColumns) params.set('include_columns', 'true');
+  if (options.refresh) params.set('refresh', 'true');
+  const query = params.toString();
+  return fetchApi<MetastoreTree>(`/explorer/tree${query ? `?${query}` : ''}`);
+};
+
+let treeRequest: Promise<MetastoreTree> | null = null;
+
+// One tree request shared by the explorer sidebar and the agent's list_* tools
+export const getMetastoreTree = (refresh = false): Promise<MetastoreTree> => {
+  if (!treeRequest || refresh) {
+    treeRequest = fetchMetastoreTree({ refresh }).catch(error => {
+      treeRequest = null;
+      throw error;
+    });
+  }
+  return treeRequest;
+};
+
+// The helpers below return null for a level the crawl could not list, so callers fall back to its endpoint
+const crawlFailed = (tree: MetastoreTree, path: string) => tree.errors.some(e => e.path === path);
+
+export const catalogsFromTree = (tree: MetastoreTree): Catalog[] | null => {
+  if (crawlFailed(tree, '')) return null;
+  return tree.catalogs.map(c => ({ name: c.name, type: 'CATALOG', comment: c.comment }));
+};
+
+export const schemasFromTree = (tree: MetastoreTree, catalog: string): Schema[] | null => {
+  const node = tree.catalogs.find(c => c.name === catalog);
+  if (!node || crawlFailed(tree, catalog)) return null;
+  return node.schemas.map(s => ({ name: s.name, catalog_name: catalog, comment: s.comment }));
+};
+
+export const tablesFromTree = (tree: MetastoreTree, catalog: string, schema: string): Table[] | null => {
+  const node = tree.catalogs.find(c => c.name === catalog)?.schemas.find(s => s.name === schema);
+  if (!node || crawlFailed(tree, `${catalog}.${schema}`)) return null;
+  return node.tables.map(t => ({
+    name: t.name,
+    catalog_name: catalog,
+    schema_name: schema,
+    table_type: t.table_type,
+    full_name: `${catalog}.${schema}.${t.name}`,
+  }));
+};
+
+const fromTree = async <T>(pick: (tree: MetastoreTree) => T | null, fallback: () => Promise<T>): Promise<T> => {
+  try {
+    return pick(await getMetastoreTree()) ?? await fallback();
+  } catch {
+    return fallback();
+  }
+};
+
+export const listCatalogs = (): Promise<Catalog[]> =>
+  fromTree(catalogsFromTree, fetchCatalogs);
+
+export const listSchemas = (catalog: string): Promise<Schema[]> =>
+  fromTree(tree => schemasFromTree(tree, catalog), () => fetchSchemas(catalog));
+
+export const listTables = (catalog: string, schema: string): Promise<Table[]> =>
+  fromTree(tree => tablesFromTree(tree, catalog, schema), () => fetchTables(catalog, schema));